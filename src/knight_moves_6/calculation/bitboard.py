@@ -0,0 +1,197 @@
+# Bitboard representation of the 6x6 grid.
+# Each cell is a small integer `cell = row * 6 + col`, and a set of cells is a 36-bit integer mask.
+# Note that the cell numbering follows the (row, col) indices, i.e. "a1" is cell 0, "b1" is cell 1, "a2" is cell 6.
+from knight_moves_6.calculation.constant import GRID, KNIGHT_MOVES
+from knight_moves_6.calculation.coordinate_map import coord_to_index, index_to_coord
+
+GRID_SIZE = len(GRID)
+
+NUM_CELLS = GRID_SIZE * GRID_SIZE
+
+# Mask with all 36 cells set.
+FULL_MASK = (1 << NUM_CELLS) - 1
+
+
+def index_to_cell(row: int, col: int) -> int:
+    """Converts 2D list indices to a cell index."""
+    return row * GRID_SIZE + col
+
+
+def cell_to_index(cell: int) -> tuple[int, int]:
+    """Converts a cell index to 2D list indices as (row, col)."""
+    return divmod(cell, GRID_SIZE)
+
+
+def coord_to_cell(coord: str) -> int:
+    """Converts coordinate format (e.g., "a1") to a cell index."""
+    return index_to_cell(*coord_to_index(coord))
+
+
+def cell_to_coord(cell: int) -> str:
+    """Converts a cell index to coordinate format (e.g., "a1")."""
+    return index_to_coord(*cell_to_index(cell))
+
+
+def _build_neighbours() -> list[tuple[int, ...]]:
+    """Precompute the knight moves from every cell, in the same order as `KNIGHT_MOVES`."""
+    neighbours = []
+    for cell in range(NUM_CELLS):
+        row, col = cell_to_index(cell)
+        cell_neighbours = []
+        for dr, dc in KNIGHT_MOVES:
+            new_row, new_col = row + dr, col + dc
+            if 0 <= new_row < GRID_SIZE and 0 <= new_col < GRID_SIZE:
+                cell_neighbours.append(index_to_cell(new_row, new_col))
+        neighbours.append(tuple(cell_neighbours))
+    return neighbours
+
+
+# Cells reachable with one knight move from each cell, ordered as in `KNIGHT_MOVES`.
+NEIGHBOURS = _build_neighbours()
+
+# Same as `NEIGHBOURS`, but as a bitmask per cell.
+NEIGHBOUR_MASKS = [sum(1 << neighbour for neighbour in cell_neighbours) for cell_neighbours in NEIGHBOURS]
+
+
+def _build_free_neighbours() -> list[dict[int, tuple[int, ...]]]:
+    """Precompute, for every cell and every subset of its neighbours, the subset in `KNIGHT_MOVES` order."""
+    free_neighbours = []
+    for cell_neighbours in NEIGHBOURS:
+        subsets = {}
+        for subset in range(1 << len(cell_neighbours)):
+            chosen = tuple(neighbour for i, neighbour in enumerate(cell_neighbours) if subset >> i & 1)
+            subsets[sum(1 << neighbour for neighbour in chosen)] = chosen
+        free_neighbours.append(subsets)
+    return free_neighbours
+
+
+# Maps `NEIGHBOUR_MASKS[cell] & ~visited` to the unvisited neighbours of a cell, ordered as in `KNIGHT_MOVES`.
+FREE_NEIGHBOURS = _build_free_neighbours()
+
+# Coordinate string of each cell, to convert paths only at the output boundary.
+CELL_COORDS = tuple(cell_to_coord(cell) for cell in range(NUM_CELLS))
+
+
+# Translation tables from cell indices (as bytes) to the grid symbol of each cell, or of its reflection across the
+# horizontal axis. `bytes(cells).translate(SYMBOL_TABLE)` lists the symbols along a path in a single C call.
+SYMBOL_TABLE = bytes(ord(GRID[row][col]) for row, col in map(cell_to_index, range(NUM_CELLS))).ljust(256, b"?")
+REFLECTED_SYMBOL_TABLE = bytes(
+    ord(GRID[GRID_SIZE - 1 - row][col]) for row, col in map(cell_to_index, range(NUM_CELLS))
+).ljust(256, b"?")
+
+
+# Masks of the cells that can make a knight move with the given column change without leaving the grid.
+_COLUMN_0 = sum(1 << index_to_cell(row, 0) for row in range(GRID_SIZE))
+_COLUMNS = [_COLUMN_0 << col for col in range(GRID_SIZE)]
+_CAN_MOVE_RIGHT_1 = FULL_MASK & ~_COLUMNS[-1]
+_CAN_MOVE_RIGHT_2 = FULL_MASK & ~(_COLUMNS[-1] | _COLUMNS[-2])
+_CAN_MOVE_LEFT_1 = FULL_MASK & ~_COLUMNS[0]
+_CAN_MOVE_LEFT_2 = FULL_MASK & ~(_COLUMNS[0] | _COLUMNS[1])
+
+
+def knight_attacks(mask: int) -> int:
+    """Cells reachable with one knight move from any cell in `mask`, computed with shifts of the whole board."""
+    right_1 = mask & _CAN_MOVE_RIGHT_1
+    right_2 = mask & _CAN_MOVE_RIGHT_2
+    left_1 = mask & _CAN_MOVE_LEFT_1
+    left_2 = mask & _CAN_MOVE_LEFT_2
+    return (
+        right_1 << 2 * GRID_SIZE + 1
+        | left_1 << 2 * GRID_SIZE - 1
+        | right_2 << GRID_SIZE + 2
+        | left_2 << GRID_SIZE - 2
+        | right_1 >> 2 * GRID_SIZE - 1
+        | left_1 >> 2 * GRID_SIZE + 1
+        | right_2 >> GRID_SIZE - 2
+        | left_2 >> GRID_SIZE + 2
+    ) & FULL_MASK
+
+
+def is_reachable(source: int, target: int, visited: int) -> bool:
+    """
+    Check whether `target` can still be reached from `source` through cells that are not visited.
+
+    Flood fills from both cells at once, so that a small region cut off around either of them is detected quickly.
+
+    Args:
+        source (int): Cell index of the current position.
+        target (int): Cell index of the position to reach.
+        visited (int): Mask of visited cells.
+
+    Returns:
+        bool: True if there is a knight path from `source` to `target` through unvisited cells.
+    """
+    free = FULL_MASK & ~visited
+    from_source = source_frontier = 1 << source
+    from_target = target_frontier = 1 << target
+    while True:
+        source_frontier = knight_attacks(source_frontier) & free & ~from_source
+        if source_frontier & from_target:
+            return True
+        if not source_frontier:
+            return False
+        from_source |= source_frontier
+
+        target_frontier = knight_attacks(target_frontier) & free & ~from_target
+        if target_frontier & from_source:
+            return True
+        if not target_frontier:
+            return False
+        from_target |= target_frontier
+
+
+def knight_distances(target: int) -> list[int]:
+    """Minimum number of knight moves from every cell to `target` on the empty grid, by breadth-first search."""
+    distances = [-1] * NUM_CELLS
+    distances[target] = 0
+    frontier = [target]
+    while frontier:
+        next_frontier = []
+        for cell in frontier:
+            for neighbour in NEIGHBOURS[cell]:
+                if distances[neighbour] < 0:
+                    distances[neighbour] = distances[cell] + 1
+                    next_frontier.append(neighbour)
+        frontier = next_frontier
+    return distances
+
+
+def cells_to_path(cells: tuple[int, ...]) -> list[str]:
+    """Converts a sequence of cell indices to a path in coordinate format."""
+    return [CELL_COORDS[cell] for cell in cells]
+
+
+def path_to_cells(path: list[str]) -> tuple[int, ...]:
+    """Converts a path in coordinate format to a sequence of cell indices."""
+    return tuple(coord_to_cell(coord) for coord in path)
+
+
+def cells_to_signature(cells: tuple[int, ...], reflected: bool = False) -> str:
+    """Lists the grid symbols along a path of cell indices, or along its reflection, e.g. "AABBCCC"."""
+    return bytes(cells).translate(REFLECTED_SYMBOL_TABLE if reflected else SYMBOL_TABLE).decode()
+
+
+if __name__ == "__main__":
+
+    from knight_moves_6.calculation.validation import knight_moves
+
+    # Cross-check the precomputed neighbours against `knight_moves()`.
+    for cell in range(NUM_CELLS):
+        expected = [index_to_cell(row, col) for row, col in knight_moves(*cell_to_index(cell))]
+        assert list(NEIGHBOURS[cell]) == expected, cell
+        assert NEIGHBOUR_MASKS[cell] == sum(1 << neighbour for neighbour in expected), cell
+        assert knight_attacks(1 << cell) == NEIGHBOUR_MASKS[cell], cell
+    print("Neighbours match `knight_moves()`.")
+
+    # Test coordinate mapping to and from cell indices.
+    path = ["a1", "b3", "c5", "d3", "f4", "d5", "f6"]
+    cells = path_to_cells(path)
+    print(cells)
+    print(cells_to_path(cells))
+    print(cells_to_path(cells) == path)
+
+    # "f6" can only be entered from "d5" and "e4".
+    print(is_reachable(coord_to_cell("a1"), coord_to_cell("f6"), sum(1 << coord_to_cell(c) for c in ("a1", "d5"))))
+    print(
+        is_reachable(coord_to_cell("a1"), coord_to_cell("f6"), sum(1 << coord_to_cell(c) for c in ("a1", "d5", "e4")))
+    )
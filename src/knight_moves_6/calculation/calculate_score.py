@@ -1,5 +1,18 @@
+import functools
+from typing import Callable, NamedTuple
+
+from knight_moves_6.calculation.constant import PATH_SUM
 from knight_moves_6.calculation.coordinate_map import coord_to_index
 
+# Number of compiled expressions kept by `compile_expression()`, per process.
+EXPRESSION_CACHE_SIZE = 1 << 16
+
+# Characters of an expression once the f-string delimiters and braces are stripped.
+_EXPRESSION_CHARACTERS = frozenset("ABC+*()")
+
+# Deletes everything but the symbols from an expression, whose letters are the symbols along the path in order.
+_NOT_SYMBOLS = str.maketrans("", "", "{}()+*")
+
 
 def calculate_path_score(grid: list[list[str]], path: list[str], A: int, B: int, C: int) -> int:
     """
@@ -44,9 +57,31 @@ def calculate_path_score(grid: list[list[str]], path: list[str], A: int, B: int,
     return score
 
 
-def calculate_path_score_marginal(grid: list[list[str]], path: list[str], A: int, B: int, C: int) -> list[int]:
+class ScoreTrace(NamedTuple):
     """
-    Calculate the marginal score increase at each step in the path.
+    Every step of the score of a path, from `trace_path_score()`. All fields have one entry per cell of the path.
+
+    Attributes:
+        cells (list of tuple of int): (row, col) of every cell.
+        symbols (str): Grid symbol of every cell, e.g. "AABBCCC".
+        operators (str): "+" where the value of the cell is added, "x" where it multiplies the score.
+            The first cell starts the score, shown as "+".
+        values (list of int): Value of the symbol of every cell.
+        cumulative (list of int): Score after every cell.
+        marginal (list of int): Change of the score at every cell.
+    """
+
+    cells: list[tuple[int, int]]
+    symbols: str
+    operators: str
+    values: list[int]
+    cumulative: list[int]
+    marginal: list[int]
+
+
+def trace_path_score(grid: list[list[str]], path: list[str], A: int, B: int, C: int) -> ScoreTrace:
+    """
+    Calculate the score of a path step by step, in a single pass.
 
     Args:
         grid (list of list of str): 2D grid with "A", "B", "C" as string values in each cell.
@@ -56,33 +91,48 @@ def calculate_path_score_marginal(grid: list[list[str]], path: list[str], A: int
         C (int): The positive integer value for "C" in the grid.
 
     Returns:
-        list: Incremental score increase at each step.
+        ScoreTrace: Cells, symbols, operators, values, cumulative and marginal scores along the path.
     """
-    # Define a dictionary to map "A", "B", "C" to their integer values.
     symbol_map = {"A": A, "B": B, "C": C}
+    cells = [coord_to_index(coord) for coord in path]
+    symbols = "".join(grid[row][col] for row, col in cells)
+    values = [symbol_map[symbol] for symbol in symbols]
+    operators = ["+"]
+    cumulative = [values[0]]
+    marginal = [values[0]]
+
+    score = values[0]
+    for prev_symbol, curr_symbol, value in zip(symbols, symbols[1:], values[1:]):
+        if curr_symbol == prev_symbol:
+            # Same value, add the value to the score
+            operators.append("+")
+            marginal.append(value)
+            score += value
+        else:
+            # Different value, multiply the score by the value
+            operators.append("x")
+            marginal.append(score * value - score)
+            score *= value
+        cumulative.append(score)
 
-    marginal_scores = []
-    path_row_col = [coord_to_index(coord) for coord in path]
-    row, col = path_row_col[0]
-    prev_symbol = grid[row][col]
-    score = symbol_map[prev_symbol]
-    marginal_scores.append(score)
+    return ScoreTrace(cells, symbols, "".join(operators), values, cumulative, marginal)
 
-    for i in range(1, len(path_row_col)):
-        row, col = path_row_col[i]
-        curr_symbol = grid[row][col]
 
-        if curr_symbol == prev_symbol:
-            score_change = symbol_map[curr_symbol]
-            score += symbol_map[curr_symbol]
-        else:
-            score_change = score * symbol_map[curr_symbol] - score
-            score *= symbol_map[curr_symbol]
+def calculate_path_score_marginal(grid: list[list[str]], path: list[str], A: int, B: int, C: int) -> list[int]:
+    """
+    Calculate the marginal score increase at each step in the path.
 
-        prev_symbol = curr_symbol
-        marginal_scores.append(score_change)
+    Args:
+        grid (list of list of str): 2D grid with "A", "B", "C" as string values in each cell.
+        path (list of str): List of positions in coordinate format (e.g., "a1", "b3").
+        A (int): The positive integer value for "A" in the grid.
+        B (int): The positive integer value for "B" in the grid.
+        C (int): The positive integer value for "C" in the grid.
 
-    return marginal_scores
+    Returns:
+        list: Incremental score increase at each step.
+    """
+    return trace_path_score(grid, path, A, B, C).marginal
 
 
 def calculate_path_score_cumulative(grid: list[list[str]], path: list[str], A: int, B: int, C: int) -> list[int]:
@@ -99,30 +149,21 @@ def calculate_path_score_cumulative(grid: list[list[str]], path: list[str], A: i
     Returns:
         list: Cumulative score at each step.
     """
-    # Define a dictionary to map "A", "B", "C" to their integer values.
-    symbol_map = {"A": A, "B": B, "C": C}
-
-    cumulative_scores = []
-    path_row_col = [coord_to_index(coord) for coord in path]
-    row, col = path_row_col[0]
-
-    prev_symbol = grid[row][col]
-    score = symbol_map[prev_symbol]
-    cumulative_scores.append(score)
+    return trace_path_score(grid, path, A, B, C).cumulative
 
-    for i in range(1, len(path_row_col)):
-        row, col = path_row_col[i]
-        curr_symbol = grid[row][col]
 
-        if curr_symbol == prev_symbol:
-            score += symbol_map[curr_symbol]
-        else:
-            score *= symbol_map[curr_symbol]
+def calculate_path_signature(grid: list[list[str]], path: list[str]) -> str:
+    """
+    Lists the grid symbols visited by a path. The score of a path only depends on this signature.
 
-        cumulative_scores.append(score)
-        prev_symbol = curr_symbol
+    Args:
+        grid (list of list of str): 2D grid with "A", "B", "C" as string values in each cell.
+        path (list of str): List of positions in coordinate format (e.g., "a1", "b3").
 
-    return cumulative_scores
+    Returns:
+        str: Symbols along the path, e.g. "AABBCCC".
+    """
+    return "".join(grid[row][col] for row, col in map(coord_to_index, path))
 
 
 def calculate_path_expression(grid: list[list[str]], path: list[str]) -> str:
@@ -138,16 +179,25 @@ def calculate_path_expression(grid: list[list[str]], path: list[str]) -> str:
     Returns:
         str: f-string representing the sequence of mathematical operations.
     """
-    path_row_col = [coord_to_index(coord) for coord in path]
-    row, col = path_row_col[0]
-    prev_symbol = grid[row][col]
+    return calculate_signature_expression(calculate_path_signature(grid, path))
+
+
+def calculate_signature_expression(signature: str) -> str:
+    """
+    Generates the f-string of `calculate_path_expression()` from the symbols along a path.
+
+    Args:
+        signature (str): Symbols along the path, e.g. "AABBCCC".
+
+    Returns:
+        str: f-string representing the sequence of mathematical operations.
+    """
+    prev_symbol = signature[0]
     expression = ""
 
     # Loop over the path to build the expression
-    for i in range(1, len(path)):
-        # Convert position to row and col
-        row, col = path_row_col[i]
-        curr_symbol = grid[row][col]
+    for i in range(1, len(signature)):
+        curr_symbol = signature[i]
 
         # Initialize the expression starting with A, the starting value of the path.
         if i == 1:
@@ -166,8 +216,133 @@ def calculate_path_expression(grid: list[list[str]], path: list[str]) -> str:
     return f'f"{expression}"'
 
 
+@functools.lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def compile_expression(expression: str) -> Callable[[int, int, int], int]:
+    """
+    Parse an expression of `calculate_path_expression()` once, into a function of A, B, C.
+
+    Replaces `eval(eval(expression.format(A=A, B=B, C=C)))`, which parses the f-string and then the arithmetic
+    for every evaluation. Compiled functions are kept in a bounded LRU cache keyed by expression, in each process,
+    so that the many paths sharing an expression are scored by a plain function call.
+
+    Args:
+        expression (str): f-string representing the sequence of mathematical operations.
+
+    Returns:
+        Callable[[int, int, int], int]: Function of A, B, C returning the score.
+    """
+    if not (expression.startswith('f"') and expression.endswith('"')):
+        raise ValueError(f"Not an expression of `calculate_path_expression()`: {expression}")
+    body = expression[2:-1].replace("{", "").replace("}", "")
+    # Only letters A, B, C, operators and parentheses are ever evaluated.
+    if not body or not _EXPRESSION_CHARACTERS.issuperset(body):
+        raise ValueError(f"Not an expression of `calculate_path_expression()`: {expression}")
+    return eval(f"lambda A, B, C: {body}")
+
+
+def evaluate_expression(expression: str, A: int, B: int, C: int) -> int:
+    """
+    Score of the expression of a path, with the compiled function of `compile_expression()`.
+
+    Args:
+        expression (str): f-string representing the sequence of mathematical operations.
+        A (int): The positive integer value for "A" in the grid.
+        B (int): The positive integer value for "B" in the grid.
+        C (int): The positive integer value for "C" in the grid.
+
+    Returns:
+        int: The final score of the path.
+    """
+    return compile_expression(expression)(A, B, C)
+
+
+def compile_path_score(grid: list[list[str]], path: list[str]) -> Callable[[int, int, int], int]:
+    """
+    Compiled score function of a path, to score it for many values of A, B, C.
+
+    `compile_path_score(grid, path)(A, B, C) == calculate_path_score(grid, path, A, B, C)`.
+
+    Args:
+        grid (list of list of str): 2D grid with "A", "B", "C" as string values in each cell.
+        path (list of str): List of positions in coordinate format (e.g., "a1", "b3").
+
+    Returns:
+        Callable[[int, int, int], int]: Function of A, B, C returning the score.
+    """
+    return compile_expression(calculate_path_expression(grid, path))
+
+
+def calculate_path_score_bounded(
+    grid: list[list[str]], path: list[str], A: int, B: int, C: int, bound: int = PATH_SUM
+) -> tuple[int, int]:
+    """
+    Same as `calculate_path_score()`, but gives up as soon as the running score exceeds `bound`.
+
+    With positive values, the running score never decreases, so such a path can no longer score `bound` or less.
+
+    Args:
+        grid (list of list of str): 2D grid with "A", "B", "C" as string values in each cell.
+        path (list of str): List of positions in coordinate format (e.g., "a1", "b3").
+        A (int): The positive integer value for "A" in the grid.
+        B (int): The positive integer value for "B" in the grid.
+        C (int): The positive integer value for "C" in the grid.
+        bound (int): Score above which to give up.
+
+    Returns:
+        tuple[int, int]: The final score if it is at most `bound`, else the first running score above it,
+            and the number of moves scored.
+    """
+    symbol_map = {"A": A, "B": B, "C": C}
+    signature = calculate_path_signature(grid, path)
+    score = symbol_map[signature[0]]
+    for i in range(1, len(signature)):
+        if signature[i] == signature[i - 1]:
+            score += symbol_map[signature[i]]
+        else:
+            score *= symbol_map[signature[i]]
+        if score > bound:
+            return score, i
+    return score, len(signature) - 1
+
+
+@functools.lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def compile_bounded_expression(expression: str, bound: int = PATH_SUM) -> Callable[[int, int, int], tuple[int, int]]:
+    """
+    Compile an expression like `compile_expression()`, into a function that gives up once the score exceeds `bound`.
+
+    The score is checked after every multiplication, which is where it grows past the bound, so that no big
+    integers are built for the paths that can no longer score `bound`.
+
+    Args:
+        expression (str): f-string representing the sequence of mathematical operations.
+        bound (int): Score above which to give up.
+
+    Returns:
+        Callable[[int, int, int], tuple[int, int]]: Function of A, B, C returning the final score if it is
+            at most `bound`, else the first checked score above it, and the number of moves scored.
+            Its attribute `n_moves` is the number of moves of the path.
+    """
+    # Validates the expression.
+    compile_expression(expression)
+    signature = expression[2:-1].translate(_NOT_SYMBOLS)
+    lines = ["def score(A, B, C):", f"    s = {signature[0]}"]
+    for i in range(1, len(signature)):
+        if signature[i] == signature[i - 1]:
+            lines.append(f"    s += {signature[i]}")
+        else:
+            lines.append(f"    s *= {signature[i]}")
+            lines.append(f"    if s > {int(bound)}:")
+            lines.append(f"        return s, {i}")
+    lines.append(f"    return s, {len(signature) - 1}")
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    score = namespace["score"]
+    score.n_moves = len(signature) - 1
+    return score
+
+
 if __name__ == "__main__":
-    from knight_moves_6.calculation.constant import GRID, PATH_SUM
+    from knight_moves_6.calculation.constant import GRID
 
     # Example parameters
     A, B, C = 1, 2, 253  # Example values for A, B, and C
@@ -226,3 +401,9 @@ if __name__ == "__main__":
     score1_exp = eval(expression_substituted1)
     print(score1_exp)
     print(score1_exp == PATH_SUM)
+
+    score_function = compile_path_score(GRID, test_path)
+    print(score_function(A, B, C))
+    print(compile_expression.cache_info())
+    print(calculate_path_score_bounded(GRID, test_path, A, B, C))
+    print(compile_bounded_expression(expression_template1)(A, B, C))
@@ -31,6 +31,36 @@ def index_to_coord(row: int, col: int) -> str:
     return letter + number
 
 
+def reflect_coord(coord: str) -> str:
+    """
+    Reflects a coordinate across the horizontal axis of the 6x6 grid, e.g. "a1" <-> "a6" and "f6" <-> "f1".
+
+    Args:
+        coord (str): Coordinate string, like "a1" or "b3".
+
+    Returns:
+        str: Reflected coordinate string, like "a6" or "b4".
+    """
+    row, col = coord_to_index(coord)
+    return index_to_coord(5 - row, col)
+
+
+def reflect_path(path: list[str]) -> list[str]:
+    """
+    Reflects a path across the horizontal axis of the 6x6 grid.
+
+    Knight moves stay knight moves, so every a1-f6 path maps to an a6-f1 path and vice versa.
+    Note that the grid values are not symmetric, so the reflected path has a different expression.
+
+    Args:
+        path (list of str): List of positions in coordinate format (e.g., "a1", "b3").
+
+    Returns:
+        list[str]: Reflected list of positions.
+    """
+    return [reflect_coord(coord) for coord in path]
+
+
 def solution_string_to_coordinate_list(solution_string: str) -> tuple[int, int, int, list[str], list[str]]:
     """
     Breaks down a solution string to individual components.
@@ -100,3 +130,7 @@ if __name__ == "__main__":
     print(path2_coor)
     print(path1 == path1_coor)
     print(path2 == path2_coor)
+
+    # Test reflection across the horizontal axis.
+    print(reflect_path(path1))
+    print(reflect_path(reflect_path(path1)) == path1)
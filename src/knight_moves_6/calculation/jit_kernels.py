@@ -0,0 +1,324 @@
+# Optional JIT-compiled kernels for the two innermost loops: the knight path search and the add/multiply fold.
+# Numba is not a dependency. When it is installed, the kernels below are compiled to machine code on first use;
+# otherwise the searches and scorers keep their pure-Python and NumPy implementations.
+# The backend is resolved at every call from the `backend` argument or the KNIGHT_MOVES_6_BACKEND environment
+# variable: "auto" (default) uses Numba when it is installed, "numba" requires it, "python" never uses it.
+import os
+from typing import Generator, Optional
+
+import numpy as np
+
+from knight_moves_6.calculation.bitboard import NEIGHBOUR_MASKS, NEIGHBOURS, NUM_CELLS
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+BACKENDS = ("auto", "numba", "python")
+BACKEND_VARIABLE = "KNIGHT_MOVES_6_BACKEND"
+
+# Knight moves from every cell as a padded table, ordered as in `KNIGHT_MOVES`, for the compiled search.
+_NEIGHBOUR_TABLE = np.array([list(cells) + [-1] * (8 - len(cells)) for cells in NEIGHBOURS], dtype=np.int64)
+_NEIGHBOUR_COUNTS = np.array([len(cells) for cells in NEIGHBOURS], dtype=np.int64)
+_NEIGHBOUR_MASK_TABLE = np.array(NEIGHBOUR_MASKS, dtype=np.int64)
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """
+    Backend to run the kernels with.
+
+    Args:
+        backend (str, optional): "auto", "numba" or "python". Defaults to the KNIGHT_MOVES_6_BACKEND environment
+            variable, or "auto".
+
+    Returns:
+        str: "numba" or "python".
+    """
+    backend = backend or os.environ.get(BACKEND_VARIABLE, "auto")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}.")
+    if backend == "numba" and not NUMBA_AVAILABLE:
+        raise ImportError("The numba backend was requested, but Numba is not installed.")
+    if backend == "auto":
+        return "numba" if NUMBA_AVAILABLE else "python"
+    return backend
+
+
+def _search_kernel(
+    end: int,
+    neighbours: np.ndarray,
+    n_neighbours: np.ndarray,
+    neighbour_masks: np.ndarray,
+    path: np.ndarray,
+    next_moves: np.ndarray,
+    state: np.ndarray,
+    out: np.ndarray,
+    out_lengths: np.ndarray,
+) -> int:
+    """
+    Search of `iter_knight_path_cells()` over arrays, until `out` is full or the search is over.
+
+    The search state lives in the arrays, so that the next call continues where this one stopped:
+    `path[:depth + 1]` is the current path, `next_moves[d]` the index of the next move to try from `path[d]`,
+    and `state` holds `depth` (-1 once the search is over) and the visited mask.
+
+    Returns:
+        int: Number of paths written to `out` and `out_lengths`.
+    """
+    depth = state[0]
+    visited = state[1]
+    entry_mask = neighbour_masks[end]
+    end_bit = np.int64(1) << end
+    n_found = 0
+    while depth >= 0 and n_found < out.shape[0]:
+        cell = path[depth]
+        move = next_moves[depth]
+        if move == n_neighbours[cell]:
+            # All moves from the current cell are exhausted, backtrack.
+            if depth > 0:
+                visited ^= np.int64(1) << cell
+            depth -= 1
+            continue
+        next_moves[depth] = move + 1
+        next_cell = neighbours[cell, move]
+        next_bit = np.int64(1) << next_cell
+        if visited & next_bit:
+            continue
+        if next_cell == end:
+            for i in range(depth + 1):
+                out[n_found, i] = path[i]
+            out[n_found, depth + 1] = end
+            out_lengths[n_found] = depth + 2
+            n_found += 1
+            continue
+        free = neighbour_masks[next_cell] & ~visited
+        if free != 0 and entry_mask & ~(visited | next_bit) != 0:
+            # Descend into the next cell.
+            depth += 1
+            path[depth] = next_cell
+            next_moves[depth] = 0
+            visited |= next_bit
+        elif free & end_bit:
+            # The only way out of this cell that can still reach `end` is `end` itself.
+            for i in range(depth + 1):
+                out[n_found, i] = path[i]
+            out[n_found, depth + 1] = next_cell
+            out[n_found, depth + 2] = end
+            out_lengths[n_found] = depth + 3
+            n_found += 1
+    state[0] = depth
+    state[1] = visited
+    return n_found
+
+
+def _score_kernel(symbols: np.ndarray, lengths: np.ndarray, abc: np.ndarray, cap: int, out: np.ndarray) -> int:
+    """
+    Fold of `calculate_path_score()` over encoded paths, for every (A, B, C).
+
+    A path is abandoned as soon as its score reaches `cap`, and scored `cap`.
+
+    Returns:
+        int: Number of moves scored below the cap.
+    """
+    n_moves_scored = 0
+    for row in range(abc.shape[0]):
+        for index in range(lengths.shape[0]):
+            prev_symbol = symbols[index, 0]
+            score = abc[row, prev_symbol]
+            for position in range(1, lengths[index]):
+                if score >= cap:
+                    break
+                curr_symbol = symbols[index, position]
+                if curr_symbol == prev_symbol:
+                    score += abc[row, curr_symbol]
+                else:
+                    score *= abc[row, curr_symbol]
+                prev_symbol = curr_symbol
+                n_moves_scored += 1
+            out[row, index] = min(score, cap)
+    return n_moves_scored
+
+
+if NUMBA_AVAILABLE:
+    _compiled_search_kernel = numba.njit(cache=True, nogil=True)(_search_kernel)
+    _compiled_score_kernel = numba.njit(cache=True, nogil=True)(_score_kernel)
+else:
+    _compiled_search_kernel = _search_kernel
+    _compiled_score_kernel = _score_kernel
+
+
+def _initial_search_state(
+    start: int, end: int, resume_after: Optional[tuple[int, ...]]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Arrays of `_search_kernel()` at the start of the search, or right after it found `resume_after`."""
+    path = np.zeros(NUM_CELLS + 1, dtype=np.int64)
+    next_moves = np.zeros(NUM_CELLS + 1, dtype=np.int64)
+    if not resume_after:
+        path[0] = start
+        return path, next_moves, np.array([0, 1 << start], dtype=np.int64)
+
+    # As in `_restore_search()`: the second to last cell was only descended into if `end` could still be entered.
+    visited = 0
+    for cell in resume_after[:-1]:
+        visited |= 1 << cell
+    descended = NEIGHBOUR_MASKS[end] & ~visited
+    cells = resume_after[:-1] if descended else resume_after[:-2]
+    visited = 0
+    for depth, cell in enumerate(cells):
+        path[depth] = cell
+        visited |= 1 << cell
+        next_moves[depth] = NEIGHBOURS[cell].index(resume_after[depth + 1]) + 1
+    return path, next_moves, np.array([len(cells) - 1, visited], dtype=np.int64)
+
+
+def iter_knight_path_cell_batches(
+    start: int, end: int, batch_size: int = 1 << 16, resume_after: Optional[tuple[int, ...]] = None, jit: bool = True
+) -> Generator[tuple[np.ndarray, np.ndarray], None, None]:
+    """
+    Search all paths from start to end in batches of arrays, with the compiled search.
+
+    Finds the same paths in the same order as `iter_knight_path_cells()`.
+
+    Args:
+        start (int): Cell index of the starting position (e.g., 0 for "a1").
+        end (int): Cell index of the ending position (e.g., 35 for "f6").
+        batch_size (int): Number of paths per batch.
+        resume_after (tuple of int, optional): Continue the search right after this previously found path.
+        jit (bool): Run the compiled kernel if Numba is installed, else its uncompiled code, e.g. to check it.
+
+    Yields:
+        tuple[np.ndarray, np.ndarray]: Cells of shape (n_paths, 36), padded after the end, and the number of cells
+            of every path.
+    """
+    kernel = _compiled_search_kernel if jit else _search_kernel
+    path, next_moves, state = _initial_search_state(start, end, resume_after)
+    out = np.empty((batch_size, NUM_CELLS), dtype=np.int64)
+    out_lengths = np.empty(batch_size, dtype=np.int64)
+    while state[0] >= 0:
+        n_found = kernel(
+            end, _NEIGHBOUR_TABLE, _NEIGHBOUR_COUNTS, _NEIGHBOUR_MASK_TABLE, path, next_moves, state, out, out_lengths
+        )
+        if n_found:
+            yield out[:n_found].copy(), out_lengths[:n_found].copy()
+
+
+def iter_knight_path_cells_jit(
+    start: int, end: int, resume_after: Optional[tuple[int, ...]] = None, jit: bool = True
+) -> Generator[tuple[int, ...], None, None]:
+    """
+    Same as `iter_knight_path_cells()`, with the compiled search.
+
+    Args:
+        start (int): Cell index of the starting position (e.g., 0 for "a1").
+        end (int): Cell index of the ending position (e.g., 35 for "f6").
+        resume_after (tuple of int, optional): Continue the search right after this previously found path.
+        jit (bool): See `iter_knight_path_cell_batches()`.
+
+    Yields:
+        tuple[int, ...]: Path as cell indices, from `start` to `end`.
+    """
+    for cells, lengths in iter_knight_path_cell_batches(start, end, resume_after=resume_after, jit=jit):
+        for row, length in zip(cells.tolist(), lengths.tolist()):
+            yield tuple(row[:length])
+
+
+def score_encoded_paths_jit(
+    symbols: np.ndarray,
+    lengths: np.ndarray,
+    abc: np.ndarray,
+    cap: int,
+    abort_stats: Optional[dict[str, int]] = None,
+    jit: bool = True,
+) -> np.ndarray:
+    """
+    Same as `score_encoded_paths()` with a cap, with the compiled fold.
+
+    Args:
+        symbols (np.ndarray): Symbol indices of shape (n_paths, width), from `encode_paths()`.
+        lengths (np.ndarray): Number of cells of every path.
+        abc (np.ndarray): Triples of shape (n_abc, 3).
+        cap (int): Saturation of the scores.
+        abort_stats (dict, optional): See `score_encoded_paths()`.
+        jit (bool): Run the compiled kernel if Numba is installed, else its uncompiled code, e.g. to check it.
+
+    Returns:
+        np.ndarray: int64 scores of shape (n_abc, n_paths).
+    """
+    kernel = _compiled_score_kernel if jit else _score_kernel
+    scores = np.empty((len(abc), len(lengths)), dtype=np.int64)
+    n_moves_scored = kernel(
+        np.ascontiguousarray(symbols, dtype=np.int64),
+        np.ascontiguousarray(lengths, dtype=np.int64),
+        np.ascontiguousarray(abc, dtype=np.int64),
+        cap,
+        scores,
+    )
+    if abort_stats is not None:
+        abort_stats["paths"] = abort_stats.get("paths", 0) + scores.size
+        abort_stats["aborted"] = abort_stats.get("aborted", 0) + int(np.count_nonzero(scores >= cap))
+        abort_stats["moves"] = abort_stats.get("moves", 0) + int((lengths - 1).sum()) * len(abc)
+        abort_stats["moves_scored"] = abort_stats.get("moves_scored", 0) + n_moves_scored
+    return scores
+
+
+def check_backends(n_paths: int = 20000, jit: bool = True) -> bool:
+    """
+    Cross-check the kernels against the pure-Python search and the NumPy scorer.
+
+    Args:
+        n_paths (int): Number of paths searched from each corner, then scored.
+        jit (bool): Check the compiled kernels if Numba is installed, else their uncompiled code.
+
+    Returns:
+        bool: Whether both implementations agree on every path and score.
+    """
+    import itertools
+
+    from knight_moves_6.calculation.bitboard import cells_to_path
+    from knight_moves_6.calculation.constant import GRID
+    from knight_moves_6.calculation.vectorized_score import encode_paths, score_encoded_paths
+    from knight_moves_6.solver.enumerate_paths import iter_knight_path_cells
+
+    agree = True
+    for start, end in [(0, 35), (30, 5)]:
+        expected = list(itertools.islice(iter_knight_path_cells(start, end), n_paths))
+        found = list(itertools.islice(iter_knight_path_cells_jit(start, end, jit=jit), n_paths))
+        resume_after = expected[n_paths // 2]
+        resumed = list(itertools.islice(iter_knight_path_cells_jit(start, end, resume_after, jit=jit), 100))
+        agree &= found == expected and resumed == expected[n_paths // 2 + 1 : n_paths // 2 + 101]
+
+        symbols, lengths = encode_paths(GRID, [cells_to_path(cells) for cells in expected])
+        abc = np.array([(1, 2, 253), (1, 3, 2), (2, 3, 1), (5, 7, 11)], dtype=np.int64)
+        for cap in (2025, 1 << 40):
+            expected_stats, found_stats = {}, {}
+            expected_scores = score_encoded_paths(symbols, lengths, abc, cap, expected_stats, backend="python")
+            found_scores = score_encoded_paths_jit(symbols, lengths, abc, cap, found_stats, jit=jit)
+            agree &= np.array_equal(found_scores, expected_scores)
+            agree &= all(found_stats[key] == expected_stats[key] for key in ("paths", "aborted", "moves"))
+    return agree
+
+
+if __name__ == "__main__":
+    import itertools
+    import time
+
+    from knight_moves_6.solver.enumerate_paths import iter_knight_path_cells
+
+    print(f"Numba available: {NUMBA_AVAILABLE}, backend: {resolve_backend()}.")
+    print("Backends agree:", check_backends(jit=NUMBA_AVAILABLE))
+
+    n_paths = 1000000
+    start_time = time.perf_counter()
+    for _ in itertools.islice(iter_knight_path_cells(0, 35), n_paths):
+        pass
+    print(f"Python search: {n_paths} paths in {time.perf_counter() - start_time:.2f}s.")
+    start_time = time.perf_counter()
+    n_found = 0
+    for cells, lengths in iter_knight_path_cell_batches(0, 35):
+        n_found += len(lengths)
+        if n_found >= n_paths:
+            break
+    print(f"Kernel search: {n_found} paths in {time.perf_counter() - start_time:.2f}s (compiled: {NUMBA_AVAILABLE}).")
@@ -0,0 +1,162 @@
+# Canonical polynomial form of the path scores.
+# The score of a path is a polynomial in A, B and C with non-negative integer coefficients: a repeated symbol adds
+# its monomial, a change of symbol multiplies every term by it. Different expressions, e.g. "(A+A)*B" and "A*B+A*B",
+# describe the same polynomial, so scoring each distinct polynomial once covers many more paths than each expression.
+import functools
+import hashlib
+
+from knight_moves_6.calculation.bitboard import NUM_CELLS
+from knight_moves_6.calculation.calculate_score import calculate_path_signature
+
+SYMBOLS = "ABC"
+
+# Coefficient of every monomial A^i * B^j * C^k, keyed by the exponents (i, j, k).
+Polynomial = dict[tuple[int, int, int], int]
+
+# Canonical form: (i, j, k, coefficient) for every monomial, by decreasing exponents.
+PolynomialTerms = tuple[tuple[int, int, int, int], ...]
+
+_UNIT_EXPONENTS = {"A": (1, 0, 0), "B": (0, 1, 0), "C": (0, 0, 1)}
+
+
+def signature_to_polynomial(signature: str) -> Polynomial:
+    """
+    Polynomial of the score of a path, from the symbols along it.
+
+    Args:
+        signature (str): Symbols along the path, e.g. "AABBCCC".
+
+    Returns:
+        Polynomial: Coefficient of every monomial, keyed by the exponents of A, B and C.
+    """
+    polynomial = {_UNIT_EXPONENTS[signature[0]]: 1}
+    for prev_symbol, curr_symbol in zip(signature, signature[1:]):
+        unit = _UNIT_EXPONENTS[curr_symbol]
+        if curr_symbol == prev_symbol:
+            # Same cell value, add.
+            polynomial[unit] = polynomial.get(unit, 0) + 1
+        else:
+            # Different cell value, multiply.
+            di, dj, dk = unit
+            polynomial = {(i + di, j + dj, k + dk): coefficient for (i, j, k), coefficient in polynomial.items()}
+    return polynomial
+
+
+def expression_to_polynomial(expression: str) -> Polynomial:
+    """
+    Polynomial of an expression of `calculate_path_expression()`, whose letters are the symbols along the path.
+
+    Args:
+        expression (str): f-string representing the sequence of mathematical operations.
+
+    Returns:
+        Polynomial: Coefficient of every monomial, keyed by the exponents of A, B and C.
+    """
+    return signature_to_polynomial("".join(symbol for symbol in expression if symbol in SYMBOLS))
+
+
+def path_to_polynomial(grid: list[list[str]], path: list[str]) -> Polynomial:
+    """
+    Polynomial of the score of a path.
+
+    Args:
+        grid (list of list of str): 2D grid with "A", "B", "C" as string values in each cell.
+        path (list of str): List of positions in coordinate format (e.g., "a1", "b3").
+
+    Returns:
+        Polynomial: Coefficient of every monomial, keyed by the exponents of A, B and C.
+    """
+    return signature_to_polynomial(calculate_path_signature(grid, path))
+
+
+def canonical_polynomial(polynomial: Polynomial) -> PolynomialTerms:
+    """Canonical form of a polynomial, equal for equal polynomials."""
+    return tuple((i, j, k, coefficient) for (i, j, k), coefficient in sorted(polynomial.items(), reverse=True))
+
+
+def format_polynomial(polynomial: Polynomial) -> str:
+    """
+    Canonical text of a polynomial, e.g. "A^2*B + 3*C".
+
+    Args:
+        polynomial (Polynomial): Coefficient of every monomial, keyed by the exponents of A, B and C.
+
+    Returns:
+        str: Monomials by decreasing exponents of A, then B, then C.
+    """
+    monomials = []
+    for *exponents, coefficient in canonical_polynomial(polynomial):
+        factors = [str(coefficient)] if coefficient > 1 else []
+        for symbol, exponent in zip(SYMBOLS, exponents):
+            if exponent:
+                factors.append(symbol if exponent == 1 else f"{symbol}^{exponent}")
+        monomials.append("*".join(factors) or "1")
+    return " + ".join(monomials)
+
+
+def polynomial_hash(polynomial: Polynomial) -> int:
+    """
+    64-bit hash of the canonical text of a polynomial, stable across processes and runs.
+
+    Signed, so that it fits an SQLite INTEGER. Collisions are improbable for up to billions of polynomials.
+
+    Args:
+        polynomial (Polynomial): Coefficient of every monomial, keyed by the exponents of A, B and C.
+
+    Returns:
+        int: Hash of the polynomial.
+    """
+    digest = hashlib.blake2b(format_polynomial(polynomial).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def expression_polynomial_hash(expression: str) -> int:
+    """Hash of the polynomial of an expression of `calculate_path_expression()`, cached by expression."""
+    return polynomial_hash(expression_to_polynomial(expression))
+
+
+def monomial_powers(A: int, B: int, C: int, max_degree: int = NUM_CELLS) -> tuple[list[int], list[int], list[int]]:
+    """
+    Powers of A, B and C, from 0 to `max_degree`, to score many polynomials for the same values.
+
+    Args:
+        A (int): The positive integer value for "A" in the grid.
+        B (int): The positive integer value for "B" in the grid.
+        C (int): The positive integer value for "C" in the grid.
+        max_degree (int): Highest exponent needed. No path has more than 36 cells.
+
+    Returns:
+        tuple[list[int], list[int], list[int]]: Powers of A, B and C, indexed by the exponent.
+    """
+    return tuple([value**exponent for exponent in range(max_degree + 1)] for value in (A, B, C))
+
+
+def evaluate_polynomial(terms: PolynomialTerms, powers: tuple[list[int], list[int], list[int]]) -> int:
+    """
+    Score of a polynomial from precomputed powers.
+
+    Args:
+        terms (PolynomialTerms): Canonical form of the polynomial, from `canonical_polynomial()`.
+        powers (tuple of list of int): Powers of A, B and C, from `monomial_powers()`.
+
+    Returns:
+        int: The final score of the paths with this polynomial.
+    """
+    powers_a, powers_b, powers_c = powers
+    return sum(coefficient * powers_a[i] * powers_b[j] * powers_c[k] for i, j, k, coefficient in terms)
+
+
+if __name__ == "__main__":
+    from knight_moves_6.calculation.calculate_score import calculate_path_expression, calculate_path_score
+    from knight_moves_6.calculation.constant import GRID
+
+    example_path_1 = ["a1", "b3", "c5", "d3", "f4", "d5", "f6"]
+    expression = calculate_path_expression(GRID, example_path_1)
+    polynomial = expression_to_polynomial(expression)
+    print(expression)  # Output: f"(({A}+{A})*{B}+{B})*{C}+{C}+{C}"
+    print(format_polynomial(polynomial))  # Output: 2*A*B*C + B*C + 2*C
+    print(polynomial_hash(polynomial))
+    A, B, C = 1, 2, 253
+    print(evaluate_polynomial(canonical_polynomial(polynomial), monomial_powers(A, B, C)))
+    print(calculate_path_score(GRID, example_path_1, A, B, C))
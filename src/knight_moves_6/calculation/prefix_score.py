@@ -0,0 +1,162 @@
+# Score many paths sharing prefixes, computing each shared prefix once per (A, B, C).
+# The score of a path only depends on the symbols along it, so paths are sorted by signature and walked in that order
+# with a stack of running scores: consecutive signatures share their longest common prefix, whose scores are reused.
+# The running score never decreases, so once it exceeds the target, every path below that prefix is skipped.
+from typing import Optional
+
+from knight_moves_6.calculation.calculate_score import calculate_path_signature
+from knight_moves_6.calculation.constant import PATH_SUM
+
+_SYMBOL_INDICES = bytes.maketrans(b"ABC", b"\x00\x01\x02")
+
+
+def _common_prefix_length(first: bytes, second: bytes) -> int:
+    """Length of the longest common prefix of two signatures."""
+    length = 0
+    for a, b in zip(first, second):
+        if a != b:
+            break
+        length += 1
+    return length
+
+
+class PrefixScorer:
+    """
+    Score a batch of paths for many values of A, B, C, sharing the work on common prefixes.
+
+    The batch is sorted once by signature. Scoring it for one (A, B, C) then only computes, for every path,
+    the steps after the prefix it shares with the previous path in that order, and none at all below a prefix
+    whose score already exceeds the target.
+
+    Args:
+        signatures (list of str): Symbols along each path, e.g. "AABBCCC".
+    """
+
+    def __init__(self, signatures: list[str]):
+        encoded = [signature.encode().translate(_SYMBOL_INDICES) for signature in signatures]
+        self.order = sorted(range(len(encoded)), key=encoded.__getitem__)
+        self.signatures = [encoded[index] for index in self.order]
+        # Length of the prefix shared with the previous signature in sorted order.
+        self.common = [0] + [
+            _common_prefix_length(previous, current) for previous, current in zip(self.signatures, self.signatures[1:])
+        ]
+        # Steps of scoring every path separately, i.e. one per move.
+        self.n_steps = sum(len(signature) - 1 for signature in self.signatures)
+
+    @classmethod
+    def from_paths(cls, grid: list[list[str]], paths: list[list[str]]) -> "PrefixScorer":
+        """Scorer of paths in coordinate format."""
+        return cls([calculate_path_signature(grid, path) for path in paths])
+
+    @classmethod
+    def from_expressions(cls, expressions: list[str]) -> "PrefixScorer":
+        """Scorer of the expressions of `calculate_path_expression()`, whose letters are the symbols in order."""
+        return cls(["".join(symbol for symbol in expression if symbol in "ABC") for expression in expressions])
+
+    def score(
+        self, A: int, B: int, C: int, target: Optional[int] = PATH_SUM, stats: Optional[dict[str, int]] = None
+    ) -> list[int]:
+        """
+        Score every path of the batch.
+
+        Scores up to `target` match `calculate_path_score()`. A path whose running score exceeds `target`
+        gets the first running score above it, i.e. a lower bound of its score that is also above `target`.
+
+        Args:
+            A (int): The positive integer value for "A" in the grid.
+            B (int): The positive integer value for "B" in the grid.
+            C (int): The positive integer value for "C" in the grid.
+            target (int, optional): Score above which prefixes are cut off. None to compute every score in full.
+            stats (dict, optional): Receives the number of "steps" computed, "naive_steps" of scoring every path
+                separately, and paths "cut" off before their last move.
+
+        Returns:
+            list[int]: Score of every path, in the order of the batch.
+        """
+        values = (A, B, C)
+        signatures = self.signatures
+        common = self.common
+        # running[d] is the score after the first d + 1 symbols of the current signature.
+        running = [0] * (max(map(len, signatures), default=0))
+        # Length of the prefix of the current signature whose score exceeds the target, if any.
+        dead = len(running) + 1
+        scores = [0] * len(signatures)
+        n_steps = n_cut = 0
+
+        for sorted_index, signature in enumerate(signatures):
+            shared = common[sorted_index]
+            if shared >= dead:
+                # Below a prefix that already exceeds the target.
+                scores[self.order[sorted_index]] = running[dead - 1]
+                n_cut += 1
+                continue
+            dead = len(running) + 1
+            if shared == 0:
+                running[0] = values[signature[0]]
+                shared = 1
+            score = running[shared - 1]
+            for position in range(shared, len(signature)):
+                symbol = signature[position]
+                if symbol == signature[position - 1]:
+                    score += values[symbol]
+                else:
+                    score *= values[symbol]
+                running[position] = score
+                n_steps += 1
+                if target is not None and score > target:
+                    dead = position + 1
+                    if position < len(signature) - 1:
+                        n_cut += 1
+                    break
+            scores[self.order[sorted_index]] = score
+
+        if stats is not None:
+            stats["steps"] = stats.get("steps", 0) + n_steps
+            stats["naive_steps"] = stats.get("naive_steps", 0) + self.n_steps
+            stats["cut"] = stats.get("cut", 0) + n_cut
+        return scores
+
+    def hits(self, A: int, B: int, C: int, target: int = PATH_SUM, stats: Optional[dict[str, int]] = None) -> list[int]:
+        """
+        Indices in the batch of the paths scoring exactly `target`.
+
+        Args:
+            A (int): The positive integer value for "A" in the grid.
+            B (int): The positive integer value for "B" in the grid.
+            C (int): The positive integer value for "C" in the grid.
+            target (int): Score to hit.
+            stats (dict, optional): See `score()`.
+
+        Returns:
+            list[int]: Indices of the paths, in increasing order.
+        """
+        return [index for index, score in enumerate(self.score(A, B, C, target, stats)) if score == target]
+
+
+if __name__ == "__main__":
+    import time
+
+    from knight_moves_6.calculation.calculate_score import calculate_path_score
+    from knight_moves_6.calculation.constant import GRID
+    from knight_moves_6.solver.enumerate_paths import iter_knight_paths
+
+    paths = list(iter_knight_paths("a1", "f6", max_paths=200000)) + list(iter_knight_paths("a6", "f1", 200000))
+    start_time = time.perf_counter()
+    scorer = PrefixScorer.from_paths(GRID, paths)
+    print(f"Sorted {len(paths)} paths by signature in {time.perf_counter() - start_time:.2f}s.")
+
+    for A, B, C in [(1, 3, 2), (2, 3, 1), (1, 2, 253), (5, 7, 11)]:
+        stats = {}
+        start_time = time.perf_counter()
+        scores = scorer.score(A, B, C, stats=stats)
+        elapsed = time.perf_counter() - start_time
+        print(
+            f"A={A} B={B} C={C}: {stats['steps']} steps instead of {stats['naive_steps']} "
+            f"({stats['steps'] / stats['naive_steps']:.2%}), {stats['cut']} paths cut off, in {elapsed:.2f}s."
+        )
+        print(f"  {scores.count(PATH_SUM)} paths score 2024.")
+
+    stats = {}
+    scores = scorer.score(1, 3, 2, target=None, stats=stats)
+    print(f"Without cut-off: {stats['steps']} steps ({stats['steps'] / stats['naive_steps']:.2%}).")
+    print("Scores match:", scores == [calculate_path_score(GRID, path, 1, 3, 2) for path in paths])
@@ -0,0 +1,277 @@
+# Persistent cache of path scores, keyed by the polynomial of the path and the values of A, B, C.
+# Only the scores of 2024 are stored in `PathScore`, so a rerun of the solver used to score every path again.
+# The cache keeps every score it is given, in a small in-process LRU in front of a separate SQLite file.
+# Paths with the same polynomial have the same score, so one entry serves all of them (see `polynomial.py`).
+import collections
+import sqlite3
+from typing import Iterable, Optional
+
+from knight_moves_6.calculation.constant import PATH_SUM
+
+# Scores above the target are stored as this value: they never hit it, whatever they are exactly.
+SATURATED_SCORE = PATH_SUM + 1
+
+# Default location of the on-disk tier, next to the database of the paths.
+SCORE_CACHE_FILE = "knight-moves-6-scores.db"
+
+# Number of keys per SQL query, below the SQLite limit of bound parameters.
+_QUERY_CHUNK_SIZE = 500
+
+
+def pack_abc(A: int, B: int, C: int) -> int:
+    """Single integer key of (A, B, C), each below 2^16."""
+    return (A << 32) | (B << 16) | C
+
+
+class ScoreCache:
+    """
+    Two-tier cache of the scores of polynomials for given (A, B, C).
+
+    Lookups first try the in-process LRU, then the SQLite file. Scores found on disk are promoted to memory, and new
+    scores are kept in memory until `flush()` writes them to disk in one transaction. Once the file grows past
+    `max_disk_bytes`, the least recently used fraction of its entries is deleted. SQLite reuses the freed pages,
+    so the file stays about that size without a VACUUM.
+
+    Recency on disk is counted in flushes: every flush starts a new generation, and the entries written or read since
+    the previous flush are marked with it.
+
+    Args:
+        path (str, optional): SQLite file of the on-disk tier. None to only keep scores in memory.
+        memory_size (int): Number of entries of the in-process LRU.
+        max_disk_bytes (int): Size of the on-disk tier above which entries are evicted.
+        evict_fraction (float): Fraction of the on-disk entries evicted at once.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = SCORE_CACHE_FILE,
+        memory_size: int = 1 << 20,
+        max_disk_bytes: int = 1 << 30,
+        evict_fraction: float = 0.25,
+    ):
+        self.memory_size = memory_size
+        self.max_disk_bytes = max_disk_bytes
+        self.evict_fraction = evict_fraction
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evicted": 0}
+        self._memory = collections.OrderedDict()
+        # Entries to insert, and entries read from disk whose generation must be refreshed, at the next flush.
+        self._pending = {}
+        self._touched = set()
+        self._connection = None
+        self._generation = 0
+        if path is not None:
+            self._connection = sqlite3.connect(path)
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS scores (
+                    polynomial_hash INTEGER NOT NULL,
+                    abc INTEGER NOT NULL,
+                    score INTEGER NOT NULL,
+                    generation INTEGER NOT NULL,
+                    PRIMARY KEY (polynomial_hash, abc)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS scores_generation ON scores (generation);
+                """)
+            (last_generation,) = self._connection.execute("SELECT MAX(generation) FROM scores").fetchone()
+            self._generation = (last_generation or 0) + 1
+
+    def __enter__(self) -> "ScoreCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _remember(self, key: tuple[int, int], score: int) -> None:
+        """Add an entry to the in-process LRU, evicting the least recently used one if it is full."""
+        self._memory[key] = score
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, polynomial_hashes: Iterable[int], A: int, B: int, C: int) -> dict[int, int]:
+        """
+        Look up the scores of many polynomials for the same (A, B, C).
+
+        Args:
+            polynomial_hashes (iterable of int): Hashes of the polynomials, see `polynomial_hash()`.
+            A (int): The positive integer value for "A" in the grid.
+            B (int): The positive integer value for "B" in the grid.
+            C (int): The positive integer value for "C" in the grid.
+
+        Returns:
+            dict[int, int]: Score of every polynomial found in the cache, keyed by its hash. Scores above the
+                target are `SATURATED_SCORE`.
+        """
+        abc = pack_abc(A, B, C)
+        found = {}
+        missing = []
+        for polynomial_hash in set(polynomial_hashes):
+            key = (polynomial_hash, abc)
+            score = self._memory.get(key)
+            if score is not None:
+                self._memory.move_to_end(key)
+            else:
+                # A score not flushed yet may have left the LRU already.
+                score = self._pending.get(key)
+                if score is None:
+                    missing.append(polynomial_hash)
+                    continue
+                self._remember(key, score)
+            found[polynomial_hash] = score
+        n_memory_hits = len(found)
+        self.stats["memory_hits"] += n_memory_hits
+
+        if self._connection is not None:
+            for chunk in range(0, len(missing), _QUERY_CHUNK_SIZE):
+                hashes = missing[chunk : chunk + _QUERY_CHUNK_SIZE]
+                rows = self._connection.execute(
+                    f"SELECT polynomial_hash, score FROM scores WHERE abc = ? "
+                    f"AND polynomial_hash IN ({','.join('?' * len(hashes))})",
+                    [abc, *hashes],
+                ).fetchall()
+                for polynomial_hash, score in rows:
+                    found[polynomial_hash] = score
+                    self._remember((polynomial_hash, abc), score)
+                    self._touched.add((polynomial_hash, abc))
+                self.stats["disk_hits"] += len(rows)
+        self.stats["misses"] += len(missing) - (len(found) - n_memory_hits)
+        return found
+
+    def get(self, polynomial_hash: int, A: int, B: int, C: int) -> Optional[int]:
+        """Score of a polynomial for (A, B, C), or None if it is not in the cache."""
+        return self.get_many([polynomial_hash], A, B, C).get(polynomial_hash)
+
+    def put_many(self, scores: dict[int, int], A: int, B: int, C: int) -> None:
+        """
+        Store the scores of many polynomials for the same (A, B, C). They are written to disk at the next `flush()`.
+
+        Args:
+            scores (dict of int to int): Score of every polynomial, keyed by its hash. Scores above the target may be
+                any lower bound above it, as returned by `compile_bounded_expression()`.
+            A (int): The positive integer value for "A" in the grid.
+            B (int): The positive integer value for "B" in the grid.
+            C (int): The positive integer value for "C" in the grid.
+        """
+        abc = pack_abc(A, B, C)
+        for polynomial_hash, score in scores.items():
+            key = (polynomial_hash, abc)
+            score = min(score, SATURATED_SCORE)
+            self._remember(key, score)
+            if self._connection is not None:
+                self._pending[key] = score
+
+    def put(self, polynomial_hash: int, A: int, B: int, C: int, score: int) -> None:
+        """Store the score of a polynomial for (A, B, C)."""
+        self.put_many({polynomial_hash: score}, A, B, C)
+
+    def disk_size(self) -> int:
+        """Bytes used by the entries of the on-disk tier, not counting the free pages of the file."""
+        if self._connection is None:
+            return 0
+        (page_count,) = self._connection.execute("PRAGMA page_count").fetchone()
+        (freelist_count,) = self._connection.execute("PRAGMA freelist_count").fetchone()
+        (page_size,) = self._connection.execute("PRAGMA page_size").fetchone()
+        return (page_count - freelist_count) * page_size
+
+    def flush(self) -> None:
+        """Write the new scores and the recency of the entries read to disk, then evict if it is too large."""
+        if self._connection is None:
+            return
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO scores (polynomial_hash, abc, score, generation) VALUES (?, ?, ?, ?)",
+                [
+                    (polynomial_hash, abc, score, self._generation)
+                    for (polynomial_hash, abc), score in self._pending.items()
+                ],
+            )
+            self._connection.executemany(
+                "UPDATE scores SET generation = ? WHERE polynomial_hash = ? AND abc = ?",
+                [(self._generation, polynomial_hash, abc) for polynomial_hash, abc in self._touched],
+            )
+        self._pending.clear()
+        self._touched.clear()
+        self._generation += 1
+
+        if self.disk_size() > self.max_disk_bytes:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Delete the least recently used `evict_fraction` of the on-disk entries.
+
+        Returns:
+            int: Number of entries deleted.
+        """
+        (n_entries,) = self._connection.execute("SELECT COUNT(*) FROM scores").fetchone()
+        n_evict = int(n_entries * self.evict_fraction)
+        if not n_evict:
+            return 0
+        with self._connection:
+            # Exactly the oldest entries: a single generation may hold most of the file.
+            n_deleted = self._connection.execute(
+                "DELETE FROM scores WHERE (polynomial_hash, abc) IN "
+                "(SELECT polynomial_hash, abc FROM scores ORDER BY generation LIMIT ?)",
+                (n_evict,),
+            ).rowcount
+        self.stats["evicted"] += n_deleted
+        return n_deleted
+
+    def close(self) -> None:
+        """Flush the pending scores and close the on-disk tier."""
+        if self._connection is not None:
+            self.flush()
+            self._connection.close()
+            self._connection = None
+
+    def format_stats(self) -> str:
+        """Summarize the lookups, e.g. "1000 lookups: 60.0% from memory, 30.0% from disk, 10.0% missed"."""
+        n_lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        return (
+            f"{n_lookups} lookups: {self.stats['memory_hits'] / max(n_lookups, 1):.1%} from memory, "
+            f"{self.stats['disk_hits'] / max(n_lookups, 1):.1%} from disk, "
+            f"{self.stats['misses'] / max(n_lookups, 1):.1%} missed"
+        )
+
+
+if __name__ == "__main__":
+    from knight_moves_6.calculation.calculate_score import calculate_path_expression, compile_bounded_expression
+    from knight_moves_6.calculation.constant import GRID
+    from knight_moves_6.calculation.polynomial import expression_polynomial_hash
+    from knight_moves_6.solver.enumerate_paths import iter_knight_paths
+
+    # A score not flushed yet is still found once it left the LRU, and comes back to it.
+    with ScoreCache(path=":memory:", memory_size=2) as cache:
+        for polynomial_hash in range(3):
+            cache.put(polynomial_hash, 1, 2, 3, polynomial_hash)
+        assert cache.get_many([0], 1, 2, 3) == {0: 0}
+        assert cache.stats["memory_hits"] == 1 and (0, pack_abc(1, 2, 3)) in cache._memory
+
+    # Eviction deletes `evict_fraction` of the entries, oldest first, even when they all belong to few generations.
+    with ScoreCache(path=":memory:", max_disk_bytes=1) as cache:
+        cache.put_many({polynomial_hash: 1 for polynomial_hash in range(100)}, 1, 2, 3)
+        cache.flush()
+        cache.put_many({polynomial_hash: 1 for polynomial_hash in range(100)}, 1, 2, 4)
+        cache.flush()
+        assert cache.stats["evicted"] == 25 + 43
+        (n_oldest,) = cache._connection.execute("SELECT COUNT(*) FROM scores WHERE abc = ?", (pack_abc(1, 2, 3),))
+        assert n_oldest == (32,)
+
+    expressions = [calculate_path_expression(GRID, path) for path in iter_knight_paths("a1", "f6", max_paths=20000)]
+    hashes = {expression_polynomial_hash(expression): expression for expression in expressions}
+    print(f"{len(expressions)} paths with {len(hashes)} distinct polynomials.")
+
+    for run in range(2):
+        with ScoreCache() as cache:
+            for A, B, C in [(1, 2, 253), (1, 3, 2), (2, 3, 1)]:
+                cached = cache.get_many(hashes, A, B, C)
+                cache.put_many(
+                    {
+                        polynomial_hash: compile_bounded_expression(expression)(A, B, C)[0]
+                        for polynomial_hash, expression in hashes.items()
+                        if polynomial_hash not in cached
+                    },
+                    A,
+                    B,
+                    C,
+                )
+            print(f"Run {run + 1}: {cache.format_stats()}.")
@@ -0,0 +1,200 @@
+# Score many paths for many (A, B, C) at once with NumPy.
+# Paths are encoded as rows of symbol indices (0, 1, 2 for "A", "B", "C"), padded to a fixed width, plus a length.
+# The scores are then computed one path position at a time for the whole batch, with the rule of
+# `calculate_path_score()`: add the value when the symbol repeats, multiply by it otherwise.
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+from knight_moves_6.calculation.bitboard import NUM_CELLS
+from knight_moves_6.calculation.calculate_score import calculate_path_signature
+from knight_moves_6.calculation.constant import PATH_SUM
+from knight_moves_6.calculation.jit_kernels import resolve_backend, score_encoded_paths_jit
+
+# Scores saturate at this cap. Every step multiplies by or adds a positive value, so a score above PATH_SUM never
+# comes back to it, and capping keeps every intermediate product far below the int64 limit.
+SCORE_CAP = PATH_SUM + 1
+
+# Deletes everything but the symbols from an expression.
+_NOT_SYMBOLS = str.maketrans("", "", "{}()+*")
+
+
+def encode_signatures(signatures: Iterable[str], width: int = NUM_CELLS) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Encode the symbols along paths, e.g. from `calculate_path_signature()`, as a fixed-width array.
+
+    Args:
+        signatures (iterable of str): Symbols along each path, e.g. "AABBCCC".
+        width (int): Width of the array, at least the number of cells of the longest path.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Symbol indices of shape (n_paths, width) as uint8, padded with 0,
+            and the number of cells of every path.
+    """
+    signatures = [signature.encode() for signature in signatures]
+    lengths = np.fromiter(map(len, signatures), dtype=np.int64, count=len(signatures))
+    if len(signatures) and lengths.max() > width:
+        raise ValueError(f"Paths of {lengths.max()} cells do not fit in a width of {width}.")
+    packed = b"".join(signature.ljust(width, b"A") for signature in signatures)
+    symbols = np.frombuffer(packed, dtype=np.uint8).reshape(len(signatures), width) - ord("A")
+    return symbols, lengths
+
+
+def encode_paths(
+    grid: list[list[str]], paths: Iterable[list[str]], width: int = NUM_CELLS
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Encode paths as the symbol indices of the cells they visit, see `encode_signatures()`.
+
+    Args:
+        grid (list of list of str): 2D grid with "A", "B", "C" as string values in each cell.
+        paths (iterable of list of str): Paths in coordinate format.
+        width (int): Width of the array, at least the number of cells of the longest path.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Symbol indices of shape (n_paths, width), and the number of cells of every path.
+    """
+    return encode_signatures((calculate_path_signature(grid, path) for path in paths), width)
+
+
+def encode_expressions(expressions: Iterable[str], width: int = NUM_CELLS) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Encode the expressions of `calculate_path_expression()`, whose letters are the symbols along the path in order.
+
+    Args:
+        expressions (iterable of str): f-strings representing the sequence of mathematical operations.
+        width (int): Width of the array, at least the number of cells of the longest path.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Symbol indices of shape (n_paths, width), and the number of cells of every path.
+    """
+    return encode_signatures((expression[2:-1].translate(_NOT_SYMBOLS) for expression in expressions), width)
+
+
+def score_encoded_paths(
+    symbols: np.ndarray,
+    lengths: np.ndarray,
+    abc: Union[Sequence[int], Sequence[Sequence[int]], np.ndarray],
+    cap: Optional[int] = SCORE_CAP,
+    abort_stats: Optional[dict[str, int]] = None,
+    backend: Optional[str] = None,
+) -> np.ndarray:
+    """
+    Score a batch of encoded paths for one or many (A, B, C) triples.
+
+    Matches `calculate_path_score()` exactly for every score below `cap`. Scores at or above it are returned as `cap`.
+    Saturated paths are abandoned: once fewer than half of the paths still being scored have a triple below the cap,
+    the others are dropped from the arrays, and scoring stops when none is left.
+
+    Args:
+        symbols (np.ndarray): Symbol indices of shape (n_paths, width), from `encode_paths()`.
+        lengths (np.ndarray): Number of cells of every path.
+        abc (sequence or np.ndarray): A single (A, B, C) triple, or an array of triples of shape (n_abc, 3).
+        cap (int, optional): Saturation of the scores. None to disable it, at the risk of overflowing int64.
+        abort_stats (dict, optional): Receives the number of "paths" and their "moves" for all triples, the number
+            of paths "aborted" at the cap, and the number of "moves_scored" below the cap.
+        backend (str, optional): "numba" to fold every path with the compiled kernel of `jit_kernels.py`, which
+            requires a cap, or "python" for NumPy. Defaults to Numba when it is installed, see `resolve_backend()`.
+
+    Returns:
+        np.ndarray: int64 scores of shape (n_paths,) for a single triple, or (n_abc, n_paths).
+    """
+    abc = np.asarray(abc, dtype=np.int64)
+    single = abc.ndim == 1
+    abc = abc.reshape(-1, 3)
+    n_paths = len(lengths)
+    if n_paths == 0:
+        scores = np.zeros((len(abc), 0), dtype=np.int64)
+        return scores[0] if single else scores
+    if cap is not None and resolve_backend(backend) == "numba":
+        scores = score_encoded_paths_jit(symbols, lengths, abc, cap, abort_stats)
+        return scores[0] if single else scores
+
+    # Every step is `score * factor + term`: (value, 0) on a change of symbol, (1, value) on a repeat,
+    # and (1, 0) once the path has ended. Columns 3 and 4 of the table hold the constants 1 and 0.
+    table = np.concatenate([abc, np.ones((len(abc), 1), np.int64), np.zeros((len(abc), 1), np.int64)], axis=1)
+    symbols = symbols.astype(np.intp)
+    result = table[:, symbols[:, 0]]
+    # Paths still being scored, with their symbols, lengths and scores.
+    columns = np.arange(n_paths)
+    live_symbols, live_lengths, scores = symbols, lengths, result
+    n_moves_scored = 0
+    for position in range(1, int(lengths.max())):
+        active = position < live_lengths
+        repeated = live_symbols[:, position] == live_symbols[:, position - 1]
+        factors = np.where(active & ~repeated, live_symbols[:, position], 3)
+        terms = np.where(active & repeated, live_symbols[:, position], 4)
+        if abort_stats is not None:
+            n_moves_scored += (
+                int(np.count_nonzero(active & (scores < cap))) if cap is not None else int(active.sum()) * len(abc)
+            )
+        scores *= table[:, factors]
+        scores += table[:, terms]
+        if cap is None:
+            continue
+        np.minimum(scores, cap, out=scores)
+        # Paths that are over, or saturated for every triple, are abandoned.
+        alive = (scores < cap).any(axis=0)
+        alive &= position + 1 < live_lengths
+        n_alive = int(np.count_nonzero(alive))
+        if n_alive * 2 <= len(columns):
+            if scores is not result:
+                result[:, columns] = scores
+            columns = columns[alive]
+            if not n_alive:
+                break
+            live_symbols, live_lengths, scores = live_symbols[alive], live_lengths[alive], scores[:, alive]
+    if len(columns) and scores is not result:
+        result[:, columns] = scores
+
+    if abort_stats is not None:
+        n_moves = int((lengths - 1).sum()) * len(abc)
+        n_aborted = int(np.count_nonzero(result >= cap)) if cap is not None else 0
+        abort_stats["paths"] = abort_stats.get("paths", 0) + n_paths * len(abc)
+        abort_stats["aborted"] = abort_stats.get("aborted", 0) + n_aborted
+        abort_stats["moves"] = abort_stats.get("moves", 0) + n_moves
+        abort_stats["moves_scored"] = abort_stats.get("moves_scored", 0) + n_moves_scored
+    return result[0] if single else result
+
+
+def score_paths(
+    grid: list[list[str]],
+    paths: list[list[str]],
+    abc: Union[Sequence[int], Sequence[Sequence[int]], np.ndarray],
+    cap: Optional[int] = SCORE_CAP,
+) -> np.ndarray:
+    """
+    Vectorized `calculate_path_score()` over a batch of paths and one or many (A, B, C) triples.
+
+    Args:
+        grid (list of list of str): 2D grid with "A", "B", "C" as string values in each cell.
+        paths (list of list of str): Paths in coordinate format.
+        abc (sequence or np.ndarray): A single (A, B, C) triple, or an array of triples of shape (n_abc, 3).
+        cap (int, optional): Saturation of the scores, see `score_encoded_paths()`.
+
+    Returns:
+        np.ndarray: int64 scores of shape (n_paths,) for a single triple, or (n_abc, n_paths).
+    """
+    symbols, lengths = encode_paths(grid, paths)
+    return score_encoded_paths(symbols, lengths, abc, cap)
+
+
+if __name__ == "__main__":
+    import time
+
+    from knight_moves_6.calculation.calculate_score import calculate_path_score
+    from knight_moves_6.calculation.constant import GRID
+    from knight_moves_6.solver.enumerate_paths import iter_knight_paths
+
+    paths = list(iter_knight_paths("a1", "f6", max_paths=100000))
+    abc = [(1, 2, 253), (1, 3, 2), (2, 3, 1), (5, 7, 11)]
+
+    start_time = time.perf_counter()
+    scores = score_paths(GRID, paths, abc)
+    print(f"Scored {len(paths)} paths for {len(abc)} triples in {time.perf_counter() - start_time:.2f}s.")
+
+    start_time = time.perf_counter()
+    expected = [[calculate_path_score(GRID, path, A, B, C) for path in paths] for A, B, C in abc]
+    print(f"Scored them one at a time in {time.perf_counter() - start_time:.2f}s.")
+    print("Scores match:", np.array_equal(scores, np.minimum(expected, SCORE_CAP)))
+    print("Paths scoring 2024 per triple:", (scores == PATH_SUM).sum(axis=1))
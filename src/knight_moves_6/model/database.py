@@ -1,22 +1,95 @@
-from sqlalchemy import asc, create_engine
+from sqlalchemy import asc, create_engine, text
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateTable
 
 from knight_moves_6.calculation.calculate_score import calculate_path_score
 from knight_moves_6.calculation.constant import GRID, PATH_SUM
 from knight_moves_6.calculation.coordinate_map import path_to_string, solution_string_to_coordinate_list, string_to_path
 from knight_moves_6.model.model_abc import ABCCombination
 from knight_moves_6.model.model_base import Base
+from knight_moves_6.model.model_histogram import ScoreHistogram
 from knight_moves_6.model.model_path import KnightPath
 from knight_moves_6.model.model_score import PathScore
+from knight_moves_6.model.model_signature import PathSignature
 from knight_moves_6.model.model_solution import Solution
 
+# Columns added to `knight_paths` since it was first released, and the statements adding them to an older table.
+# `create_all()` never alters an existing table, and SQLite can only add a constraint as a separate index.
+KNIGHT_PATH_MIGRATIONS = {
+    "rank": [
+        "ALTER TABLE knight_paths ADD COLUMN rank BIGINT",
+        "CREATE UNIQUE INDEX IF NOT EXISTS _start_rank_uc ON knight_paths (start, rank)",
+    ],
+    "polynomial_hash": [
+        "ALTER TABLE knight_paths ADD COLUMN polynomial_hash BIGINT",
+        "CREATE INDEX IF NOT EXISTS ix_knight_paths_polynomial_hash ON knight_paths (polynomial_hash)",
+    ],
+}
+
+
+def migrate_database(engine) -> None:
+    """Add the columns of the models that are missing from the tables of an older database."""
+    with engine.begin() as connection:
+        columns = {row[1] for row in connection.execute(text("PRAGMA table_info(knight_paths)"))}
+        for column, statements in KNIGHT_PATH_MIGRATIONS.items():
+            if column not in columns:
+                for statement in statements:
+                    connection.execute(text(statement))
+                print(f"Added column `{column}` to `knight_paths`.")
+
+
+def knight_path_allows_null_path(engine) -> bool:
+    """Whether `knight_paths.path` accepts NULL, i.e. whether paths can be stored by their rank alone."""
+    with engine.connect() as connection:
+        columns = {row[1]: row[3] for row in connection.execute(text("PRAGMA table_info(knight_paths)"))}
+    return not columns["path"]
+
+
+def check_knight_path_allows_null_path(engine) -> None:
+    """Fail before storing paths by their rank alone in a table whose `path` is still NOT NULL."""
+    if not knight_path_allows_null_path(engine):
+        raise RuntimeError(
+            "`knight_paths.path` is NOT NULL in this database, so paths cannot be stored by their rank alone. "
+            "Run `rebuild_knight_paths_table()` once to make it nullable."
+        )
+
+
+def rebuild_knight_paths_table(engine) -> None:
+    """
+    Recreate `knight_paths` with the schema of KnightPath, to make `path` nullable in a table created before `rank`.
+
+    SQLite cannot relax NOT NULL with ALTER TABLE, so the rows are copied into a new table, which then replaces the
+    old one. This needs as much free disk space as the table itself, and takes a while on the full path tables,
+    so `setup_database()` leaves it to be run by hand. Foreign keys must be off, as they are by default in SQLite.
+
+    Args:
+        engine (Engine): Engine of the database, e.g. `knight_moves_6.model.database.engine`.
+    """
+    if knight_path_allows_null_path(engine):
+        return
+    migrate_database(engine)
+    columns = ", ".join(column.name for column in KnightPath.__table__.columns)
+    create_table = str(CreateTable(KnightPath.__table__).compile(engine))
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS knight_paths_rebuilt"))
+        connection.execute(
+            text(create_table.replace("CREATE TABLE knight_paths ", "CREATE TABLE knight_paths_rebuilt ", 1))
+        )
+        connection.execute(text(f"INSERT INTO knight_paths_rebuilt ({columns}) SELECT {columns} FROM knight_paths"))
+        connection.execute(text("DROP TABLE knight_paths"))
+        connection.execute(text("ALTER TABLE knight_paths_rebuilt RENAME TO knight_paths"))
+        for index in KnightPath.__table__.indexes:
+            index.create(connection)
+    print("Rebuilt `knight_paths` with a nullable `path` column.")
+
 
 # Database setup: create a SQLite database in the local directory
 def setup_database(db_name="knight-moves-6.db"):
-    """Create an SQLite engine and setup the database."""
+    """Create an SQLite engine and setup the database, migrating the tables of an older one."""
     engine = create_engine(f"sqlite:///{db_name}", echo=False)
     Base.metadata.create_all(engine)  # Create tables based on the model
+    migrate_database(engine)
     return engine
 
 
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, ForeignKey, Integer, LargeBinary, String, UniqueConstraint
+
+from knight_moves_6.model.model_base import Base
+
+
+class ScoreHistogram(Base):
+    __tablename__ = "score_histograms"
+
+    id = Column(Integer, primary_key=True)
+    abc_combination_id = Column(Integer, ForeignKey("abc_combinations.id"), nullable=False)
+    start = Column(String, nullable=False)
+    # Number of paths scoring each value from 0 to `cap`, then above `cap`, packed by `pack_score_counts()`.
+    cap = Column(Integer, nullable=False)
+    counts = Column(LargeBinary, nullable=False)
+    # Every KnightPath up to this id is counted, so that an interrupted sweep resumes after it.
+    last_knight_path_id = Column(Integer, nullable=False)
+
+    # Enforce uniqueness on the combination of abc_combination_id and start.
+    __table_args__ = (UniqueConstraint("abc_combination_id", "start", name="_abc_start_uc"),)
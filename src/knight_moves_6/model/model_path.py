@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, UniqueConstraint
+from sqlalchemy import BigInteger, Column, Integer, String, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from knight_moves_6.model.model_base import Base
@@ -9,11 +9,18 @@ class KnightPath(Base):
 
     id = Column(Integer, primary_key=True)
     start = Column(String, nullable=False)
-    path = Column(String, nullable=False)
+    # Either the path itself, or its rank among the paths from `start` (see `solver/path_rank.py`), or both.
+    path = Column(String, nullable=True)
+    rank = Column(BigInteger, nullable=True)
     expression = Column(String, nullable=False)
+    # Hash of the canonical polynomial of the expression (see `calculation/polynomial.py`), shared by many paths.
+    polynomial_hash = Column(BigInteger, nullable=True, index=True)
 
-    # Enforce uniqueness on the combination of path and expression.
-    __table_args__ = (UniqueConstraint("path", "expression", name="_path_expression_uc"),)
+    # Enforce uniqueness on the combination of path and expression, and on the rank of paths from the same start.
+    __table_args__ = (
+        UniqueConstraint("path", "expression", name="_path_expression_uc"),
+        UniqueConstraint("start", "rank", name="_start_rank_uc"),
+    )
 
     # Relationship to PathScore
     path_scores = relationship("PathScore", back_populates="knight_path")
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, UniqueConstraint
+
+from knight_moves_6.model.model_base import Base
+
+
+class PathSignature(Base):
+    __tablename__ = "path_signatures"
+
+    id = Column(Integer, primary_key=True)
+    start = Column(String, nullable=False)
+    # Grid symbols along the paths, e.g. "AABBCCC". All paths with the same signature have the same expression.
+    signature = Column(String, nullable=False)
+    expression = Column(String, nullable=False)
+    # Number of paths found with this signature, and the first of them.
+    path_count = Column(Integer, nullable=False)
+    path = Column(String, nullable=False)
+
+    # Enforce uniqueness on the combination of start and signature.
+    __table_args__ = (UniqueConstraint("start", "signature", name="_start_signature_uc"),)
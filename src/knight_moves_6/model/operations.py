@@ -1,16 +1,22 @@
 import collections
 from typing import Optional
 
-from sqlalchemy import delete, select, text
+from sqlalchemy import delete, func, select, text, update
 from sqlalchemy.dialects.sqlite import insert
 
-from knight_moves_6.calculation.coordinate_map import string_to_path
-from knight_moves_6.model.database import Session
+from knight_moves_6.calculation.calculate_score import calculate_path_expression
+from knight_moves_6.calculation.constant import GRID
+from knight_moves_6.calculation.coordinate_map import path_to_string, string_to_path
+from knight_moves_6.calculation.polynomial import expression_polynomial_hash
+from knight_moves_6.model.database import Session, check_knight_path_allows_null_path, migrate_database
 from knight_moves_6.model.model_abc import ABCCombination
 from knight_moves_6.model.model_base import Base
+from knight_moves_6.model.model_histogram import ScoreHistogram
 from knight_moves_6.model.model_path import KnightPath
 from knight_moves_6.model.model_score import PathScore
+from knight_moves_6.model.model_signature import PathSignature
 from knight_moves_6.model.model_solution import Solution
+from knight_moves_6.solver.path_rank import rank_path, unrank_path
 
 
 def add_abc_combination(session: Session, A: int, B: int, C: int, sum_abc: int) -> Optional[ABCCombination]:
@@ -66,6 +72,21 @@ def add_knight_path(session: Session, start: str, path: str, expression: str) ->
     return session.query(KnightPath).filter_by(path=path, expression=expression).first()
 
 
+def read_knight_path(knight_path: KnightPath) -> list[str]:
+    """
+    Returns the positions of a KnightPath, rebuilding them from the rank if the path string is not stored.
+
+    Args:
+        knight_path (KnightPath): KnightPath instance.
+
+    Returns:
+        list[str]: List of positions in coordinate format.
+    """
+    if knight_path.path is not None:
+        return string_to_path(knight_path.path)
+    return unrank_path(knight_path.start, knight_path.rank)
+
+
 def add_path_score(session: Session, abc_combination_id: int, knight_path_id: int, score: int) -> Optional[PathScore]:
     """
     Adds a PathScore to the database if it does not already exist.
@@ -104,6 +125,85 @@ def get_path_scores(session: Session) -> list[PathScore]:
     return session.query(PathScore).all()
 
 
+def upsert_path_signatures(session: Session, path_signatures: list[dict]) -> None:
+    """
+    Adds PathSignature entries, or adds their path counts to the existing entries with the same start and signature.
+
+    The representative path of an existing entry is kept, i.e. it is the first path found with that signature.
+
+    Args:
+        session (Session): SQLAlchemy session to interact with the database.
+        path_signatures (list of dict): Dicts with keys "start", "signature", "expression", "path_count" and "path".
+    """
+    if not path_signatures:
+        return
+    stmt = insert(PathSignature)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["start", "signature"],
+        set_={"path_count": PathSignature.path_count + stmt.excluded.path_count},
+    )
+    session.execute(stmt, path_signatures)
+    session.commit()
+
+
+def get_path_signatures(session: Session, start: Optional[str] = None) -> list[PathSignature]:
+    """
+    Retrieves the PathSignature entries, optionally only those starting at `start`.
+
+    Args:
+        session (Session): SQLAlchemy session to interact with the database.
+        start (str, optional): Starting point of the paths, e.g. "a1".
+
+    Returns:
+        list[PathSignature]: List of PathSignature instances.
+    """
+    query = session.query(PathSignature)
+    if start is not None:
+        query = query.filter_by(start=start)
+    return query.all()
+
+
+def upsert_score_histograms(session: Session, score_histograms: list[dict]) -> None:
+    """
+    Adds ScoreHistogram entries, or replaces the existing entries with the same ABC combination and start.
+
+    Args:
+        session (Session): SQLAlchemy session to interact with the database.
+        score_histograms (list of dict): Dicts with keys "abc_combination_id", "start", "cap", "counts"
+            and "last_knight_path_id".
+    """
+    if not score_histograms:
+        return
+    stmt = insert(ScoreHistogram)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["abc_combination_id", "start"],
+        set_={
+            "cap": stmt.excluded.cap,
+            "counts": stmt.excluded.counts,
+            "last_knight_path_id": stmt.excluded.last_knight_path_id,
+        },
+    )
+    session.execute(stmt, score_histograms)
+    session.commit()
+
+
+def get_score_histograms(session: Session, start: Optional[str] = None) -> list[ScoreHistogram]:
+    """
+    Retrieves the ScoreHistogram entries, optionally only those of the paths starting at `start`.
+
+    Args:
+        session (Session): SQLAlchemy session to interact with the database.
+        start (str, optional): Starting point of the paths, e.g. "a1".
+
+    Returns:
+        list[ScoreHistogram]: List of ScoreHistogram instances.
+    """
+    query = session.query(ScoreHistogram)
+    if start is not None:
+        query = query.filter_by(start=start)
+    return query.all()
+
+
 def add_solution(
     session: Session, A: int, B: int, C: int, path1: str, path2: str, score1: int, score2: int, sum_abc: int
 ) -> Optional[Solution]:
@@ -189,7 +289,7 @@ def get_processed_scores(session: Session) -> dict[tuple[int, int, int], list[li
     processed_paths = collections.defaultdict(list)
     for valid_path in valid_paths:
         key = (valid_path[1].A, valid_path[1].B, valid_path[1].C)
-        processed_paths[key].append(string_to_path(valid_path[2].path))
+        processed_paths[key].append(read_knight_path(valid_path[2]))
     return processed_paths
 
 
@@ -226,6 +326,173 @@ def delete_unreferenced_knight_paths(session: Session, batch_size: int = 25000):
     print("Vaccumed database.")
 
 
+def add_knight_path_rank_column(session: Session) -> None:
+    """Add the `rank` column to a KnightPath table created before it existed. `setup_database()` already does."""
+    migrate_database(session.get_bind())
+
+
+def rank_knight_paths(session: Session, batch_size: int = 100000, drop_paths: bool = False) -> int:
+    """
+    Fill the rank of the KnightPath entries that only store the path string.
+
+    Args:
+        session (Session): SQLAlchemy session to interact with the database.
+        batch_size (int): Number of entries updated per commit.
+        drop_paths (bool): Also clear the path strings, which only the rank is needed to rebuild.
+            Requires a nullable `path` column, see `rebuild_knight_paths_table()`.
+
+    Returns:
+        int: Number of entries ranked.
+    """
+    add_knight_path_rank_column(session)
+    if drop_paths:
+        check_knight_path_allows_null_path(session.get_bind())
+    n_ranked = 0
+    last_id = 0
+    while True:
+        batch = session.execute(
+            select(KnightPath.id, KnightPath.path)
+            .where(KnightPath.id > last_id)
+            .where(KnightPath.rank.is_(None))
+            .order_by(KnightPath.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            break
+        ranks = [{"id": path_id, "rank": rank_path(string_to_path(path))} for path_id, path in batch]
+        if drop_paths:
+            for rank in ranks:
+                rank["path"] = None
+        session.execute(update(KnightPath), ranks)
+        session.commit()
+        last_id = batch[-1][0]
+        n_ranked += len(batch)
+        print(f"Ranked {n_ranked} knight paths.")
+    return n_ranked
+
+
+def add_knight_path_polynomial_column(session: Session) -> None:
+    """
+    Add the indexed `polynomial_hash` column to a KnightPath table created before it existed.
+    `setup_database()` already does.
+    """
+    migrate_database(session.get_bind())
+
+
+def hash_knight_path_polynomials(session: Session, batch_size: int = 100000) -> int:
+    """
+    Fill the polynomial hash of the KnightPath entries stored before it existed.
+
+    Args:
+        session (Session): SQLAlchemy session to interact with the database.
+        batch_size (int): Number of entries updated per commit.
+
+    Returns:
+        int: Number of entries hashed.
+    """
+    add_knight_path_polynomial_column(session)
+    n_hashed = 0
+    last_id = 0
+    while True:
+        batch = session.execute(
+            select(KnightPath.id, KnightPath.expression)
+            .where(KnightPath.id > last_id)
+            .where(KnightPath.polynomial_hash.is_(None))
+            .order_by(KnightPath.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            break
+        hashes = [
+            {"id": path_id, "polynomial_hash": expression_polynomial_hash(expression)} for path_id, expression in batch
+        ]
+        session.execute(update(KnightPath), hashes)
+        session.commit()
+        last_id = batch[-1][0]
+        n_hashed += len(batch)
+        print(f"Hashed the polynomials of {n_hashed} knight paths.")
+    return n_hashed
+
+
+def get_distinct_polynomials(session: Session) -> list[tuple[int, str]]:
+    """
+    List the distinct polynomials of the stored knight paths.
+
+    Args:
+        session (Session): SQLAlchemy session to interact with the database.
+
+    Returns:
+        list[tuple[int, str]]: Polynomial hash and the expression of one of its paths, for every distinct polynomial.
+    """
+    return session.execute(
+        select(KnightPath.polynomial_hash, func.min(KnightPath.expression))
+        .where(KnightPath.polynomial_hash.is_not(None))
+        .group_by(KnightPath.polynomial_hash)
+    ).all()
+
+
+def get_knight_path_ids_by_polynomial(session: Session, polynomial_hashes: list[int]) -> list[int]:
+    """
+    Ids of the knight paths whose polynomial is any of the given ones.
+
+    Args:
+        session (Session): SQLAlchemy session to interact with the database.
+        polynomial_hashes (list of int): Hashes of the polynomials.
+
+    Returns:
+        list[int]: Ids of the KnightPath entries.
+    """
+    return (
+        session.execute(select(KnightPath.id).where(KnightPath.polynomial_hash.in_(polynomial_hashes))).scalars().all()
+    )
+
+
+def add_scored_knight_paths(session: Session, abc_combination_id: int, paths: list[list[str]], score: int) -> int:
+    """
+    Adds knight paths and their score for an ABC combination, skipping the paths and scores already stored.
+
+    Args:
+        session (Session): SQLAlchemy session to interact with the database.
+        abc_combination_id (int): Id of the ABCCombination the paths were scored with.
+        paths (list of list of str): Paths in coordinate format.
+        score (int): Score of every path.
+
+    Returns:
+        int: Number of paths given.
+    """
+    if not paths:
+        return 0
+    chunk_size = 500
+    path_strings = [path_to_string(path) for path in paths]
+    for chunk in range(0, len(paths), chunk_size):
+        rows = []
+        for path, path_string in zip(paths[chunk : chunk + chunk_size], path_strings[chunk : chunk + chunk_size]):
+            expression = calculate_path_expression(GRID, path)
+            rows.append(
+                {
+                    "start": path[0],
+                    "path": path_string,
+                    "expression": expression,
+                    "polynomial_hash": expression_polynomial_hash(expression),
+                }
+            )
+        session.execute(insert(KnightPath).on_conflict_do_nothing(), rows)
+        knight_path_ids = (
+            session.execute(select(KnightPath.id).where(KnightPath.path.in_(path_strings[chunk : chunk + chunk_size])))
+            .scalars()
+            .all()
+        )
+        session.execute(
+            insert(PathScore).on_conflict_do_nothing(),
+            [
+                {"abc_combination_id": abc_combination_id, "knight_path_id": knight_path_id, "score": score}
+                for knight_path_id in knight_path_ids
+            ],
+        )
+    session.commit()
+    return len(paths)
+
+
 def delete_not_minimum_sum(session: Session):
     """Delete suboptimal results."""
     # Enable foreign key constraints in SQLite, once per session.
@@ -0,0 +1,121 @@
+import json
+import os
+from typing import Optional
+
+from knight_moves_6.calculation.bitboard import GRID_SIZE, cell_to_index, index_to_cell
+from knight_moves_6.calculation.constant import KNIGHT_MOVES
+
+
+def cells_to_move_indices(cells: tuple[int, ...]) -> list[int]:
+    """
+    Encode a path as the index in `KNIGHT_MOVES` of every move along it.
+
+    Args:
+        cells (tuple of int): Path as cell indices.
+
+    Returns:
+        list[int]: Index of each move in `KNIGHT_MOVES`, one fewer than the number of cells.
+    """
+    move_indices = []
+    for prev_cell, cell in zip(cells, cells[1:]):
+        prev_row, prev_col = cell_to_index(prev_cell)
+        row, col = cell_to_index(cell)
+        move_indices.append(KNIGHT_MOVES.index((row - prev_row, col - prev_col)))
+    return move_indices
+
+
+def move_indices_to_cells(start: int, move_indices: list[int]) -> tuple[int, ...]:
+    """
+    Decode a path from its starting cell and the index in `KNIGHT_MOVES` of every move along it.
+
+    Args:
+        start (int): Cell index of the starting position.
+        move_indices (list of int): Index of each move in `KNIGHT_MOVES`.
+
+    Returns:
+        tuple[int, ...]: Path as cell indices.
+    """
+    cells = [start]
+    for move_index in move_indices:
+        row, col = cell_to_index(cells[-1])
+        dr, dc = KNIGHT_MOVES[move_index]
+        if not (0 <= row + dr < GRID_SIZE and 0 <= col + dc < GRID_SIZE):
+            raise ValueError(f"Move {move_index} leaves the grid from cell {cells[-1]}.")
+        cells.append(index_to_cell(row + dr, col + dc))
+    return tuple(cells)
+
+
+def save_checkpoint(
+    checkpoint_file: str,
+    start: int,
+    end: int,
+    last_path: Optional[tuple[int, ...]],
+    n_paths: int,
+    complete: bool,
+    with_mirror: bool = False,
+    store_ranks: bool = False,
+) -> None:
+    """
+    Persist the frontier of a path search, i.e. the stack of moves to the last stored path.
+
+    The file is replaced atomically, so that an interruption never leaves a half-written checkpoint.
+
+    Args:
+        checkpoint_file (str): Path of the JSON checkpoint file.
+        start (int): Cell index of the starting position.
+        end (int): Cell index of the ending position.
+        last_path (tuple of int, optional): Last path stored. The search resumes right after it.
+        n_paths (int): Total number of paths stored so far.
+        complete (bool): Whether the search tree is exhausted.
+        with_mirror (bool): Whether the reflection of every path is stored as well.
+        store_ranks (bool): Whether paths are stored as their ranks.
+    """
+    checkpoint = {
+        "start": start,
+        "end": end,
+        "moves": cells_to_move_indices(last_path) if last_path else None,
+        "n_paths": n_paths,
+        "complete": complete,
+        "with_mirror": with_mirror,
+        "store_ranks": store_ranks,
+    }
+    temp_file = f"{checkpoint_file}.tmp"
+    with open(temp_file, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(temp_file, checkpoint_file)
+
+
+def load_checkpoint(checkpoint_file: str) -> dict:
+    """
+    Load a checkpoint written by `save_checkpoint()`.
+
+    Args:
+        checkpoint_file (str): Path of the JSON checkpoint file.
+
+    Returns:
+        dict: Checkpoint with keys "start", "end", "last_path" (cell indices or None), "n_paths", "complete",
+            "with_mirror" and "store_ranks".
+    """
+    with open(checkpoint_file) as f:
+        checkpoint = json.load(f)
+    checkpoint.setdefault("with_mirror", False)
+    checkpoint.setdefault("store_ranks", False)
+    moves = checkpoint.pop("moves")
+    checkpoint["last_path"] = move_indices_to_cells(checkpoint["start"], moves) if moves is not None else None
+    return checkpoint
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    from knight_moves_6.calculation.bitboard import cells_to_path, path_to_cells
+
+    path = path_to_cells(["a1", "b3", "c5", "d3", "f4", "d5", "f6"])
+    move_indices = cells_to_move_indices(path)
+    print(move_indices)
+    print(cells_to_path(move_indices_to_cells(path[0], move_indices)))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        checkpoint_file = os.path.join(temp_dir, "checkpoint.json")
+        save_checkpoint(checkpoint_file, path[0], path[-1], path, 1, False)
+        print(load_checkpoint(checkpoint_file))
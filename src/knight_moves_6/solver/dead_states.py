@@ -0,0 +1,135 @@
+# Transposition table of the dead states of a score-carrying knight search, see `iter_scoring_path_cells()`.
+# Different move orders often reach the same cell with the same cells visited and the same score. Their subtrees are
+# then identical, so a subtree searched once without a hit never needs to be searched again.
+import sys
+from typing import Optional
+
+from knight_moves_6.calculation.bitboard import NUM_CELLS
+
+# Bits of the visited mask and of the cell index in a key.
+_VISITED_BITS = NUM_CELLS
+_CELL_BITS = 6
+
+
+class DeadStateTable:
+    """
+    Bounded table of the search states proven unable to reach the target, for a score-carrying knight search.
+
+    A state is the current cell, the visited mask and the running score. The last symbol is the symbol of the cell
+    on the grid, so it needs no room in the key. Everything the search can still do from a state only depends on
+    these, so once the subtree of a state is exhausted without a hit, the same state reached through another move
+    order can be skipped. The table is only valid for the (A, B, C), end corner and target it was filled with:
+    `clear()` it before searching with others.
+
+    Keys are packed into a single integer and kept in two sets, the current and the previous generation.
+    Once the current generation holds half of `max_entries`, it becomes the previous one and the old previous one is
+    evicted. A state found in the previous generation is promoted back to the current one, so the states that keep
+    recurring survive, and the table never holds more than `max_entries` states.
+
+    Most dead subtrees are a handful of nodes, cheaper to search again than to remember. The search only records the
+    states whose subtree took at least `min_subtree_nodes` nodes.
+
+    Args:
+        max_entries (int): Maximum number of states kept.
+        min_subtree_nodes (int): Smallest subtree, in nodes descended into, whose state is recorded.
+    """
+
+    def __init__(self, max_entries: int = 1 << 22, min_subtree_nodes: int = 1):
+        self.max_entries = max_entries
+        self.min_subtree_nodes = min_subtree_nodes
+        self._current = set()
+        self._previous = set()
+        self.hits = 0
+        self.misses = 0
+        self.inserts = 0
+        self.evicted = 0
+
+    @staticmethod
+    def key(cell: int, visited: int, score: int) -> int:
+        """Pack a search state into a single integer."""
+        return (score << (_VISITED_BITS + _CELL_BITS)) | (visited << _CELL_BITS) | cell
+
+    def __len__(self) -> int:
+        return len(self._current) + len(self._previous)
+
+    def __contains__(self, key: int) -> bool:
+        """Whether a state is known to be dead. Counts a hit or a miss."""
+        if key in self._current:
+            self.hits += 1
+            return True
+        if key in self._previous:
+            self.hits += 1
+            self.add(key)
+            return True
+        self.misses += 1
+        return False
+
+    def add(self, key: int) -> None:
+        """Record a dead state, evicting the previous generation once the current one is full."""
+        self._current.add(key)
+        self.inserts += 1
+        if len(self._current) >= self.max_entries // 2:
+            self.evicted += len(self._previous)
+            self._previous = self._current
+            self._current = set()
+
+    def clear(self) -> None:
+        """Forget every state, e.g. before searching for another (A, B, C). The counters are kept."""
+        self._current = set()
+        self._previous = set()
+
+    def memory_bytes(self) -> int:
+        """Approximate memory used by the sets and their keys."""
+        n_entries = len(self)
+        key_size = sys.getsizeof(self.key(NUM_CELLS - 1, (1 << NUM_CELLS) - 1, 1 << 11))
+        return sys.getsizeof(self._current) + sys.getsizeof(self._previous) + n_entries * key_size
+
+    def stats(self) -> dict[str, int]:
+        """Counters of the table, and its current size and memory."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "inserts": self.inserts,
+            "evicted": self.evicted,
+            "entries": len(self),
+            "memory_bytes": self.memory_bytes(),
+        }
+
+    def format_stats(self, n_moves: Optional[int] = None) -> str:
+        """
+        Summarize the table, e.g. "120000 entries (9.5 MB), 35.0% of lookups hit, 0 evicted".
+
+        Args:
+            n_moves (int, optional): Moves tried by the search, to report the fraction the table pruned.
+
+        Returns:
+            str: Summary of the table.
+        """
+        n_lookups = self.hits + self.misses
+        summary = (
+            f"{len(self)} entries ({self.memory_bytes() / 1e6:.1f} MB), "
+            f"{self.hits / max(n_lookups, 1):.1%} of {n_lookups} lookups hit, {self.evicted} evicted"
+        )
+        if n_moves is not None:
+            summary += f", {self.hits / max(n_moves, 1):.1%} of moves pruned"
+        return summary
+
+
+if __name__ == "__main__":
+    import time
+
+    from knight_moves_6.solver.score_search import iter_scoring_path_cells
+
+    A, B, C = 1, 2, 253
+    for dead_states in [
+        None,
+        DeadStateTable(),
+        DeadStateTable(max_entries=1 << 16),
+        DeadStateTable(min_subtree_nodes=16),
+    ]:
+        stats = {}
+        start_time = time.perf_counter()
+        paths = list(iter_scoring_path_cells(0, 35, A, B, C, stats=stats, dead_states=dead_states))
+        elapsed = time.perf_counter() - start_time
+        summary = dead_states.format_stats(stats["moves"]) if dead_states is not None else "no table"
+        print(f"{len(paths)} paths, {stats['nodes']} nodes in {elapsed:.2f}s: {summary}.")
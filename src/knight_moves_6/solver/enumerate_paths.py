@@ -0,0 +1,635 @@
+import collections
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Container, Generator, Iterator, Optional
+
+from knight_moves_6.calculation.bitboard import (
+    FREE_NEIGHBOURS,
+    NEIGHBOUR_MASKS,
+    cells_to_path,
+    coord_to_cell,
+    is_reachable,
+    knight_distances,
+    path_to_cells,
+)
+from knight_moves_6.calculation.jit_kernels import iter_knight_path_cells_jit, resolve_backend
+from knight_moves_6.solver.search_stats import SearchStats
+
+
+def _restore_search(
+    end: int, base: list[int], resume_after: tuple[int, ...]
+) -> tuple[list[int], int, list[Iterator[int]], Iterator[int]]:
+    """
+    Rebuild the state of `iter_knight_path_cells()` right after it yielded `resume_after`.
+
+    Args:
+        end (int): Cell index of the ending position.
+        base (list of int): Cells the search started from, i.e. `[start]` or the prefix.
+        resume_after (tuple of int): Path previously yielded by the search.
+
+    Returns:
+        tuple: The current path, visited mask, stack of move iterators and the move iterator of the current cell.
+    """
+    # If all entry squares of `end` were visited before the second to last cell, that cell was never descended into.
+    visited = 0
+    for cell in resume_after[:-1]:
+        visited |= 1 << cell
+    descended = NEIGHBOUR_MASKS[end] & ~visited
+    path = list(resume_after[:-1] if descended else resume_after[:-2])
+
+    visited = 0
+    for cell in path[: len(base) - 1]:
+        visited |= 1 << cell
+    stack = []
+    for depth in range(len(base) - 1, len(path)):
+        cell = path[depth]
+        visited |= 1 << cell
+        options = FREE_NEIGHBOURS[cell][NEIGHBOUR_MASKS[cell] & ~visited]
+        next_cell = resume_after[depth + 1]
+        stack.append(iter(options[options.index(next_cell) + 1 :]))
+    return path, visited, stack, stack.pop()
+
+
+def iter_knight_path_cells(
+    start: int,
+    end: int,
+    prefix: Optional[tuple[int, ...]] = None,
+    resume_after: Optional[tuple[int, ...]] = None,
+    prune_depths: Optional[Container[int]] = None,
+    prune_stats: Optional[dict[str, int]] = None,
+    search_stats: Optional[SearchStats] = None,
+) -> Generator[tuple[int, ...], None, None]:
+    """
+    Iterative search for all valid paths from start to end without overlapping.
+
+    Replaces the recursion of `find_knight_paths()` with an explicit stack of move iterators,
+    and the set of visited `(row, col)` tuples with a 36-bit mask.
+    Paths are found in the same order as `find_knight_paths()`.
+
+    Args:
+        start (int): Cell index of the starting position (e.g., 0 for "a1").
+        end (int): Cell index of the ending position (e.g., 35 for "f6").
+        prefix (tuple of int, optional): Only search paths that start with these cells, beginning with `start`.
+        resume_after (tuple of int, optional): Continue the search right after this previously found path.
+        prune_depths (container of int, optional): Path lengths at which to check, with a flood fill,
+            that `end` is still reachable before descending. E.g. `range(37)` checks every node. Default: no check.
+        prune_stats (dict, optional): Receives the number of nodes "checked" and "pruned" by the flood fill.
+        search_stats (SearchStats, optional): Receives the nodes visited per depth and the paths found per length.
+
+    Yields:
+        tuple[int, ...]: Path as cell indices, from `start` to `end`.
+    """
+    free_neighbours = FREE_NEIGHBOURS
+    neighbour_masks = NEIGHBOUR_MASKS
+
+    # Squares from which `end` can be entered. Once all of them are visited, the branch is dead.
+    entry_mask = neighbour_masks[end]
+    end_bit = 1 << end
+
+    base = list(prefix) if prefix else [start]
+    if resume_after:
+        path, visited, stack, moves = _restore_search(end, base, resume_after)
+    else:
+        path = base
+        visited = 0
+        for cell in path:
+            visited |= 1 << cell
+        stack = []
+        options = free_neighbours[path[-1]][neighbour_masks[path[-1]] & ~visited]
+        if search_stats is not None:
+            search_stats.expanded[len(path)] += 1
+            search_stats.moves[len(path)] += len(options)
+        moves = iter(options)
+
+    if prune_depths is not None or search_stats is not None:
+        # Keep the checks and counters out of the plain search, so that it costs nothing without them.
+        yield from _search_instrumented(end, path, visited, stack, moves, prune_depths, prune_stats, search_stats)
+        return
+
+    while True:
+        for cell in moves:
+            if cell == end:
+                yield (*path, end)
+                continue
+            free = neighbour_masks[cell] & ~visited
+            if free and entry_mask & ~(visited | 1 << cell):
+                # Descend into the next cell.
+                stack.append(moves)
+                path.append(cell)
+                visited |= 1 << cell
+                moves = iter(free_neighbours[cell][free])
+                break
+            elif free & end_bit:
+                # The only way out of this cell that can still reach `end` is `end` itself.
+                yield (*path, cell, end)
+        else:
+            # All moves from the current cell are exhausted, backtrack.
+            if not stack:
+                return
+            visited ^= 1 << path.pop()
+            moves = stack.pop()
+
+
+def _search_instrumented(
+    end: int,
+    path: list[int],
+    visited: int,
+    stack: list[Iterator[int]],
+    moves: Iterator[int],
+    prune_depths: Optional[Container[int]],
+    prune_stats: Optional[dict[str, int]],
+    search_stats: Optional[SearchStats],
+) -> Generator[tuple[int, ...], None, None]:
+    """
+    Same search as `iter_knight_path_cells()`, with the optional flood fill pruning and counters of `search_stats`.
+
+    The plain loop of `iter_knight_path_cells()` stays a separate copy because it is the hot path: over the first
+    1M paths from a1 to f6, it takes 5.4-5.7s, against 6.7s for this loop with the counters only.
+    """
+    free_neighbours = FREE_NEIGHBOURS
+    neighbour_masks = NEIGHBOUR_MASKS
+    entry_mask = neighbour_masks[end]
+    end_bit = 1 << end
+
+    if prune_depths is None:
+        prune_depths = ()
+    elif prune_stats is None:
+        prune_stats = {}
+    if prune_stats is not None:
+        prune_stats.setdefault("checked", 0)
+        prune_stats.setdefault("pruned", 0)
+    counting = search_stats is not None
+    if counting:
+        expanded = search_stats.expanded
+        n_moves = search_stats.moves
+        n_paths = search_stats.paths
+
+    while True:
+        for cell in moves:
+            if cell == end:
+                if counting:
+                    n_paths[len(path) + 1] += 1
+                yield (*path, end)
+                continue
+            free = neighbour_masks[cell] & ~visited
+            if free and entry_mask & ~(visited | 1 << cell):
+                if len(path) + 1 in prune_depths:
+                    prune_stats["checked"] += 1
+                    if not is_reachable(cell, end, visited | 1 << cell):
+                        prune_stats["pruned"] += 1
+                        continue
+                stack.append(moves)
+                path.append(cell)
+                visited |= 1 << cell
+                options = free_neighbours[cell][free]
+                if counting:
+                    expanded[len(path)] += 1
+                    n_moves[len(path)] += len(options)
+                moves = iter(options)
+                break
+            elif free & end_bit:
+                if counting:
+                    # The forced move to `end` is the only child visited below this cell.
+                    expanded[len(path) + 1] += 1
+                    n_moves[len(path) + 1] += 1
+                    n_paths[len(path) + 2] += 1
+                yield (*path, cell, end)
+        else:
+            if not stack:
+                return
+            visited ^= 1 << path.pop()
+            moves = stack.pop()
+
+
+def iter_knight_path_shards(
+    start: int, end: int, prefix_depth: int
+) -> Generator[tuple[tuple[int, ...], bool], None, None]:
+    """
+    Split the search tree of `iter_knight_path_cells()` into independent subtrees.
+
+    Mirrors the search of `iter_knight_path_cells()`, but stops descending at `prefix_depth` cells.
+    Expanding every prefix with `iter_knight_path_cells(start, end, prefix)` in the yielded order
+    gives exactly the same paths in the same order as the full search.
+
+    Args:
+        start (int): Cell index of the starting position.
+        end (int): Cell index of the ending position.
+        prefix_depth (int): Number of cells in each prefix, including `start`.
+
+    Yields:
+        tuple[tuple[int, ...], bool]: Either a complete path shorter than the prefixes and `True`,
+            or a prefix of `prefix_depth` cells and `False`.
+    """
+    free_neighbours = FREE_NEIGHBOURS
+    neighbour_masks = NEIGHBOUR_MASKS
+    entry_mask = neighbour_masks[end]
+    end_bit = 1 << end
+
+    path = [start]
+    visited = 1 << start
+    stack = []
+    moves = iter(free_neighbours[start][neighbour_masks[start] & ~visited])
+    while True:
+        for cell in moves:
+            if cell == end:
+                yield (*path, end), True
+                continue
+            free = neighbour_masks[cell] & ~visited
+            if free and entry_mask & ~(visited | 1 << cell):
+                if len(path) + 1 >= prefix_depth:
+                    yield (*path, cell), False
+                    continue
+                stack.append(moves)
+                path.append(cell)
+                visited |= 1 << cell
+                moves = iter(free_neighbours[cell][free])
+                break
+            elif free & end_bit:
+                yield (*path, cell, end), True
+        else:
+            if not stack:
+                return
+            visited ^= 1 << path.pop()
+            moves = stack.pop()
+
+
+def _enumerate_shard(
+    start: int,
+    end: int,
+    prefix: tuple[int, ...],
+    max_paths: Optional[int],
+    resume_after: Optional[tuple[int, ...]] = None,
+    prune_depths: Optional[Container[int]] = None,
+    with_stats: bool = False,
+) -> tuple[list[bytes], dict[str, int], Optional[SearchStats]]:
+    """Worker function: enumerate all paths below a prefix. Paths are packed as bytes to keep transfers small."""
+    shard_paths = []
+    prune_stats = {}
+    search_stats = SearchStats() if with_stats else None
+    for cells in iter_knight_path_cells(start, end, prefix, resume_after, prune_depths, prune_stats, search_stats):
+        shard_paths.append(bytes(cells))
+        if max_paths is not None and len(shard_paths) >= max_paths:
+            break
+    return shard_paths, prune_stats, search_stats
+
+
+def iter_knight_path_cells_parallel(
+    start: int,
+    end: int,
+    max_workers: Optional[int] = None,
+    prefix_depth: int = 8,
+    max_paths: Optional[int] = None,
+    resume_after: Optional[tuple[int, ...]] = None,
+    prune_depths: Optional[Container[int]] = None,
+    prune_stats: Optional[dict[str, int]] = None,
+    search_stats: Optional[SearchStats] = None,
+) -> Generator[tuple[int, ...], None, None]:
+    """
+    Same as `iter_knight_path_cells()`, but the search tree is split into prefixes that are searched in parallel.
+
+    Prefixes are submitted to the process pool in search order, and their results are yielded in the same order.
+    The output is therefore identical to the serial search, regardless of the number of workers.
+
+    Args:
+        start (int): Cell index of the starting position.
+        end (int): Cell index of the ending position.
+        max_workers (int, optional): Number of worker processes. Default: number of CPUs.
+        prefix_depth (int): Number of cells in each prefix. Deeper prefixes give smaller, more balanced shards.
+        max_paths (int, optional): Stop after this many paths.
+        resume_after (tuple of int, optional): Continue the search right after this previously found path.
+        prune_depths (container of int, optional): See `iter_knight_path_cells()`.
+        prune_stats (dict, optional): See `iter_knight_path_cells()`. Summed over the shards yielded so far.
+        search_stats (SearchStats, optional): See `iter_knight_path_cells()`. Summed over the shards yielded so far,
+            without the nodes above the prefixes.
+
+    Yields:
+        tuple[int, ...]: Path as cell indices, from `start` to `end`.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    shards = iter_knight_path_shards(start, end, prefix_depth)
+    pending = collections.deque()
+    n_paths = 0
+    with_stats = search_stats is not None
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        while True:
+            # Keep a bounded number of shards in flight, in search order, so that results don't pile up in memory.
+            while len(pending) < 2 * max_workers:
+                shard = next(shards, None)
+                if shard is None:
+                    break
+                cells, is_complete = shard
+                remaining = None if max_paths is None else max_paths - n_paths
+                if resume_after:
+                    # Skip everything before the shard that contains `resume_after`.
+                    if is_complete and cells == resume_after:
+                        resume_after = None
+                    elif not is_complete and resume_after[: len(cells)] == cells:
+                        pending.append(
+                            executor.submit(
+                                _enumerate_shard, start, end, cells, remaining, resume_after, prune_depths, with_stats
+                            )
+                        )
+                        resume_after = None
+                elif is_complete:
+                    if with_stats:
+                        search_stats.paths[len(cells)] += 1
+                    pending.append(([bytes(cells)], {}, None))
+                else:
+                    pending.append(
+                        executor.submit(_enumerate_shard, start, end, cells, remaining, None, prune_depths, with_stats)
+                    )
+            if not pending:
+                return
+
+            shard = pending.popleft()
+            shard_paths, shard_stats, shard_search_stats = shard if isinstance(shard, tuple) else shard.result()
+            if prune_stats is not None:
+                for key, value in shard_stats.items():
+                    prune_stats[key] = prune_stats.get(key, 0) + value
+            if shard_search_stats is not None:
+                search_stats.merge(shard_search_stats)
+            for packed in shard_paths:
+                yield tuple(packed)
+                n_paths += 1
+                if max_paths is not None and n_paths >= max_paths:
+                    return
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def search_knight_path_cells(
+    start: int,
+    end: int,
+    max_workers: int = 1,
+    max_paths: Optional[int] = None,
+    resume_after: Optional[tuple[int, ...]] = None,
+    prune_depths: Optional[Container[int]] = None,
+    prune_stats: Optional[dict[str, int]] = None,
+    search_stats: Optional[SearchStats] = None,
+    backend: Optional[str] = None,
+) -> Iterator[tuple[int, ...]]:
+    """
+    Search paths with the serial or the parallel search, depending on `max_workers`.
+
+    The plain serial search runs the compiled kernel of `jit_kernels.py` when the backend is Numba.
+    Parallel, pruned and instrumented searches always run in Python.
+
+    Args:
+        start (int): Cell index of the starting position.
+        end (int): Cell index of the ending position.
+        max_workers (int): Number of processes searching in parallel.
+        max_paths (int, optional): Stop after this many paths.
+        resume_after (tuple of int, optional): Continue the search right after this previously found path.
+        prune_depths (container of int, optional): See `iter_knight_path_cells()`.
+        prune_stats (dict, optional): See `iter_knight_path_cells()`.
+        search_stats (SearchStats, optional): See `iter_knight_path_cells()`.
+        backend (str, optional): "auto", "numba" or "python", see `resolve_backend()`.
+
+    Returns:
+        Iterator[tuple[int, ...]]: Paths as cell indices, in search order.
+    """
+    backend = resolve_backend(backend)
+    if max_workers > 1:
+        return iter_knight_path_cells_parallel(
+            start,
+            end,
+            max_workers=max_workers,
+            max_paths=max_paths,
+            resume_after=resume_after,
+            prune_depths=prune_depths,
+            prune_stats=prune_stats,
+            search_stats=search_stats,
+        )
+    if backend == "numba" and prune_depths is None and search_stats is None:
+        return itertools.islice(iter_knight_path_cells_jit(start, end, resume_after=resume_after), max_paths)
+    path_cells = iter_knight_path_cells(
+        start,
+        end,
+        resume_after=resume_after,
+        prune_depths=prune_depths,
+        prune_stats=prune_stats,
+        search_stats=search_stats,
+    )
+    return itertools.islice(path_cells, max_paths)
+
+
+def iter_knight_paths(
+    start: str,
+    end: str,
+    max_paths: Optional[int] = None,
+    max_workers: int = 1,
+    resume_after: Optional[list[str]] = None,
+    prune_depths: Optional[Container[int]] = None,
+    prune_stats: Optional[dict[str, int]] = None,
+) -> Generator[list[str], None, None]:
+    """
+    Lazily yield all valid knight paths from start to end without overlapping.
+
+    Nothing is collected or written to the database: consumers pull paths one at a time and decide what to do
+    with them (scoring, filtering, writing to any sink). The serial search only keeps the current path in memory.
+
+    Args:
+        start (str): Starting position in coordinate format, e.g., "a1".
+        end (str): Ending position in coordinate format, e.g., "f6".
+        max_paths (int, optional): Stop after this many paths.
+        max_workers (int): Number of processes searching in parallel.
+            The parallel search buffers a bounded number of subtrees, so it uses more memory.
+        resume_after (list of str, optional): Continue the search right after this previously found path.
+        prune_depths (container of int, optional): See `iter_knight_path_cells()`.
+        prune_stats (dict, optional): See `iter_knight_path_cells()`.
+
+    Yields:
+        list[str]: Path in coordinate format (e.g., ["a1", "b3", ...]), in the same order as `find_knight_paths()`.
+    """
+    path_cells = search_knight_path_cells(
+        coord_to_cell(start),
+        coord_to_cell(end),
+        max_workers=max_workers,
+        max_paths=max_paths,
+        resume_after=path_to_cells(resume_after) if resume_after else None,
+        prune_depths=prune_depths,
+        prune_stats=prune_stats,
+    )
+    for cells in path_cells:
+        yield cells_to_path(cells)
+
+
+def _iter_knight_path_cells_of_length(
+    start: int, end: int, n_moves: int, distances: list[int]
+) -> Generator[tuple[int, ...], None, None]:
+    """
+    Search for the paths from start to end with exactly `n_moves` moves, in the order of `find_knight_paths()`.
+
+    A cell is only entered if `end` is still within reach of the moves left, ignoring visited cells.
+
+    Args:
+        start (int): Cell index of the starting position.
+        end (int): Cell index of the ending position.
+        n_moves (int): Number of moves of the paths.
+        distances (list of int): Minimum number of moves from every cell to `end`, from `knight_distances()`.
+
+    Yields:
+        tuple[int, ...]: Path as cell indices, from `start` to `end`.
+    """
+    free_neighbours = FREE_NEIGHBOURS
+    neighbour_masks = NEIGHBOUR_MASKS
+
+    path = [start]
+    visited = 1 << start
+    stack = []
+    moves = iter(free_neighbours[start][neighbour_masks[start] & ~visited])
+    while True:
+        for cell in moves:
+            # Moves left once the knight is on `cell`.
+            moves_left = n_moves - len(path)
+            if distances[cell] > moves_left:
+                continue
+            if cell == end:
+                if moves_left == 0:
+                    yield (*path, end)
+                continue
+            # Descend into the next cell.
+            stack.append(moves)
+            path.append(cell)
+            visited |= 1 << cell
+            moves = iter(free_neighbours[cell][neighbour_masks[cell] & ~visited])
+            break
+        else:
+            # All moves from the current cell are exhausted, backtrack.
+            if not stack:
+                return
+            visited ^= 1 << path.pop()
+            moves = stack.pop()
+
+
+def iter_knight_path_cells_by_length(
+    start: int, end: int, max_moves: int, min_moves: int = 0
+) -> Generator[tuple[int, ...], None, None]:
+    """
+    Iterative deepening search for all valid paths from start to end, shortest paths first.
+
+    Every path with `min_moves` to `max_moves` moves is yielded exactly once, by non-decreasing number of moves,
+    and in the order of `find_knight_paths()` among paths of the same length. Each depth is searched again
+    from `start`, but branches that cannot reach `end` in the moves left are cut, so that shallow levels stay cheap.
+
+    Args:
+        start (int): Cell index of the starting position (e.g., 0 for "a1").
+        end (int): Cell index of the ending position (e.g., 35 for "f6").
+        max_moves (int): Maximum number of moves of the paths, i.e. one fewer than the number of cells.
+        min_moves (int): Minimum number of moves of the paths.
+
+    Yields:
+        tuple[int, ...]: Path as cell indices, from `start` to `end`.
+    """
+    distances = knight_distances(end)
+    for n_moves in range(max(min_moves, distances[start]), max_moves + 1):
+        # The knight changes colour with every move, so only every other length is possible.
+        if (n_moves - distances[start]) % 2 == 0:
+            yield from _iter_knight_path_cells_of_length(start, end, n_moves, distances)
+
+
+def iter_knight_paths_by_length(
+    start: str, end: str, max_moves: int, min_moves: int = 0
+) -> Generator[list[str], None, None]:
+    """
+    Lazily yield all valid knight paths from start to end with `min_moves` to `max_moves` moves, shortest first.
+
+    Args:
+        start (str): Starting position in coordinate format, e.g., "a1".
+        end (str): Ending position in coordinate format, e.g., "f6".
+        max_moves (int): Maximum number of moves of the paths.
+        min_moves (int): Minimum number of moves of the paths.
+
+    Yields:
+        list[str]: Path in coordinate format (e.g., ["a1", "b3", ...]), by non-decreasing length.
+    """
+    for cells in iter_knight_path_cells_by_length(coord_to_cell(start), coord_to_cell(end), max_moves, min_moves):
+        yield cells_to_path(cells)
+
+
+if __name__ == "__main__":
+    import time
+
+    # Importing `generate_paths` sets up the database, so only do it to compare against the reference implementation.
+    import knight_moves_6.solver.generate_paths as generate_paths
+    from knight_moves_6.calculation.bitboard import NUM_CELLS
+    from knight_moves_6.calculation.calculate_score import calculate_path_score
+    from knight_moves_6.calculation.constant import GRID, PATH_SUM
+    from knight_moves_6.calculation.coordinate_map import coord_to_index
+
+    n_paths = 200000
+
+    # Interrupt the reference implementation at its first batch, instead of writing the batch to the database.
+    class StopSearch(Exception):
+        pass
+
+    def stop_search(knight_paths):
+        raise StopSearch
+
+    generate_paths.write_knight_paths_to_db = stop_search
+
+    time_start = time.perf_counter()
+    reference_paths = []
+    start, end = coord_to_index("a1"), coord_to_index("f6")
+    try:
+        generate_paths.find_knight_paths(start, end, {start}, ["a1"], reference_paths, [0], batch_size=n_paths)
+    except StopSearch:
+        pass
+    time_reference = time.perf_counter() - time_start
+
+    time_start = time.perf_counter()
+    cell_paths = list(itertools.islice(iter_knight_path_cells(coord_to_cell("a1"), coord_to_cell("f6")), n_paths))
+    time_bitboard = time.perf_counter() - time_start
+    bitboard_paths = [cells_to_path(cells) for cells in cell_paths]
+
+    print(f"Reference: {len(reference_paths)} paths in {time_reference:.2f}s.")
+    print(f"Bitboard: {len(cell_paths)} paths in {time_bitboard:.2f}s ({time_reference / time_bitboard:.1f}x faster).")
+    print(f"Same paths in the same order? {reference_paths == bitboard_paths}")
+
+    # The parallel search must give the same paths in the same order, for any number of workers.
+    for max_workers in (1, 4):
+        time_start = time.perf_counter()
+        parallel_paths = list(
+            iter_knight_path_cells_parallel(
+                coord_to_cell("a1"), coord_to_cell("f6"), max_workers=max_workers, max_paths=n_paths
+            )
+        )
+        time_parallel = time.perf_counter() - time_start
+        print(f"Parallel ({max_workers} workers): {len(parallel_paths)} paths in {time_parallel:.2f}s.")
+        print(f"Same paths in the same order? {parallel_paths == cell_paths}")
+
+    # Pipe paths straight into the scorer, without collecting them or touching the database.
+    A, B, C = 1, 3, 2
+    hits = sum(calculate_path_score(GRID, path, A, B, C) == PATH_SUM for path in iter_knight_paths("a1", "f6", n_paths))
+    print(f"{hits} of the first {n_paths} paths from a1 to f6 score {PATH_SUM} with A={A}, B={B}, C={C}.")
+
+    # Pruning dead branches with a flood fill finds the same paths, in fewer nodes.
+    for prune_depths in (range(NUM_CELLS + 1), range(20, NUM_CELLS + 1, 4)):
+        prune_stats = {}
+        time_start = time.perf_counter()
+        pruned_paths = list(
+            itertools.islice(
+                iter_knight_path_cells(
+                    coord_to_cell("a1"), coord_to_cell("f6"), prune_depths=prune_depths, prune_stats=prune_stats
+                ),
+                n_paths,
+            )
+        )
+        time_pruned = time.perf_counter() - time_start
+        pruned_fraction = prune_stats["pruned"] / max(prune_stats["checked"], 1)
+        print(f"Pruning at depths {prune_depths}: {len(pruned_paths)} paths in {time_pruned:.2f}s.")
+        print(f"{prune_stats['pruned']} of {prune_stats['checked']} checked nodes pruned ({pruned_fraction:.1%}).")
+        print(f"Same paths in the same order? {pruned_paths == cell_paths}")
+
+    # Cover every short path exhaustively, shortest first.
+    max_moves = 14
+    time_start = time.perf_counter()
+    n_paths_by_length = collections.Counter(
+        len(cells) - 1
+        for cells in iter_knight_path_cells_by_length(coord_to_cell("a1"), coord_to_cell("f6"), max_moves)
+    )
+    time_short = time.perf_counter() - time_start
+    print(f"All {sum(n_paths_by_length.values())} paths of at most {max_moves} moves in {time_short:.2f}s.")
+    print(f"Paths per number of moves: {dict(n_paths_by_length)}")
@@ -0,0 +1,179 @@
+import argparse
+import math
+import os
+import random
+import tempfile
+import time
+from typing import Optional
+
+from sqlalchemy.orm import sessionmaker
+
+from knight_moves_6.calculation.bitboard import FREE_NEIGHBOURS, NEIGHBOUR_MASKS, cells_to_path, coord_to_cell
+from knight_moves_6.model.database import KnightPath, setup_database
+from knight_moves_6.solver.enumerate_paths import search_knight_path_cells
+from knight_moves_6.solver.generate_paths import knight_path_row
+
+# Two-sided 95% quantile of the normal distribution.
+Z_95 = 1.96
+
+
+def probe_knight_path_tree(start: int, end: int, rng: random.Random) -> tuple[int, int, Optional[int]]:
+    """
+    Walk down the search tree of `find_knight_paths()` along uniformly random moves (Knuth's estimator).
+
+    Every node of the walk stands for the product of the branching factors above it, so that the weights are
+    unbiased estimates of the number of nodes and of paths in the whole tree.
+
+    Args:
+        start (int): Cell index of the starting position.
+        end (int): Cell index of the ending position.
+        rng (random.Random): Random number generator.
+
+    Returns:
+        tuple[int, int, int]: Estimated number of nodes, estimated number of paths (0 if the walk got stuck),
+            and the number of cells of the path found (None if the walk got stuck).
+    """
+    cell = start
+    visited = 1 << start
+    weight = 1
+    n_nodes = 1
+    n_cells = 1
+    while cell != end:
+        options = FREE_NEIGHBOURS[cell][NEIGHBOUR_MASKS[cell] & ~visited]
+        if not options:
+            return n_nodes, 0, None
+        weight *= len(options)
+        n_nodes += weight
+        cell = rng.choice(options)
+        visited |= 1 << cell
+        n_cells += 1
+    return n_nodes, weight, n_cells
+
+
+def _mean_and_interval(total: float, total_squares: float, n: int) -> tuple[float, float, float]:
+    """Mean of `n` samples, and the bounds of its normal 95% confidence interval."""
+    mean = total / n
+    variance = max(total_squares / n - mean * mean, 0.0) * n / max(n - 1, 1)
+    half_width = Z_95 * math.sqrt(variance / n)
+    return mean, max(mean - half_width, 0.0), mean + half_width
+
+
+def estimate_knight_paths(start: str, end: str, n_probes: int = 100000, seed: Optional[int] = None) -> dict:
+    """
+    Estimate the size of the search tree of `find_knight_paths()` from random probes.
+
+    The estimates are unbiased, but heavy-tailed: a few probes along rare long paths carry most of the weight.
+    The confidence intervals assume normality of the mean, and are only trustworthy with enough probes.
+
+    Args:
+        start (str): Starting position in coordinate format, e.g., "a1".
+        end (str): Ending position in coordinate format, e.g., "f6".
+        n_probes (int): Number of random walks.
+        seed (int, optional): Seed of the random number generator.
+
+    Returns:
+        dict: "paths" and "nodes" as (estimate, lower bound, upper bound) of the 95% confidence interval,
+            "lengths" as the estimated number of paths per number of cells, and "n_probes".
+    """
+    rng = random.Random(seed)
+    start_cell, end_cell = coord_to_cell(start), coord_to_cell(end)
+    nodes_sum = nodes_squares = paths_sum = paths_squares = 0
+    lengths = {}
+    for _ in range(n_probes):
+        n_nodes, n_paths, n_cells = probe_knight_path_tree(start_cell, end_cell, rng)
+        nodes_sum += n_nodes
+        nodes_squares += n_nodes * n_nodes
+        if n_cells is not None:
+            paths_sum += n_paths
+            paths_squares += n_paths * n_paths
+            lengths[n_cells] = lengths.get(n_cells, 0) + n_paths
+    return {
+        "paths": _mean_and_interval(paths_sum, paths_squares, n_probes),
+        "nodes": _mean_and_interval(nodes_sum, nodes_squares, n_probes),
+        "lengths": {n_cells: lengths[n_cells] / n_probes for n_cells in sorted(lengths)},
+        "n_probes": n_probes,
+    }
+
+
+def measure_throughput(start: str, end: str, n_paths: int = 20000) -> dict:
+    """
+    Time the search and the storage of the first paths, in the format of `write_knight_paths_to_db()`.
+
+    Paths are written to a temporary database, whose size gives the disk space per path, indices included.
+
+    Args:
+        start (str): Starting position in coordinate format, e.g., "a1".
+        end (str): Ending position in coordinate format, e.g., "f6".
+        n_paths (int): Number of paths to search and store.
+
+    Returns:
+        dict: "search_rate" and "write_rate" in paths per second, and "bytes_per_path".
+    """
+    start_time = time.perf_counter()
+    paths = [
+        cells_to_path(cells)
+        for cells in search_knight_path_cells(coord_to_cell(start), coord_to_cell(end), max_paths=n_paths)
+    ]
+    search_time = time.perf_counter() - start_time
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_name = os.path.join(temp_dir, "estimate.db")
+        engine = setup_database(db_name)
+        session = sessionmaker(bind=engine)()
+        start_time = time.perf_counter()
+        try:
+            for path in paths:
+                session.add(KnightPath(**knight_path_row(path)))
+            session.commit()
+        finally:
+            session.close()
+            engine.dispose()
+        write_time = time.perf_counter() - start_time
+        bytes_per_path = os.path.getsize(db_name) / len(paths)
+
+    return {
+        "search_rate": len(paths) / search_time,
+        "write_rate": len(paths) / write_time,
+        "bytes_per_path": bytes_per_path,
+    }
+
+
+def print_estimate(estimate: dict, throughput: dict) -> None:
+    """Report the estimates and the projected cost of storing every path."""
+    paths, paths_low, paths_high = estimate["paths"]
+    nodes, nodes_low, nodes_high = estimate["nodes"]
+    print(f"Estimates from {estimate['n_probes']} random probes, with 95% confidence intervals:")
+    print(f"  Paths: {paths:.4g} [{paths_low:.4g}, {paths_high:.4g}]")
+    print(f"  Search tree nodes: {nodes:.4g} [{nodes_low:.4g}, {nodes_high:.4g}]")
+
+    print("  Paths per number of cells:")
+    for n_cells, n_paths in estimate["lengths"].items():
+        print(f"    {n_cells:2d}: {n_paths:.3g} ({n_paths / paths:.2%})")
+
+    seconds_per_path = 1 / throughput["search_rate"] + 1 / throughput["write_rate"]
+    print(
+        f"Measured {throughput['search_rate']:.0f} paths/s searched, {throughput['write_rate']:.0f} paths/s stored, "
+        f"{throughput['bytes_per_path']:.0f} bytes per stored path."
+    )
+    for label, n_paths in (("Estimate", paths), ("Lower bound", paths_low), ("Upper bound", paths_high)):
+        print(
+            f"  {label}: {n_paths * seconds_per_path / 3600:.1f} hours and "
+            f"{n_paths * throughput['bytes_per_path'] / 1e9:.1f}GB on a single process."
+        )
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Estimate the number of knight paths, and the cost of storing them.")
+    parser.add_argument("--start", default="a1", help="Starting position, e.g. a1.")
+    parser.add_argument("--end", default="f6", help="Ending position, e.g. f6.")
+    parser.add_argument("--probes", type=int, default=200000, help="Number of random probes.")
+    parser.add_argument("--sample", type=int, default=20000, help="Number of paths stored to measure throughput.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the random probes.")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    estimate = estimate_knight_paths(args.start, args.end, n_probes=args.probes, seed=args.seed)
+    throughput = measure_throughput(args.start, args.end, n_paths=args.sample)
+    print_estimate(estimate, throughput)
+    print(f"Estimated in {time.perf_counter() - start_time:.1f}s.")
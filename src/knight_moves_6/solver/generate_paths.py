@@ -1,10 +1,26 @@
-import warnings
+import contextlib
+import itertools
+import os
+from typing import Iterable, Optional
 
+from knight_moves_6.calculation.bitboard import cell_to_index, cells_to_path, index_to_cell
 from knight_moves_6.calculation.calculate_score import calculate_path_expression
 from knight_moves_6.calculation.constant import GRID, KNIGHT_MOVES
-from knight_moves_6.calculation.coordinate_map import coord_to_index, index_to_coord, path_to_string
+from knight_moves_6.calculation.coordinate_map import (
+    coord_to_index,
+    index_to_coord,
+    path_to_string,
+    reflect_coord,
+    reflect_path,
+)
+from knight_moves_6.calculation.polynomial import expression_polynomial_hash
 from knight_moves_6.calculation.validation import is_valid_move
-from knight_moves_6.model.database import KnightPath, Session
+from knight_moves_6.model.database import KnightPath, Session, check_knight_path_allows_null_path, engine
+from knight_moves_6.solver.checkpoint import load_checkpoint, save_checkpoint
+from knight_moves_6.solver.enumerate_paths import iter_knight_paths_by_length, search_knight_path_cells
+from knight_moves_6.solver.path_rank import rank_path
+from knight_moves_6.solver.path_writer import BackgroundPathWriter
+from knight_moves_6.solver.search_stats import SearchStats
 
 
 def find_knight_paths(
@@ -48,85 +64,425 @@ def find_knight_paths(
             visited.remove((new_row, new_col))
 
 
-def write_knight_paths_to_db(knight_paths: list[str]):
+def find_knight_paths_bitboard(
+    start: tuple[int, int],
+    end: tuple[int, int],
+    all_paths: list[list[str]],
+    counter: list[int],
+    batch_size: int = 200000,
+    max_workers: int = 1,
+    max_paths: Optional[int] = 20000000,
+    checkpoint_file: Optional[str] = None,
+    resume_after: Optional[tuple[int, ...]] = None,
+    with_mirror: bool = False,
+    store_ranks: bool = False,
+    search_stats: Optional[SearchStats] = None,
+    backend: Optional[str] = None,
+) -> None:
+    """
+    Find all valid paths from start to end without overlapping, using the iterative bitboard search.
+
+    Same behaviour as `find_knight_paths()`, but paths are only converted to coordinates when they are collected.
+    With `max_workers > 1`, the search tree is split by prefixes and searched in a process pool,
+    which finds the same paths in the same order.
+
+    Every batch written to the database is followed by a checkpoint of the search frontier,
+    so that an interrupted search resumes with `resume_after` without storing any path twice.
+
+    With `with_mirror`, the reflection of every path across the horizontal axis is stored in the same batch,
+    e.g. a search from a1 to f6 also stores the paths from a6 to f1.
+
+    Args:
+        start (tuple of int): Starting position as (row, col).
+        end (tuple of int): Ending position as (row, col).
+        all_paths (list of list of str): Buffer of paths not yet written to the database.
+        counter (list of int): `counter[0]` is the number of paths written to the database.
+        batch_size (int): Number of paths written to the database at once.
+        max_workers (int): Number of processes searching in parallel.
+        max_paths (int, optional): Budget of paths to find in this run. None to search the whole tree.
+        checkpoint_file (str, optional): JSON file to write the checkpoints to.
+        resume_after (tuple of int, optional): Last path found by a previous run, as cell indices.
+        with_mirror (bool): Also store the reflection of every path. `counter` only counts the paths searched.
+        store_ranks (bool): Store the rank of every path instead of its positions.
+        search_stats (SearchStats, optional): Instrument the search, and time the writes. Default: no instrumentation.
+        backend (str, optional): Run the serial search compiled with "numba", or in "python".
+            Defaults to Numba when it is installed, see `resolve_backend()`.
+    """
+    if store_ranks:
+        check_knight_path_allows_null_path(engine)
+    start_cell, end_cell = index_to_cell(*start), index_to_cell(*end)
+    path_cells = search_knight_path_cells(
+        start_cell,
+        end_cell,
+        max_workers=max_workers,
+        max_paths=max_paths,
+        resume_after=resume_after,
+        search_stats=search_stats,
+        backend=backend,
+    )
+    if search_stats is not None:
+        search_stats.start()
+
+    n_paths = 0
+    last_cells = resume_after
+    for cells in path_cells:
+        all_paths.append(cells_to_path(cells))
+        last_cells = cells
+        n_paths += 1
+        if len(all_paths) % batch_size == 0:
+            counter[0] += len(all_paths)
+            print(f"{batch_size}x paths identified! Total: {counter[0]} Current: {path_to_string(all_paths[-1])}")
+            # Write paths to DB already and clear memory.
+            with search_stats.writing() if search_stats else contextlib.nullcontext():
+                write_knight_paths_to_db(
+                    all_paths + [reflect_path(path) for path in all_paths] if with_mirror else all_paths,
+                    store_ranks=store_ranks,
+                )
+            all_paths.clear()
+            if search_stats is not None:
+                search_stats.record_batch()
+            if checkpoint_file:
+                save_checkpoint(
+                    checkpoint_file,
+                    start_cell,
+                    end_cell,
+                    last_cells,
+                    counter[0],
+                    False,
+                    with_mirror=with_mirror,
+                    store_ranks=store_ranks,
+                )
+
+    # Write the last partial batch. The search is complete if it stopped before using up the budget.
+    counter[0] += len(all_paths)
+    with search_stats.writing() if search_stats else contextlib.nullcontext():
+        write_knight_paths_to_db(
+            all_paths + [reflect_path(path) for path in all_paths] if with_mirror else all_paths,
+            store_ranks=store_ranks,
+        )
+    all_paths.clear()
+    if checkpoint_file:
+        complete = max_paths is None or n_paths < max_paths
+        save_checkpoint(
+            checkpoint_file,
+            start_cell,
+            end_cell,
+            last_cells,
+            counter[0],
+            complete,
+            with_mirror=with_mirror,
+            store_ranks=store_ranks,
+        )
+    if search_stats is not None:
+        search_stats.finish()
+
+
+def find_knight_paths_background(
+    start: tuple[int, int],
+    end: tuple[int, int],
+    counter: list[int],
+    batch_size: int = 200000,
+    commit_size: int = 200000,
+    max_chunks: int = 4,
+    max_workers: int = 1,
+    max_paths: Optional[int] = 20000000,
+    checkpoint_file: Optional[str] = None,
+    resume_after: Optional[tuple[int, ...]] = None,
+    with_mirror: bool = False,
+    store_ranks: bool = False,
+    search_stats: Optional[SearchStats] = None,
+) -> None:
+    """
+    Same as `find_knight_paths_bitboard()`, but the paths are stored by a `BackgroundPathWriter` process.
+
+    The search only packs every path into bytes and queues it in chunks of `batch_size`, so that it never waits
+    for SQLite unless `max_chunks` chunks are already waiting. Checkpoints are saved by the writer, once the paths
+    before them are committed.
+
+    Args:
+        start (tuple of int): Starting position as (row, col).
+        end (tuple of int): Ending position as (row, col).
+        counter (list of int): `counter[0]` is the number of paths queued for the database.
+        batch_size (int): Number of paths queued at once.
+        commit_size (int): Minimum number of rows per commit of the writer.
+        max_chunks (int): Number of queued chunks after which the search waits for the writer.
+        max_workers (int): Number of processes searching in parallel.
+        max_paths (int, optional): Budget of paths to find in this run. None to search the whole tree.
+        checkpoint_file (str, optional): JSON file to write the checkpoints to.
+        resume_after (tuple of int, optional): Last path found by a previous run, as cell indices.
+        with_mirror (bool): Also store the reflection of every path. `counter` only counts the paths searched.
+        store_ranks (bool): Store the rank of every path instead of its positions.
+        search_stats (SearchStats, optional): Instrument the search, and time the writes. Default: no instrumentation.
+    """
+    if store_ranks:
+        check_knight_path_allows_null_path(engine)
+    start_cell, end_cell = index_to_cell(*start), index_to_cell(*end)
+    path_cells = search_knight_path_cells(
+        start_cell,
+        end_cell,
+        max_workers=max_workers,
+        max_paths=max_paths,
+        resume_after=resume_after,
+        search_stats=search_stats,
+    )
+    if search_stats is not None:
+        search_stats.start()
+
+    def checkpoint(last_cells: Optional[tuple[int, ...]], complete: bool) -> Optional[dict]:
+        """Arguments of `save_checkpoint()` after the paths queued so far."""
+        if not checkpoint_file:
+            return None
+        return {
+            "checkpoint_file": checkpoint_file,
+            "start": start_cell,
+            "end": end_cell,
+            "last_path": last_cells,
+            "n_paths": counter[0],
+            "complete": complete,
+            "with_mirror": with_mirror,
+            "store_ranks": store_ranks,
+        }
 
-    # Store paths in the database.
+    n_paths = 0
+    last_cells = resume_after
+    records = []
+    with BackgroundPathWriter(
+        commit_size=commit_size, max_chunks=max_chunks, with_mirror=with_mirror, store_ranks=store_ranks
+    ) as writer:
+        for cells in path_cells:
+            records.append(bytes(cells))
+            last_cells = cells
+            n_paths += 1
+            if len(records) == batch_size:
+                counter[0] += len(records)
+                current = path_to_string(cells_to_path(cells))
+                print(f"{batch_size}x paths identified! Total: {counter[0]} Current: {current}")
+                # Only the time spent waiting for room in the queue counts as writing.
+                with search_stats.writing() if search_stats else contextlib.nullcontext():
+                    writer.write(records, checkpoint(last_cells, False))
+                records = []
+                if search_stats is not None:
+                    search_stats.record_batch()
+
+        # Queue the last partial chunk. The search is complete if it stopped before using up the budget.
+        counter[0] += len(records)
+        # So does the time spent waiting for the writer to store the queued paths.
+        with search_stats.writing() if search_stats else contextlib.nullcontext():
+            writer.write(records, checkpoint(last_cells, max_paths is None or n_paths < max_paths))
+            writer.close()
+    if search_stats is not None:
+        search_stats.finish()
+
+
+def knight_path_row(path: list[str], store_ranks: bool = False) -> dict:
+    """
+    KnightPath row of a path, as stored by `write_knight_paths_to_db()`.
+
+    Args:
+        path (list of str): Path in coordinate format.
+        store_ranks (bool): Store the rank of the path instead of its positions.
+
+    Returns:
+        dict: Row with keys "start", "path" or "rank", "expression" and "polynomial_hash".
+    """
+    expression = calculate_path_expression(GRID, path)
+    row = {"start": path[0], "expression": expression, "polynomial_hash": expression_polynomial_hash(expression)}
+    if store_ranks:
+        row["rank"] = rank_path(path)
+    else:
+        row["path"] = path_to_string(path)
+    return row
+
+
+def write_knight_paths_to_db(knight_paths: Iterable[list[str]], store_ranks: bool = False):
+
+    # Store paths in the database, either as strings or as ranks.
     session = Session()
     expressions = []
     try:
         for path in knight_paths:
-            expression = calculate_path_expression(GRID, path)
-            # print(path_to_string(path), expression)
-            path_entry = KnightPath(start=path[0], path=path_to_string(path), expression=expression)
-            expressions.append(expression)
-            session.add(path_entry)
+            row = knight_path_row(path, store_ranks=store_ranks)
+            expressions.append(row["expression"])
+            session.add(KnightPath(**row))
         session.commit()
     finally:
         session.close()
 
 
-def generate_and_store_paths_a1() -> list[list[str]]:
-    """Generate and store all corner-to-corner a1-f6 knight paths."""
+def write_knight_paths_in_batches(
+    knight_paths: Iterable[list[str]], batch_size: int = 200000, store_ranks: bool = False
+) -> int:
+    """
+    Consume any iterable of paths, e.g. `iter_knight_paths()`, and store it in batches.
+
+    Args:
+        knight_paths (iterable of list of str): Paths in coordinate format.
+        batch_size (int): Number of paths written to the database at once.
+        store_ranks (bool): Store the rank of every path instead of its positions.
+
+    Returns:
+        int: Number of paths stored.
+    """
+    if store_ranks:
+        check_knight_path_allows_null_path(engine)
+    knight_paths = iter(knight_paths)
+    n_paths = 0
+    while True:
+        batch = list(itertools.islice(knight_paths, batch_size))
+        if not batch:
+            return n_paths
+        write_knight_paths_to_db(batch, store_ranks=store_ranks)
+        n_paths += len(batch)
+
+
+def generate_and_store_paths(
+    start: str,
+    end: str,
+    max_workers: int = 1,
+    max_paths: Optional[int] = 20000000,
+    checkpoint_file: Optional[str] = None,
+    with_mirror: bool = False,
+    store_ranks: bool = False,
+    background_writer: bool = False,
+    stats_file: Optional[str] = None,
+) -> int:
+    """
+    Generate and store corner-to-corner knight paths, resuming from the checkpoint file if it exists.
+
+    Reflecting the grid across the horizontal axis maps a1 <-> a6 and f6 <-> f1, so every a6-f1 path is
+    the reflection of an a1-f6 path. With `with_mirror`, a single search stores the paths for both corner pairs.
 
-    # Define start and end points for both required paths.
-    a1_f6_start = coord_to_index("a1")
-    a1_f6_end = coord_to_index("f6")
-    a6_f1_start = coord_to_index("a6")
-    a6_f1_end = coord_to_index("f1")
+    Args:
+        start (str): Starting position in coordinate format, e.g., "a1".
+        end (str): Ending position in coordinate format, e.g., "f6".
+        max_workers (int): Number of processes searching in parallel.
+        max_paths (int, optional): Budget of paths to find in this run. None to search the whole tree.
+        checkpoint_file (str, optional): JSON checkpoint file. Default: "knight-paths-{start}-{end}.checkpoint.json".
+        with_mirror (bool): Also store the reflection of every path, i.e. the paths between the other two corners.
+        store_ranks (bool): Store the rank of every path instead of its positions, see `path_rank.py`.
+        background_writer (bool): Store the paths in a separate process, see `find_knight_paths_background()`.
+        stats_file (str, optional): Instrument the search, and write JSON snapshots of `SearchStats` to this file.
+
+    Returns:
+        int: Total number of paths searched, including previous runs. Doubled in storage `with_mirror`.
+    """
+    if checkpoint_file is None:
+        checkpoint_file = f"knight-paths-{start}-{end}.checkpoint.json"
+    if os.path.exists(checkpoint_file):
+        return resume_and_store_paths(
+            checkpoint_file,
+            max_workers=max_workers,
+            max_paths=max_paths,
+            background_writer=background_writer,
+            stats_file=stats_file,
+        )
 
-    all_paths = []
+    print(f"Searching for paths from {start} to {end}, with a budget of {max_paths} paths.")
+    if with_mirror:
+        print(f"Also storing their reflections, from {reflect_coord(start)} to {reflect_coord(end)}.")
     counter = [0]
+    search_kwargs = {
+        "start": coord_to_index(start),
+        "end": coord_to_index(end),
+        "counter": counter,
+        "max_workers": max_workers,
+        "max_paths": max_paths,
+        "checkpoint_file": checkpoint_file,
+        "with_mirror": with_mirror,
+        "store_ranks": store_ranks,
+        "search_stats": SearchStats(snapshot_file=stats_file) if stats_file else None,
+    }
+    if background_writer:
+        find_knight_paths_background(**search_kwargs)
+    else:
+        find_knight_paths_bitboard(all_paths=[], **search_kwargs)
+    print(f"Stored {counter[0]} paths.")
+    return counter[0]
 
-    # Find paths from a1 to f6.
-    warnings.warn("`find_knight_paths()` is hardcoded to return only the first 20M paths.")
-    find_knight_paths(
-        start=a1_f6_start,
-        end=a1_f6_end,
-        visited={a1_f6_start},
-        path=[index_to_coord(*a1_f6_start)],
-        all_paths=all_paths,
-        counter=counter,
-    )
 
-    print(f"Identified {len(all_paths)} paths.")
+def resume_and_store_paths(
+    checkpoint_file: str,
+    max_workers: int = 1,
+    max_paths: Optional[int] = 20000000,
+    background_writer: bool = False,
+    stats_file: Optional[str] = None,
+) -> int:
+    """
+    Continue a path search exactly where the checkpoint left off, and store the new paths.
+
+    Args:
+        checkpoint_file (str): JSON checkpoint file written by a previous run.
+        max_workers (int): Number of processes searching in parallel.
+        max_paths (int, optional): Budget of new paths to find in this run. None to search the rest of the tree.
+        background_writer (bool): Store the paths in a separate process, see `find_knight_paths_background()`.
+        stats_file (str, optional): Instrument the search, and write JSON snapshots of `SearchStats` to this file.
+
+    Returns:
+        int: Total number of paths stored, including previous runs.
+    """
+    checkpoint = load_checkpoint(checkpoint_file)
+    if checkpoint["complete"]:
+        print(f"All {checkpoint['n_paths']} paths are already stored.")
+        return checkpoint["n_paths"]
 
-    write_knight_paths_to_db(all_paths)
+    print(f"Resuming after {checkpoint['n_paths']} paths, with a budget of {max_paths} paths.")
+    counter = [checkpoint["n_paths"]]
+    search_kwargs = {
+        "start": cell_to_index(checkpoint["start"]),
+        "end": cell_to_index(checkpoint["end"]),
+        "counter": counter,
+        "max_workers": max_workers,
+        "max_paths": max_paths,
+        "checkpoint_file": checkpoint_file,
+        "resume_after": checkpoint["last_path"],
+        "with_mirror": checkpoint["with_mirror"],
+        "store_ranks": checkpoint["store_ranks"],
+        "search_stats": SearchStats(snapshot_file=stats_file) if stats_file else None,
+    }
+    if background_writer:
+        find_knight_paths_background(**search_kwargs)
+    else:
+        find_knight_paths_bitboard(all_paths=[], **search_kwargs)
+    print(f"Stored {counter[0]} paths.")
+    return counter[0]
 
-    # print(f"Identified {len(set(all_paths))} unique paths.")
-    # print(f"Identified {len(set(expressions))} unique expressions.")
-    return all_paths
 
+def generate_and_store_paths_a1(
+    max_workers: int = 1, max_paths: Optional[int] = 20000000, with_mirror: bool = False
+) -> int:
+    """
+    Generate and store corner-to-corner a1-f6 knight paths, using `max_workers` processes.
 
-def generate_and_store_paths_a6() -> list[list[str]]:
-    """Generate and store all corner-to-corner a6-f1 knight paths."""
+    With `with_mirror`, their reflections are stored as the a6-f1 paths, and `generate_and_store_paths_a6()`
+    no longer needs to run.
+    """
+    return generate_and_store_paths("a1", "f6", max_workers=max_workers, max_paths=max_paths, with_mirror=with_mirror)
 
-    # Define start and end points for both required paths.
-    a1_f6_start = coord_to_index("a1")
-    a1_f6_end = coord_to_index("f6")
-    a6_f1_start = coord_to_index("a6")
-    a6_f1_end = coord_to_index("f1")
 
-    all_paths = []
-    counter = [0]
+def generate_and_store_paths_a6(max_workers: int = 1, max_paths: Optional[int] = 20000000) -> int:
+    """Generate and store corner-to-corner a6-f1 knight paths, using `max_workers` processes."""
+    return generate_and_store_paths("a6", "f1", max_workers=max_workers, max_paths=max_paths)
 
-    # Find paths from a6 to f1.
-    warnings.warn("`find_knight_paths()` is hardcoded to return only the first 20M paths.")
-    find_knight_paths(
-        start=a6_f1_start,
-        end=a6_f1_end,
-        visited={a6_f1_start},
-        path=[index_to_coord(*a6_f1_start)],
-        all_paths=all_paths,
-        counter=counter,
-    )
 
-    print(f"Identified {len(all_paths)} paths.")
+def generate_and_store_short_paths(start: str, end: str, max_moves: int, min_moves: int = 0) -> int:
+    """
+    Store every path from start to end with `min_moves` to `max_moves` moves, shortest first.
+
+    Short paths have few multiplications, and are the most likely to score 2024 with a small A+B+C.
 
-    write_knight_paths_to_db(all_paths)
+    Args:
+        start (str): Starting position in coordinate format, e.g., "a1".
+        end (str): Ending position in coordinate format, e.g., "f6".
+        max_moves (int): Maximum number of moves of the paths.
+        min_moves (int): Minimum number of moves of the paths.
 
-    # print(f"Identified {len(set(all_paths))} unique paths.")
-    # print(f"Identified {len(set(expressions))} unique expressions.")
-    return all_paths
+    Returns:
+        int: Number of paths stored.
+    """
+    print(f"Storing all paths from {start} to {end} with {min_moves} to {max_moves} moves.")
+    n_paths = write_knight_paths_in_batches(iter_knight_paths_by_length(start, end, max_moves, min_moves))
+    print(f"Stored {n_paths} paths.")
+    return n_paths
 
 
 # Check results
@@ -141,10 +497,10 @@ def read_paths():
 if __name__ == "__main__":
 
     # Run the path generation and storage process
-    # all_paths = generate_and_store_paths_a1()
-    # print(f"Identified {len(all_paths)} paths.")
-    # all_paths = generate_and_store_paths_a6()
-    # print(f"Identified {len(all_paths)} paths.")
+    # n_paths = generate_and_store_paths_a1()
+    # print(f"Stored {n_paths} paths.")
+    # n_paths = generate_and_store_paths_a6()
+    # print(f"Stored {n_paths} paths.")
 
     # Uncomment to test read_paths
     # read_paths()
@@ -1,10 +1,13 @@
+import os
+
 from knight_moves_6.solver.generate_paths import generate_and_store_paths_a6
 
 if __name__ == "__main__":
 
-    # Run the path generation and storage process
-    all_paths = generate_and_store_paths_a6()
-    print(f"Identified {len(all_paths)} paths.")
+    # Run the path generation and storage process, on all cores.
+    # Running this again extends the stored paths by another budget of `max_paths`, from where the last run stopped.
+    n_paths = generate_and_store_paths_a6(max_workers=os.cpu_count(), max_paths=20000000)
+    print(f"Stored {n_paths} paths.")
 
     # Uncomment to test read_paths
     # read_paths()
@@ -0,0 +1,223 @@
+import itertools
+import os
+from typing import Iterable, Optional
+
+from knight_moves_6.calculation.bitboard import (
+    REFLECTED_SYMBOL_TABLE,
+    SYMBOL_TABLE,
+    cells_to_path,
+    index_to_cell,
+)
+from knight_moves_6.calculation.calculate_score import calculate_signature_expression
+from knight_moves_6.calculation.coordinate_map import coord_to_index, path_to_string, reflect_coord, reflect_path
+from knight_moves_6.model.database import Session
+from knight_moves_6.model.operations import upsert_path_signatures
+from knight_moves_6.solver.checkpoint import load_checkpoint, save_checkpoint
+from knight_moves_6.solver.enumerate_paths import search_knight_path_cells
+
+
+def collect_path_signatures(
+    path_cells: Iterable[tuple[int, ...]],
+    signatures: dict[bytes, list],
+    reflected_signatures: Optional[dict[bytes, list]] = None,
+) -> tuple[int, Optional[tuple[int, ...]]]:
+    """
+    Count the paths per signature, i.e. per sequence of grid symbols, and keep the first path of each signature.
+
+    The score of a path only depends on its signature, so the signatures are all the solver needs to evaluate.
+
+    Args:
+        path_cells (iterable of tuple of int): Paths as cell indices.
+        signatures (dict): Maps each signature, as ASCII bytes, to `[path_count, first_path_cells]`. Updated in place.
+        reflected_signatures (dict, optional): Same as `signatures` for the reflections of the paths.
+
+    Returns:
+        tuple[int, tuple of int]: Number of paths consumed, and the last of them (None if there were no paths).
+    """
+    n_paths = 0
+    cells = None
+    for cells in path_cells:
+        n_paths += 1
+        # Bytes keys avoid decoding millions of signatures that are already known.
+        cells_bytes = bytes(cells)
+        signature = cells_bytes.translate(SYMBOL_TABLE)
+        entry = signatures.get(signature)
+        if entry is None:
+            signatures[signature] = [1, cells]
+        else:
+            entry[0] += 1
+        if reflected_signatures is not None:
+            signature = cells_bytes.translate(REFLECTED_SYMBOL_TABLE)
+            entry = reflected_signatures.get(signature)
+            if entry is None:
+                reflected_signatures[signature] = [1, cells]
+            else:
+                entry[0] += 1
+    return n_paths, cells
+
+
+def write_path_signatures_to_db(start: str, signatures: dict[bytes, list], reflected: bool = False) -> None:
+    """
+    Store signatures collected by `collect_path_signatures()`, adding their path counts to the stored ones.
+
+    Args:
+        start (str): Starting position of the paths searched, e.g. "a1".
+        signatures (dict): Maps each signature to `[path_count, first_path_cells]`.
+        reflected (bool): Whether the signatures are those of the reflected paths.
+    """
+    path_signatures = []
+    for signature, (path_count, cells) in signatures.items():
+        path = cells_to_path(cells)
+        if reflected:
+            path = reflect_path(path)
+        signature = signature.decode()
+        path_signatures.append(
+            {
+                "start": path[0],
+                "signature": signature,
+                "expression": calculate_signature_expression(signature),
+                "path_count": path_count,
+                "path": path_to_string(path),
+            }
+        )
+    session = Session()
+    try:
+        upsert_path_signatures(session, path_signatures)
+    finally:
+        session.close()
+
+
+def find_path_signatures(
+    start: tuple[int, int],
+    end: tuple[int, int],
+    counter: list[int],
+    flush_size: int = 10000000,
+    max_workers: int = 1,
+    max_paths: Optional[int] = None,
+    checkpoint_file: Optional[str] = None,
+    resume_after: Optional[tuple[int, ...]] = None,
+    with_mirror: bool = False,
+) -> None:
+    """
+    Search the paths from start to end, and store their distinct signatures instead of the paths themselves.
+
+    Signatures are written to the database every `flush_size` paths, followed by a checkpoint of the search frontier,
+    so that an interrupted search resumes with `resume_after` without counting any path twice.
+
+    Args:
+        start (tuple of int): Starting position as (row, col).
+        end (tuple of int): Ending position as (row, col).
+        counter (list of int): `counter[0]` is the number of paths counted in the database.
+        flush_size (int): Number of paths searched between two writes to the database.
+        max_workers (int): Number of processes searching in parallel.
+        max_paths (int, optional): Budget of paths to find in this run. None to search the whole tree.
+        checkpoint_file (str, optional): JSON file to write the checkpoints to.
+        resume_after (tuple of int, optional): Last path found by a previous run, as cell indices.
+        with_mirror (bool): Also store the signatures of the reflected paths, i.e. from the other starting corner.
+    """
+    start_cell, end_cell = index_to_cell(*start), index_to_cell(*end)
+    start_coord = cells_to_path((start_cell,))[0]
+    path_cells = iter(
+        search_knight_path_cells(
+            start_cell, end_cell, max_workers=max_workers, max_paths=max_paths, resume_after=resume_after
+        )
+    )
+
+    n_paths = 0
+    last_cells = resume_after
+    while True:
+        signatures = {}
+        reflected_signatures = {} if with_mirror else None
+        n_batch, batch_last_cells = collect_path_signatures(
+            itertools.islice(path_cells, flush_size), signatures, reflected_signatures
+        )
+        if not n_batch:
+            break
+        n_paths += n_batch
+        counter[0] += n_batch
+        last_cells = batch_last_cells
+
+        write_path_signatures_to_db(start_coord, signatures)
+        if with_mirror:
+            write_path_signatures_to_db(start_coord, reflected_signatures, reflected=True)
+        print(f"{counter[0]} paths searched, {len(signatures)} distinct signatures in the last batch.")
+        if checkpoint_file:
+            save_checkpoint(
+                checkpoint_file, start_cell, end_cell, last_cells, counter[0], False, with_mirror=with_mirror
+            )
+
+    # The search is complete if it stopped before using up the budget.
+    if checkpoint_file:
+        complete = max_paths is None or n_paths < max_paths
+        save_checkpoint(
+            checkpoint_file, start_cell, end_cell, last_cells, counter[0], complete, with_mirror=with_mirror
+        )
+
+
+def generate_and_store_signatures(
+    start: str,
+    end: str,
+    max_workers: int = 1,
+    max_paths: Optional[int] = None,
+    checkpoint_file: Optional[str] = None,
+    with_mirror: bool = False,
+) -> int:
+    """
+    Generate corner-to-corner knight paths and store their distinct signatures, with a path count and an example path.
+
+    Nothing is written to `knight_paths`. Resumes from the checkpoint file if it exists.
+
+    Args:
+        start (str): Starting position in coordinate format, e.g., "a1".
+        end (str): Ending position in coordinate format, e.g., "f6".
+        max_workers (int): Number of processes searching in parallel.
+        max_paths (int, optional): Budget of paths to find in this run. None to search the whole tree.
+        checkpoint_file (str, optional): JSON checkpoint file. Default: "knight-signatures-{start}-{end}.checkpoint.json".
+        with_mirror (bool): Also store the signatures of the reflected paths, i.e. between the other two corners.
+
+    Returns:
+        int: Total number of paths searched, including previous runs.
+    """
+    if checkpoint_file is None:
+        checkpoint_file = f"knight-signatures-{start}-{end}.checkpoint.json"
+    resume_after = None
+    counter = [0]
+    if os.path.exists(checkpoint_file):
+        checkpoint = load_checkpoint(checkpoint_file)
+        if checkpoint["complete"]:
+            print(f"The signatures of all {checkpoint['n_paths']} paths are already stored.")
+            return checkpoint["n_paths"]
+        print(f"Resuming after {checkpoint['n_paths']} paths.")
+        start, end = cells_to_path((checkpoint["start"], checkpoint["end"]))
+        resume_after = checkpoint["last_path"]
+        counter[0] = checkpoint["n_paths"]
+        with_mirror = checkpoint["with_mirror"]
+
+    print(f"Searching for path signatures from {start} to {end}, with a budget of {max_paths} paths.")
+    if with_mirror:
+        print(f"Also storing their reflections, from {reflect_coord(start)} to {reflect_coord(end)}.")
+    find_path_signatures(
+        start=coord_to_index(start),
+        end=coord_to_index(end),
+        counter=counter,
+        max_workers=max_workers,
+        max_paths=max_paths,
+        checkpoint_file=checkpoint_file,
+        resume_after=resume_after,
+        with_mirror=with_mirror,
+    )
+    print(f"Stored the signatures of {counter[0]} paths.")
+    return counter[0]
+
+
+if __name__ == "__main__":
+
+    from knight_moves_6.calculation.bitboard import coord_to_cell
+
+    # Count the signatures of the first paths from a1 to f6, without touching the database.
+    signatures = {}
+    path_cells = search_knight_path_cells(coord_to_cell("a1"), coord_to_cell("f6"), max_paths=1000000)
+    n_paths, _ = collect_path_signatures(path_cells, signatures)
+    print(f"{n_paths} paths have {len(signatures)} distinct signatures.")
+    for signature, (path_count, cells) in sorted(signatures.items(), key=lambda item: -item[1][0])[:5]:
+        print(f"{path_count} paths like {path_to_string(cells_to_path(cells))}: {signature.decode()}")
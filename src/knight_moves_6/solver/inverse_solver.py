@@ -0,0 +1,159 @@
+# Solve for A, B, C per expression, instead of scoring every expression for every A, B, C.
+# A score is built from + and * of positive values only, so it never decreases when A, B or C grows.
+# For fixed A and B, the values of C that hit the target are therefore found by bisection, and the loops over A and B
+# stop as soon as even the smallest remaining values overshoot the target.
+import functools
+from typing import Optional
+
+from knight_moves_6.calculation.constant import MAX_SUM, PATH_SUM
+from knight_moves_6.calculation.polynomial import (
+    PolynomialTerms,
+    canonical_polynomial,
+    evaluate_polynomial,
+    expression_to_polynomial,
+    monomial_powers,
+)
+from knight_moves_6.model.database import Session
+from knight_moves_6.model.model_abc import ABCCombination
+from knight_moves_6.model.operations import (
+    get_distinct_polynomials,
+    get_knight_path_ids_by_polynomial,
+    hash_knight_path_polynomials,
+)
+from knight_moves_6.solver.solver import insert_unique_path_scores
+
+
+@functools.lru_cache(maxsize=None)
+def _value_powers(max_value: int) -> list[list[int]]:
+    """Powers of every value from 0 to `max_value`, from `monomial_powers()`, indexed by value then exponent."""
+    return [monomial_powers(value, value, value)[0] for value in range(max_value + 1)]
+
+
+def solve_polynomial(
+    terms: PolynomialTerms, target: int = PATH_SUM, max_sum: int = MAX_SUM, stats: Optional[dict[str, int]] = None
+) -> list[tuple[int, int, int]]:
+    """
+    List every (A, B, C) of distinct positive integers with `A + B + C <= max_sum` for which a polynomial scores
+    `target`.
+
+    Args:
+        terms (PolynomialTerms): Canonical form of the polynomial, from `canonical_polynomial()`.
+        target (int): Score to hit.
+        max_sum (int): Maximum allowed sum of `A + B + C`.
+        stats (dict, optional): Receives the number of "evaluations" of the polynomial.
+
+    Returns:
+        list[tuple[int, int, int]]: Solutions, by increasing A, then B, then C.
+    """
+    n_evaluations = 0
+    powers = _value_powers(max_sum)
+
+    def evaluate(A: int, B: int, C: int) -> int:
+        nonlocal n_evaluations
+        n_evaluations += 1
+        return evaluate_polynomial(terms, (powers[A], powers[B], powers[C]))
+
+    solutions = []
+    for A in range(1, max_sum - 1):
+        # Lower bound of every score with this A. B and C need not be distinct for a bound.
+        if evaluate(A, 1, 1) > target:
+            break
+        for B in range(1, max_sum - A):
+            max_c = max_sum - A - B
+            if evaluate(A, B, 1) > target:
+                break
+            # Smallest C whose score reaches the target.
+            low, high = 1, max_c + 1
+            while low < high:
+                middle = (low + high) // 2
+                if evaluate(A, B, middle) < target:
+                    low = middle + 1
+                else:
+                    high = middle
+            # Several values of C only hit the target if the polynomial does not depend on C.
+            for C in range(low, max_c + 1):
+                if evaluate(A, B, C) != target:
+                    break
+                if A != B and B != C and C != A:
+                    solutions.append((A, B, C))
+
+    if stats is not None:
+        stats["evaluations"] = stats.get("evaluations", 0) + n_evaluations
+    return solutions
+
+
+def solve_expression(expression: str, target: int = PATH_SUM, max_sum: int = MAX_SUM) -> list[tuple[int, int, int]]:
+    """
+    List every (A, B, C) for which an expression of `calculate_path_expression()` scores `target`.
+
+    Args:
+        expression (str): f-string representing the sequence of mathematical operations.
+        target (int): Score to hit.
+        max_sum (int): Maximum allowed sum of `A + B + C`.
+
+    Returns:
+        list[tuple[int, int, int]]: Solutions, by increasing A, then B, then C.
+    """
+    return solve_polynomial(canonical_polynomial(expression_to_polynomial(expression)), target, max_sum)
+
+
+def inverse_solver(session: Session, target: int = PATH_SUM, max_sum: int = MAX_SUM) -> int:
+    """
+    Fill `PathScore` by solving every distinct polynomial of the stored paths for A, B, C.
+
+    Replaces the loop of `solver()` over ABC combinations and paths with a loop over polynomials.
+    The paths stored before `polynomial_hash` existed are hashed first, with `hash_knight_path_polynomials()`.
+    Only the solutions present in the ABCCombination table are stored, and all its combinations up to `max_sum`
+    are marked as evaluated.
+
+    Args:
+        session (Session): SQLAlchemy session to interact with the database.
+        target (int): Score to hit.
+        max_sum (int): Maximum allowed sum of `A + B + C`.
+
+    Returns:
+        int: Number of path scores found.
+    """
+    combination_ids = {
+        (combination.A, combination.B, combination.C): combination.id
+        for combination in session.query(ABCCombination).filter(ABCCombination.sum_abc <= max_sum)
+    }
+    hash_knight_path_polynomials(session)
+    polynomials = get_distinct_polynomials(session)
+    print(f"Solving {len(polynomials)} distinct polynomials for A, B, C.")
+
+    stats = {}
+    path_scores = []
+    for polynomial_hash, expression in polynomials:
+        terms = canonical_polynomial(expression_to_polynomial(expression))
+        abc_ids = [
+            combination_ids[abc] for abc in solve_polynomial(terms, target, max_sum, stats) if abc in combination_ids
+        ]
+        if not abc_ids:
+            continue
+        knight_path_ids = get_knight_path_ids_by_polynomial(session, [polynomial_hash])
+        path_scores.extend(
+            {"abc_combination_id": abc_id, "knight_path_id": knight_path_id, "score": target}
+            for abc_id in abc_ids
+            for knight_path_id in knight_path_ids
+        )
+    print(f"{stats.get('evaluations', 0)} evaluations, {len(path_scores)} valid paths detected!")
+
+    if path_scores:
+        insert_unique_path_scores(session, path_scores)
+    session.query(ABCCombination).filter(ABCCombination.sum_abc <= max_sum).update({ABCCombination.evaluated: True})
+    session.commit()
+    return len(path_scores)
+
+
+if __name__ == "__main__":
+    from knight_moves_6.calculation.calculate_score import calculate_path_expression
+    from knight_moves_6.calculation.constant import GRID, MY_SOLUTION
+    from knight_moves_6.calculation.coordinate_map import solution_string_to_coordinate_list
+
+    _, _, _, path1, path2 = solution_string_to_coordinate_list(MY_SOLUTION)
+    for path in (path1, path2):
+        expression = calculate_path_expression(GRID, path)
+        stats = {}
+        solutions = solve_polynomial(canonical_polynomial(expression_to_polynomial(expression)), stats=stats)
+        print(f"{','.join(path)} scores 2024 for {solutions}, after {stats['evaluations']} evaluations.")
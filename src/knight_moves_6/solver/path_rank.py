@@ -0,0 +1,86 @@
+# Rank and unrank corner-to-corner knight paths, so that a path can be stored as a single integer.
+# Ranks follow the order of the paths in the ZDD of `path_zdd.py`, whose node counts are the subtree counts needed.
+# Paths from a6 to f1 are ranked as their reflections from a1 to f6, so one diagram serves both starting points.
+import os
+from typing import Optional
+
+from knight_moves_6.calculation.bitboard import cells_to_path, coord_to_cell, path_to_cells
+from knight_moves_6.calculation.coordinate_map import reflect_path
+from knight_moves_6.solver.path_zdd import PathZDD, build_path_zdd
+
+# Ending position of the paths from each starting position.
+CORNER_ENDS = {"a1": "f6", "a6": "f1"}
+
+# Diagrams loaded in this process, by (start, end).
+_PATH_ZDDS = {}
+
+
+def load_path_zdd(start: str = "a1", end: str = "f6", cache_file: Optional[str] = None) -> PathZDD:
+    """
+    Load the ZDD of the paths from start to end, building and caching it on disk the first time.
+
+    Building the a1-f6 diagram takes about 12 minutes. It is stored in about 230MB.
+
+    Args:
+        start (str): Starting position in coordinate format, e.g., "a1".
+        end (str): Ending position in coordinate format, e.g., "f6".
+        cache_file (str, optional): File of the stored diagram. Default: "knight-paths-{start}-{end}.zdd".
+
+    Returns:
+        PathZDD: Diagram of all the paths from start to end.
+    """
+    if (start, end) in _PATH_ZDDS:
+        return _PATH_ZDDS[start, end]
+    if cache_file is None:
+        cache_file = f"knight-paths-{start}-{end}.zdd"
+    if os.path.exists(cache_file):
+        zdd = PathZDD.load(cache_file)
+    else:
+        print(f"Building the diagram of the paths from {start} to {end}, this takes a while.")
+        zdd = build_path_zdd(coord_to_cell(start), coord_to_cell(end))
+        zdd.save(cache_file)
+    _PATH_ZDDS[start, end] = zdd
+    return zdd
+
+
+def rank_path(path: list[str]) -> int:
+    """
+    Rank of a corner-to-corner path among all the paths from its starting position.
+
+    Args:
+        path (list of str): List of positions in coordinate format, from "a1" to "f6" or from "a6" to "f1".
+
+    Returns:
+        int: Rank of the path, below 752,404,294.
+    """
+    if path[0] == "a6":
+        path = reflect_path(path)
+    return load_path_zdd(path[0], path[-1]).rank(path_to_cells(path))
+
+
+def unrank_path(start: str, rank: int) -> list[str]:
+    """
+    Rebuild a corner-to-corner path from its starting position and its rank, i.e. the inverse of `rank_path()`.
+
+    Args:
+        start (str): Starting position in coordinate format, "a1" or "a6".
+        rank (int): Rank of the path.
+
+    Returns:
+        list[str]: List of positions in coordinate format.
+    """
+    if start == "a6":
+        return reflect_path(unrank_path("a1", rank))
+    return cells_to_path(load_path_zdd(start, CORNER_ENDS[start]).unrank(rank))
+
+
+if __name__ == "__main__":
+
+    from knight_moves_6.calculation.constant import MY_SOLUTION
+    from knight_moves_6.calculation.coordinate_map import solution_string_to_coordinate_list
+
+    _, _, _, path1, path2 = solution_string_to_coordinate_list(MY_SOLUTION)
+    for path in (path1, path2):
+        rank = rank_path(path)
+        print(f"{','.join(path)} has rank {rank}.")
+        print(f"Rank {rank} from {path[0]} is {','.join(unrank_path(path[0], rank))}.")
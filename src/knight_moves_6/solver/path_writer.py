@@ -0,0 +1,145 @@
+import multiprocessing
+import queue
+from typing import Optional
+
+from knight_moves_6.calculation.bitboard import cells_to_path, cells_to_signature
+from knight_moves_6.calculation.calculate_score import calculate_signature_expression
+from knight_moves_6.calculation.coordinate_map import path_to_string, reflect_path
+from knight_moves_6.calculation.polynomial import expression_polynomial_hash
+from knight_moves_6.model.database import KnightPath, Session, engine
+from knight_moves_6.solver.checkpoint import save_checkpoint
+
+# Seconds to wait on a full queue before checking that the writer is still alive.
+_PUT_TIMEOUT = 1.0
+
+
+def records_to_rows(records: list[bytes], with_mirror: bool = False, store_ranks: bool = False) -> list[dict]:
+    """
+    Convert compact path records, i.e. `bytes(cells)`, to KnightPath rows for a bulk insert.
+
+    Args:
+        records (list of bytes): Paths as cell indices packed in bytes.
+        with_mirror (bool): Also convert the reflection of every path.
+        store_ranks (bool): Store the rank of every path instead of its positions.
+
+    Returns:
+        list[dict]: Rows with keys "start", "path" or "rank", "expression" and "polynomial_hash".
+    """
+    if store_ranks:
+        # Loading the diagram of the ranks is only worth it when ranks are stored.
+        from knight_moves_6.solver.path_rank import rank_path
+
+    rows = []
+    for record in records:
+        for reflected in (False, True) if with_mirror else (False,):
+            path = cells_to_path(record)
+            if reflected:
+                path = reflect_path(path)
+            expression = calculate_signature_expression(cells_to_signature(record, reflected))
+            row = {
+                "start": path[0],
+                "expression": expression,
+                "polynomial_hash": expression_polynomial_hash(expression),
+            }
+            if store_ranks:
+                row["rank"] = rank_path(path)
+            else:
+                row["path"] = path_to_string(path)
+            rows.append(row)
+    return rows
+
+
+def _write_paths_from_queue(
+    path_queue: multiprocessing.Queue, commit_size: int, with_mirror: bool, store_ranks: bool
+) -> None:
+    """
+    Writer loop: bulk insert the chunks of records from the queue, until it receives None.
+
+    Every commit is followed by the checkpoint sent with the last chunk it contains, if any,
+    so that a checkpoint never gets ahead of the stored paths.
+    """
+    # Connections inherited from the parent process must not be shared, see the SQLAlchemy docs on multiprocessing.
+    engine.dispose(close=False)
+    session = Session()
+    rows = []
+    checkpoint = None
+    try:
+        while True:
+            item = path_queue.get()
+            if item is not None:
+                records, chunk_checkpoint = item
+                rows.extend(records_to_rows(records, with_mirror=with_mirror, store_ranks=store_ranks))
+                checkpoint = chunk_checkpoint or checkpoint
+            if rows and (item is None or len(rows) >= commit_size):
+                session.bulk_insert_mappings(KnightPath, rows)
+                session.commit()
+                rows = []
+            if checkpoint and not rows:
+                save_checkpoint(**checkpoint)
+                checkpoint = None
+            if item is None:
+                return
+    finally:
+        session.close()
+
+
+class BackgroundPathWriter:
+    """
+    Store paths in a separate process, so that the search does not wait for SQLite.
+
+    The search only packs paths into bytes and puts them on a bounded queue. The writer process computes the
+    expressions and bulk inserts them, `commit_size` rows at a time. Once `max_chunks` chunks are waiting,
+    `write()` blocks until the writer catches up.
+
+    Use as a context manager, so that the writer is always flushed and stopped:
+
+        with BackgroundPathWriter() as writer:
+            writer.write([bytes(cells) for cells in chunk])
+    """
+
+    def __init__(
+        self, commit_size: int = 200000, max_chunks: int = 4, with_mirror: bool = False, store_ranks: bool = False
+    ):
+        self._queue = multiprocessing.Queue(maxsize=max_chunks)
+        self._process = multiprocessing.Process(
+            target=_write_paths_from_queue, args=(self._queue, commit_size, with_mirror, store_ranks), daemon=True
+        )
+
+    def __enter__(self) -> "BackgroundPathWriter":
+        self._process.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def write(self, records: list[bytes], checkpoint: Optional[dict] = None) -> None:
+        """
+        Queue a chunk of paths, blocking while the queue is full.
+
+        Args:
+            records (list of bytes): Paths as cell indices packed in bytes, e.g. `bytes(cells)`.
+            checkpoint (dict, optional): Arguments of `save_checkpoint()`, saved once the chunk is committed.
+        """
+        self._put((records, checkpoint))
+
+    def close(self) -> None:
+        """Wait for the writer to store every queued path, and stop it."""
+        if self._process.is_alive():
+            self._put(None)
+            self._process.join()
+        self._check_alive(finished=True)
+
+    def _put(self, item: Optional[tuple]) -> None:
+        """Put an item on the queue, blocking while it is full, as long as the writer is alive."""
+        while True:
+            self._check_alive()
+            try:
+                self._queue.put(item, timeout=_PUT_TIMEOUT)
+                return
+            except queue.Full:
+                continue
+
+    def _check_alive(self, finished: bool = False) -> None:
+        """Raise if the writer process failed, instead of waiting forever on a full queue."""
+        if (finished or not self._process.is_alive()) and self._process.exitcode:
+            raise RuntimeError(f"The path writer process failed with exit code {self._process.exitcode}.")
@@ -0,0 +1,396 @@
+# Zero-suppressed decision diagram (ZDD) of the simple knight paths between two cells.
+# Built with the frontier-based method ("simpath"): the 80 edges of the knight graph are decided one at a time,
+# and partial paths that agree on the frontier, i.e. the cells with both decided and undecided edges, are merged.
+# Every a1-f6 path is a set of edges, and the diagram stores all 752,404,294 of them exactly in 13.4M nodes (230MB),
+# instead of a truncated sample of rows in the database. Building it takes about 12 minutes and 3GB of memory.
+import itertools
+import pickle
+import random
+from array import array
+from typing import Generator, Optional
+
+from knight_moves_6.calculation.bitboard import NEIGHBOURS, SYMBOL_TABLE, cells_to_path, coord_to_cell
+
+# Mate value of a cell in the middle of a partial path, i.e. that already has two edges.
+_INTERIOR = 255
+
+# Terminal nodes of the diagram: the empty family and the family containing only the empty set.
+ZERO, ONE = 0, 1
+
+
+def knight_edges(neighbours: Optional[list[tuple[int, ...]]] = None) -> list[tuple[int, int]]:
+    """
+    List the edges of the knight graph as (cell, cell) pairs, in the order the diagram decides them.
+
+    Sorting by cell index, i.e. row by row, keeps at most 13 cells on the frontier.
+
+    Args:
+        neighbours (list of tuple of int, optional): Neighbours of every cell. Default: `NEIGHBOURS` of the 6x6 grid.
+
+    Returns:
+        list[tuple[int, int]]: Edges `(u, v)` with `u < v`.
+    """
+    if neighbours is None:
+        neighbours = NEIGHBOURS
+    return sorted((u, v) for u in range(len(neighbours)) for v in neighbours[u] if u < v)
+
+
+class PathZDD:
+    """
+    Family of simple paths from `start` to `end`, each path being the set of indices in `edges` of its moves.
+
+    Nodes are numbered bottom-up, so that both children of a node have smaller numbers than the node itself.
+    Node `i` decides edge `var[i]`: `hi[i]` continues with the paths using that edge, `lo[i]` with the others.
+    Edges skipped between a node and its child are not used by any path below, as usual for ZDDs.
+    """
+
+    def __init__(self, start: int, end: int, edges: list[tuple[int, int]], var: array, lo: array, hi: array, root: int):
+        self.start = start
+        self.end = end
+        self.edges = edges
+        self.var = var
+        self.lo = lo
+        self.hi = hi
+        self.root = root
+        self._counts = None
+        self._edge_indices = None
+
+    def __len__(self) -> int:
+        """Number of nodes, including both terminals."""
+        return len(self.var)
+
+    @property
+    def counts(self) -> array:
+        """Number of paths below every node, computed once bottom-up."""
+        if self._counts is None:
+            lo, hi = self.lo, self.hi
+            counts = array("q", [0]) * len(self.var)
+            counts[ONE] = 1
+            for node in range(2, len(counts)):
+                counts[node] = counts[lo[node]] + counts[hi[node]]
+            self._counts = counts
+        return self._counts
+
+    def count(self) -> int:
+        """Exact number of paths in the family."""
+        return self.counts[self.root]
+
+    def edges_to_cells(self, edge_indices: list[int]) -> tuple[int, ...]:
+        """Order the edges of a member from `start` to `end`, as cell indices."""
+        adjacent = {}
+        for edge_index in edge_indices:
+            u, v = self.edges[edge_index]
+            adjacent.setdefault(u, []).append(v)
+            adjacent.setdefault(v, []).append(u)
+        cells = [self.start]
+        prev_cell = None
+        while cells[-1] != self.end:
+            next_cell = next(cell for cell in adjacent[cells[-1]] if cell != prev_cell)
+            prev_cell = cells[-1]
+            cells.append(next_cell)
+        return tuple(cells)
+
+    def iter_edge_sets(self) -> Generator[list[int], None, None]:
+        """
+        Iterate over the members as lists of edge indices, depth first, with the lo branch (edge unused) of every
+        node before its hi branch (edge used).
+
+        Yields:
+            list[int]: Increasing indices in `edges` of the moves of a path.
+        """
+        lo, hi, var = self.lo, self.hi, self.var
+        stack = [(self.root, [])]
+        while stack:
+            node, chosen = stack.pop()
+            if node == ONE:
+                yield chosen
+            elif node != ZERO:
+                # Pushed first, popped last.
+                stack.append((hi[node], chosen + [var[node]]))
+                stack.append((lo[node], chosen))
+
+    def iter_paths(self) -> Generator[tuple[int, ...], None, None]:
+        """Iterate over the members as paths of cell indices, in the order of `iter_edge_sets()`."""
+        for edge_indices in self.iter_edge_sets():
+            yield self.edges_to_cells(edge_indices)
+
+    def sample(self, rng: Optional[random.Random] = None) -> tuple[int, ...]:
+        """
+        Draw a path uniformly at random from the family.
+
+        Args:
+            rng (random.Random, optional): Random number generator. Default: the `random` module.
+
+        Returns:
+            tuple[int, ...]: Path as cell indices.
+        """
+        if rng is None:
+            rng = random
+        counts, lo, hi, var = self.counts, self.lo, self.hi, self.var
+        if counts[self.root] == 0:
+            raise ValueError("Cannot sample from an empty family of paths.")
+        edge_indices = []
+        node = self.root
+        while node != ONE:
+            if rng.randrange(counts[node]) < counts[hi[node]]:
+                edge_indices.append(var[node])
+                node = hi[node]
+            else:
+                node = lo[node]
+        return self.edges_to_cells(edge_indices)
+
+    def rank(self, cells: tuple[int, ...]) -> int:
+        """
+        Index of a path in the order of `iter_paths()`, in O(number of edges) steps.
+
+        Args:
+            cells (tuple of int): Path as cell indices.
+
+        Returns:
+            int: Rank of the path, between 0 and `count() - 1`.
+        """
+        if self._edge_indices is None:
+            self._edge_indices = {edge: i for i, edge in enumerate(self.edges)}
+        edge_indices = sorted(self._edge_indices.get((min(u, v), max(u, v)), -1) for u, v in zip(cells, cells[1:]))
+        counts, lo, hi, var = self.counts, self.lo, self.hi, self.var
+        rank = 0
+        node = self.root
+        for edge_index in edge_indices:
+            # Skip the edges not used by the path. An edge skipped by the diagram is not used by any member.
+            while node > ONE and var[node] < edge_index:
+                node = lo[node]
+            if node <= ONE or var[node] != edge_index:
+                raise ValueError(f"Path {cells} is not a member of the diagram.")
+            rank += counts[lo[node]]
+            node = hi[node]
+        while node > ONE:
+            node = lo[node]
+        if node != ONE:
+            raise ValueError(f"Path {cells} is not a member of the diagram.")
+        return rank
+
+    def unrank(self, rank: int) -> tuple[int, ...]:
+        """
+        Path at a given index in the order of `iter_paths()`, i.e. the inverse of `rank()`.
+
+        Args:
+            rank (int): Rank of the path, between 0 and `count() - 1`.
+
+        Returns:
+            tuple[int, ...]: Path as cell indices.
+        """
+        counts, lo, hi, var = self.counts, self.lo, self.hi, self.var
+        if not 0 <= rank < counts[self.root]:
+            raise IndexError(f"Rank {rank} is out of range for {counts[self.root]} paths.")
+        edge_indices = []
+        node = self.root
+        while node != ONE:
+            if rank < counts[lo[node]]:
+                node = lo[node]
+            else:
+                rank -= counts[lo[node]]
+                edge_indices.append(var[node])
+                node = hi[node]
+        return self.edges_to_cells(edge_indices)
+
+    def save(self, file: str) -> None:
+        """Store the diagram in a file, to skip the construction next time."""
+        with open(file, "wb") as f:
+            pickle.dump((self.start, self.end, self.edges, self.var, self.lo, self.hi, self.root), f)
+
+    @classmethod
+    def load(cls, file: str) -> "PathZDD":
+        """Load a diagram stored with `save()`."""
+        with open(file, "rb") as f:
+            return cls(*pickle.load(f))
+
+
+def build_path_zdd(
+    start: int,
+    end: int,
+    neighbours: Optional[list[tuple[int, ...]]] = None,
+    max_length: Optional[int] = None,
+    max_multiplications: Optional[int] = None,
+    symbols: bytes = SYMBOL_TABLE,
+    verbose: bool = False,
+) -> PathZDD:
+    """
+    Build the ZDD of all simple paths from `start` to `end` with the frontier-based method.
+
+    The state of a partial path on the frontier is the "mate" of every frontier cell: itself if it has no edge yet,
+    `_INTERIOR` if it has two, and the other end of its path fragment if it has one. Partial paths with the same state
+    have the same completions, and share a node.
+
+    Constraints on the symbols of `GRID` are intersected during the construction. Since a move between equal symbols
+    is an addition and a move between different symbols a multiplication, whatever the direction of the path,
+    the number of multiplications only depends on the set of edges.
+
+    Args:
+        start (int): Cell index of the starting position (e.g., 0 for "a1").
+        end (int): Cell index of the ending position (e.g., 35 for "f6").
+        neighbours (list of tuple of int, optional): Neighbours of every cell. Default: `NEIGHBOURS` of the 6x6 grid.
+        max_length (int, optional): Only keep paths with at most this many moves.
+        max_multiplications (int, optional): Only keep paths with at most this many moves between different symbols.
+        symbols (bytes): Symbol of every cell, to count multiplications. Default: the symbols of `GRID`.
+        verbose (bool): Print the number of nodes of every level during the construction.
+
+    Returns:
+        PathZDD: Reduced diagram of the paths.
+    """
+    if neighbours is None:
+        neighbours = NEIGHBOURS
+    n_cells = len(neighbours)
+    assert n_cells < _INTERIOR and start != end
+    edges = knight_edges(neighbours)
+    first_edge, last_edge = {}, {}
+    for i, edge in enumerate(edges):
+        for cell in edge:
+            first_edge.setdefault(cell, i)
+            last_edge[cell] = i
+
+    # Counters of the constraints are kept at the end of the state, after the mates of the frontier cells.
+    counters = [limit for limit in (max_length, max_multiplications) if limit is not None]
+    count_length = max_length is not None
+    count_multiplications = max_multiplications is not None
+
+    frontier = []
+    states = {bytes(len(counters)): 0}
+    levels = []
+    for i, (u, v) in enumerate(edges):
+        entering = bytes(cell for cell in (u, v) if first_edge[cell] == i)
+        cells = frontier + list(entering)
+        position = {cell: p for p, cell in enumerate(cells)}
+        n_front = len(cells)
+        pu, pv = position[u], position[v]
+        leaving = [(position[cell], cell, cell in (start, end)) for cell in cells if last_edge[cell] == i]
+        kept = [p for p, cell in enumerate(cells) if last_edge[cell] != i] + list(
+            range(n_front, n_front + len(counters))
+        )
+        # Mates of the cells that are not `start` or `end`, to check for dangling fragments once a path is complete.
+        inner = [(p, cell) for p, cell in enumerate(cells) if cell not in (start, end)]
+        is_multiplication = symbols[u] != symbols[v]
+        length_position = n_front if count_length else None
+        multiplication_position = n_front + count_length if count_multiplications else None
+
+        next_states = {}
+        lo_level = array("i")
+        hi_level = array("i")
+
+        def child(mate: bytearray) -> int:
+            """Node of the next level with this state, 0 if a leaving cell is left in an invalid state."""
+            for p, cell, is_terminal in leaving:
+                if is_terminal:
+                    if mate[p] == cell:
+                        return ZERO
+                elif mate[p] != cell and mate[p] != _INTERIOR:
+                    return ZERO
+            key = bytes(map(mate.__getitem__, kept))
+            node = next_states.get(key)
+            if node is None:
+                node = next_states[key] = len(next_states) + 2
+            return node
+
+        for state in states:
+            # Frontier cells, then cells entering the frontier with this edge, then counters.
+            mate = bytearray(state[: len(frontier)]) + entering + state[len(frontier) :]
+            lo_level.append(child(mate))
+
+            # Use the edge (u, v): both cells need a free end, and joining them must not close a cycle.
+            # `start` and `end` keep a free end only until their first edge.
+            mu, mv = mate[pu], mate[pv]
+            hi_node = ZERO
+            valid = (
+                mu != _INTERIOR
+                and mv != _INTERIOR
+                and mu != v
+                and (mu == u or u not in (start, end))
+                and (mv == v or v not in (start, end))
+            )
+            if valid and count_length:
+                mate[length_position] += 1
+                valid = mate[length_position] <= max_length
+            if valid and count_multiplications and is_multiplication:
+                mate[multiplication_position] += 1
+                valid = mate[multiplication_position] <= max_multiplications
+            if valid:
+                if mu != u:
+                    mate[pu] = _INTERIOR
+                if mv != v:
+                    mate[pv] = _INTERIOR
+                if mu in position:
+                    mate[position[mu]] = mv
+                if mv in position:
+                    mate[position[mv]] = mu
+                if (mu == start and mv == end) or (mu == end and mv == start):
+                    # The path is complete, if no other fragment is left open. All remaining edges are unused.
+                    if all(mate[p] == cell or mate[p] == _INTERIOR for p, cell in inner):
+                        hi_node = ONE
+                else:
+                    hi_node = child(mate)
+            hi_level.append(hi_node)
+
+        levels.append((lo_level, hi_level))
+        frontier = [cell for cell in cells if last_edge[cell] != i]
+        states = next_states
+        if verbose:
+            print(f"Edge {i + 1}/{len(edges)}: {len(states)} states on a frontier of {len(frontier)} cells.")
+
+    return _reduce(start, end, edges, levels)
+
+
+def _reduce(start: int, end: int, edges: list[tuple[int, int]], levels: list[tuple[array, array]]) -> PathZDD:
+    """
+    Reduce the levels built by `build_path_zdd()` into a ZDD: nodes whose `hi` child is `ZERO` are skipped,
+    and nodes with the same children are merged.
+
+    In `levels`, children 0 and 1 are the terminals and child `k >= 2` is the node `k - 2` of the next level.
+    """
+    var, lo, hi = array("B", [0, 0]), array("q", [ZERO, ONE]), array("q", [ZERO, ONE])
+    below = array("q")
+    for i in reversed(range(len(levels))):
+        lo_level, hi_level = levels[i]
+        reduced = array("q", [0]) * len(lo_level)
+        unique = {}
+        for k, (lo_child, hi_child) in enumerate(zip(lo_level, hi_level)):
+            lo_child = lo_child if lo_child < 2 else below[lo_child - 2]
+            hi_child = hi_child if hi_child < 2 else below[hi_child - 2]
+            if hi_child == ZERO:
+                reduced[k] = lo_child
+                continue
+            node = unique.get((lo_child, hi_child))
+            if node is None:
+                node = unique[lo_child, hi_child] = len(var)
+                var.append(i)
+                lo.append(lo_child)
+                hi.append(hi_child)
+            reduced[k] = node
+        # Free the unreduced level as soon as possible.
+        levels[i] = None
+        below = reduced
+    return PathZDD(start, end, edges, var, lo, hi, below[0])
+
+
+if __name__ == "__main__":
+    import time
+
+    from knight_moves_6.calculation.calculate_score import calculate_path_score
+    from knight_moves_6.calculation.constant import GRID
+
+    start, end = coord_to_cell("a1"), coord_to_cell("f6")
+
+    # Short paths only. The whole family takes about 12 minutes to build.
+    for max_length in (6, 8):
+        start_time = time.time()
+        zdd = build_path_zdd(start, end, max_length=max_length)
+        print(f"{zdd.count()} paths of at most {max_length} moves, {len(zdd)} nodes, {time.time() - start_time:.2f}s.")
+
+    rng = random.Random(2024)
+    for _ in range(3):
+        path = cells_to_path(zdd.sample(rng))
+        print(",".join(path), calculate_path_score(GRID, path, 1, 3, 2))
+
+    # Paths with few multiplications score little, whatever A, B, C are.
+    zdd = build_path_zdd(start, end, max_multiplications=4)
+    print(f"{zdd.count()} paths with at most 4 multiplications, {len(zdd)} nodes.")
+    for cells in itertools.islice(zdd.iter_paths(), 3):
+        print(",".join(cells_to_path(cells)))
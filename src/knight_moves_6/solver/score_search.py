@@ -0,0 +1,341 @@
+# Branch-and-bound search of the paths scoring PATH_SUM for a single (A, B, C), without any stored paths.
+# The search of `iter_knight_path_cells()` carries the score along the current path. Every move adds a positive value
+# or multiplies by one, so the score never decreases: as soon as it passes the target, no path below can hit it.
+import itertools
+from typing import Generator, Optional
+
+from sqlalchemy import asc
+
+from knight_moves_6.calculation.bitboard import (
+    FREE_NEIGHBOURS,
+    NEIGHBOUR_MASKS,
+    NUM_CELLS,
+    SYMBOL_TABLE,
+    cells_to_path,
+    coord_to_cell,
+)
+from knight_moves_6.calculation.constant import PATH_SUM
+from knight_moves_6.model.database import Session
+from knight_moves_6.model.model_abc import ABCCombination
+from knight_moves_6.model.model_solution import Solution
+from knight_moves_6.model.operations import add_scored_knight_paths, add_solution
+from knight_moves_6.solver.dead_states import DeadStateTable
+
+# Symbol of every cell, as 0, 1, 2 for "A", "B", "C".
+CELL_SYMBOLS = tuple(SYMBOL_TABLE[cell] - ord("A") for cell in range(NUM_CELLS))
+
+# Corners of the two trips of the puzzle.
+TRIPS = (("a1", "f6"), ("a6", "f1"))
+
+
+def iter_scoring_path_cells(
+    start: int,
+    end: int,
+    A: int,
+    B: int,
+    C: int,
+    target: int = PATH_SUM,
+    stats: Optional[dict[str, int]] = None,
+    dead_states: Optional[DeadStateTable] = None,
+) -> Generator[tuple[int, ...], None, None]:
+    """
+    Search the paths from start to end scoring exactly `target`, in the order of `iter_knight_path_cells()`.
+
+    Args:
+        start (int): Cell index of the starting position (e.g., 0 for "a1").
+        end (int): Cell index of the ending position (e.g., 35 for "f6").
+        A (int): The positive integer value for "A" in the grid.
+        B (int): The positive integer value for "B" in the grid.
+        C (int): The positive integer value for "C" in the grid.
+        target (int): Score to hit.
+        stats (dict, optional): Receives the number of "nodes" descended into, the "moves" tried, and the moves
+            "pruned" because the score passed the target, plus the moves skipped as "dead" with `dead_states`.
+            Counted when the search stops or ends.
+        dead_states (DeadStateTable, optional): Skip the states recorded in it, and record the states whose subtree
+            had no hit. Only valid for this end, (A, B, C) and target.
+
+    Yields:
+        tuple[int, ...]: Path as cell indices, from `start` to `end`.
+    """
+    if dead_states is not None:
+        # Keep the lookups out of the plain search, so that it costs nothing without a table.
+        yield from _search_with_dead_states(start, end, A, B, C, target, stats, dead_states)
+        return
+
+    free_neighbours = FREE_NEIGHBOURS
+    neighbour_masks = NEIGHBOUR_MASKS
+    symbols = CELL_SYMBOLS
+    values = [(A, B, C)[symbol] for symbol in symbols]
+    entry_mask = neighbour_masks[end]
+    end_bit = 1 << end
+
+    path = [start]
+    visited = 1 << start
+    score = values[start]
+    # Moves and scores of the cells above the current one.
+    stack = []
+    scores = []
+    moves = iter(free_neighbours[start][neighbour_masks[start] & ~visited])
+    n_nodes = 1
+    n_moves = n_pruned = 0
+
+    try:
+        while True:
+            for cell in moves:
+                n_moves += 1
+                if symbols[cell] == symbols[path[-1]]:
+                    next_score = score + values[cell]
+                else:
+                    next_score = score * values[cell]
+                if next_score > target:
+                    n_pruned += 1
+                    continue
+                if cell == end:
+                    if next_score == target:
+                        yield (*path, end)
+                    continue
+                free = neighbour_masks[cell] & ~visited
+                if free and entry_mask & ~(visited | 1 << cell):
+                    # Descend into the next cell.
+                    stack.append(moves)
+                    scores.append(score)
+                    path.append(cell)
+                    visited |= 1 << cell
+                    score = next_score
+                    moves = iter(free_neighbours[cell][free])
+                    n_nodes += 1
+                    break
+                elif free & end_bit:
+                    # The only way out of this cell that can still reach `end` is `end` itself.
+                    n_moves += 1
+                    if symbols[end] == symbols[cell]:
+                        final_score = next_score + values[end]
+                    else:
+                        final_score = next_score * values[end]
+                    if final_score == target:
+                        yield (*path, cell, end)
+            else:
+                # All moves from the current cell are exhausted, backtrack.
+                if not stack:
+                    return
+                visited ^= 1 << path.pop()
+                moves = stack.pop()
+                score = scores.pop()
+    finally:
+        if stats is not None:
+            stats["nodes"] = stats.get("nodes", 0) + n_nodes
+            stats["moves"] = stats.get("moves", 0) + n_moves
+            stats["pruned"] = stats.get("pruned", 0) + n_pruned
+
+
+def _search_with_dead_states(
+    start: int,
+    end: int,
+    A: int,
+    B: int,
+    C: int,
+    target: int,
+    stats: Optional[dict[str, int]],
+    dead_states: DeadStateTable,
+) -> Generator[tuple[int, ...], None, None]:
+    """Same search as `iter_scoring_path_cells()`, but skips the states of `dead_states` and records new ones."""
+    free_neighbours = FREE_NEIGHBOURS
+    neighbour_masks = NEIGHBOUR_MASKS
+    symbols = CELL_SYMBOLS
+    values = [(A, B, C)[symbol] for symbol in symbols]
+    entry_mask = neighbour_masks[end]
+    end_bit = 1 << end
+    key = dead_states.key
+
+    path = [start]
+    visited = 1 << start
+    score = values[start]
+    stack = []
+    scores = []
+    # Number of hits and nodes when each cell above the current one was entered: if the hits haven't changed on
+    # backtrack, the subtree of the cell is dead.
+    hit_counts = []
+    node_counts = []
+    min_subtree_nodes = dead_states.min_subtree_nodes
+    moves = iter(free_neighbours[start][neighbour_masks[start] & ~visited])
+    n_nodes = 1
+    n_moves = n_pruned = n_dead = n_hits = 0
+
+    try:
+        while True:
+            for cell in moves:
+                n_moves += 1
+                if symbols[cell] == symbols[path[-1]]:
+                    next_score = score + values[cell]
+                else:
+                    next_score = score * values[cell]
+                if next_score > target:
+                    n_pruned += 1
+                    continue
+                if cell == end:
+                    if next_score == target:
+                        n_hits += 1
+                        yield (*path, end)
+                    continue
+                free = neighbour_masks[cell] & ~visited
+                if free and entry_mask & ~(visited | 1 << cell):
+                    if key(cell, visited | 1 << cell, next_score) in dead_states:
+                        n_dead += 1
+                        continue
+                    stack.append(moves)
+                    scores.append(score)
+                    hit_counts.append(n_hits)
+                    node_counts.append(n_nodes)
+                    path.append(cell)
+                    visited |= 1 << cell
+                    score = next_score
+                    moves = iter(free_neighbours[cell][free])
+                    n_nodes += 1
+                    break
+                elif free & end_bit:
+                    n_moves += 1
+                    if symbols[end] == symbols[cell]:
+                        final_score = next_score + values[end]
+                    else:
+                        final_score = next_score * values[end]
+                    if final_score == target:
+                        n_hits += 1
+                        yield (*path, cell, end)
+            else:
+                if not stack:
+                    return
+                entry_hits = hit_counts.pop()
+                entry_nodes = node_counts.pop()
+                if entry_hits == n_hits and n_nodes - entry_nodes >= min_subtree_nodes:
+                    dead_states.add(key(path[-1], visited, score))
+                visited ^= 1 << path.pop()
+                moves = stack.pop()
+                score = scores.pop()
+    finally:
+        if stats is not None:
+            stats["nodes"] = stats.get("nodes", 0) + n_nodes
+            stats["moves"] = stats.get("moves", 0) + n_moves
+            stats["pruned"] = stats.get("pruned", 0) + n_pruned
+            stats["dead"] = stats.get("dead", 0) + n_dead
+
+
+def find_scoring_paths(
+    start: str,
+    end: str,
+    A: int,
+    B: int,
+    C: int,
+    target: int = PATH_SUM,
+    max_paths: Optional[int] = 1,
+    stats: Optional[dict[str, int]] = None,
+    dead_states: Optional[DeadStateTable] = None,
+) -> list[list[str]]:
+    """
+    Find paths from start to end scoring exactly `target`.
+
+    Args:
+        start (str): Starting position in coordinate format, e.g. "a1".
+        end (str): Ending position in coordinate format, e.g. "f6".
+        A (int): The positive integer value for "A" in the grid.
+        B (int): The positive integer value for "B" in the grid.
+        C (int): The positive integer value for "C" in the grid.
+        target (int): Score to hit.
+        max_paths (int, optional): Stop after this many paths. None to find them all.
+        stats (dict, optional): See `iter_scoring_path_cells()`.
+        dead_states (DeadStateTable, optional): See `iter_scoring_path_cells()`.
+
+    Returns:
+        list[list[str]]: Paths in coordinate format, in search order.
+    """
+    path_cells = iter_scoring_path_cells(coord_to_cell(start), coord_to_cell(end), A, B, C, target, stats, dead_states)
+    paths = [cells_to_path(cells) for cells in itertools.islice(path_cells, max_paths)]
+    # Close the search, so that its statistics are counted.
+    path_cells.close()
+    return paths
+
+
+def branch_and_bound_solver(
+    session: Session,
+    max_solutions: int = 1,
+    collect_all: bool = False,
+    target: int = PATH_SUM,
+    dead_states: Optional[DeadStateTable] = None,
+) -> list[Solution]:
+    """
+    Solve every ABC combination directly with `iter_scoring_path_cells()`, without the `knight_paths` table.
+
+    ABC combinations are tried by increasing `sum_abc`. The search from a1 stops at its first hit, and the search
+    from a6 only runs if there is one. A combination with a hit from both corners is stored as a Solution.
+
+    Args:
+        session (Session): SQLAlchemy session to interact with the database.
+        max_solutions (int): Number of solutions to find before stopping.
+        collect_all (bool): Search every hit from both corners of a solution, and store them in `knight_paths`
+            and `path_scores`.
+        target (int): Score to hit.
+        dead_states (DeadStateTable, optional): Table of dead states for the searches. It is cleared before each.
+
+    Returns:
+        list[Solution]: Solutions found, ordered by `sum_abc`.
+    """
+    solutions = []
+    for combination in session.query(ABCCombination).order_by(asc(ABCCombination.sum_abc), asc(ABCCombination.id)):
+        A, B, C = combination.A, combination.B, combination.C
+        hits = {}
+        stats = {}
+        for start, end in TRIPS:
+            if dead_states is not None:
+                dead_states.clear()
+            hits[start] = find_scoring_paths(start, end, A, B, C, target, 1, stats, dead_states)
+            if not hits[start]:
+                break
+        else:
+            if collect_all:
+                for start, end in TRIPS:
+                    if dead_states is not None:
+                        dead_states.clear()
+                    hits[start] = find_scoring_paths(start, end, A, B, C, target, None, stats, dead_states)
+                    add_scored_knight_paths(session, combination.id, hits[start], target)
+            path1, path2 = hits["a1"][0], hits["a6"][0]
+            print(
+                f"A+B+C={combination.sum_abc} (A={A} B={B} C={C}): {len(hits['a1'])} paths from a1, "
+                f"{len(hits['a6'])} from a6, after {stats['nodes']} nodes."
+            )
+            solution = add_solution(
+                session,
+                A=A,
+                B=B,
+                C=C,
+                path1=",".join(path1),
+                path2=",".join(path2),
+                score1=target,
+                score2=target,
+                sum_abc=combination.sum_abc,
+            )
+            solutions.append(solution)
+            if len(solutions) >= max_solutions:
+                break
+            continue
+        print(
+            f"A+B+C={combination.sum_abc} (A={A} B={B} C={C}): no path from {start} in {stats['nodes']} nodes, "
+            f"{stats['pruned'] / max(stats['moves'], 1):.1%} of moves pruned."
+        )
+    if dead_states is not None:
+        print(f"Dead states: {dead_states.format_stats()}.")
+    return solutions
+
+
+if __name__ == "__main__":
+    import time
+
+    from knight_moves_6.calculation.calculate_score import calculate_path_score
+    from knight_moves_6.calculation.constant import GRID
+
+    for A, B, C in [(1, 2, 253), (1, 3, 2), (2, 3, 1), (3, 1, 2)]:
+        for start, end in TRIPS:
+            stats = {}
+            start_time = time.perf_counter()
+            paths = find_scoring_paths(start, end, A, B, C, stats=stats)
+            elapsed = time.perf_counter() - start_time
+            found = f"{','.join(paths[0])} scores {calculate_path_score(GRID, paths[0], A, B, C)}" if paths else "none"
+            print(f"A={A} B={B} C={C} from {start}: {found}, {stats['nodes']} nodes in {elapsed:.2f}s.")
@@ -0,0 +1,192 @@
+# Score histograms: answer many targets with a single pass over the stored paths.
+# Instead of keeping only the paths that score PATH_SUM, every (A, B, C) counts how many paths from each start score
+# every value up to a cap, plus the paths above it. Any target up to the cap is then answered from the counts alone,
+# e.g. which (A, B, C) admit a path from a1 and a path from a6 that both score it.
+import zlib
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import asc
+
+from knight_moves_6.calculation.constant import MAX_SUM, PATH_SUM
+from knight_moves_6.calculation.vectorized_score import encode_expressions, score_encoded_paths
+from knight_moves_6.model.database import Session
+from knight_moves_6.model.model_abc import ABCCombination
+from knight_moves_6.model.model_path import KnightPath
+from knight_moves_6.model.operations import get_score_histograms, upsert_score_histograms
+
+
+def pack_score_counts(counts: np.ndarray) -> bytes:
+    """
+    Compact a histogram of scores for storage, see `ScoreHistogram.counts`.
+
+    Args:
+        counts (np.ndarray): Number of paths scoring each value from 0 to the cap, then above the cap.
+
+    Returns:
+        bytes: zlib-compressed little-endian uint64 counts. Most scores are never hit, so they compress well.
+    """
+    return zlib.compress(np.asarray(counts, dtype="<u8").tobytes())
+
+
+def unpack_score_counts(data: bytes) -> np.ndarray:
+    """Inverse of `pack_score_counts()`, as int64 counts."""
+    return np.frombuffer(zlib.decompress(data), dtype="<u8").astype(np.int64)
+
+
+def _count_scores(symbols: np.ndarray, lengths: np.ndarray, abc: np.ndarray, cap: int) -> np.ndarray:
+    """Histogram of the scores of a batch of encoded paths, of shape (n_abc, cap + 2)."""
+    n_bins = cap + 2
+    # Scores above the cap saturate at cap + 1, the last bin.
+    scores = score_encoded_paths(symbols, lengths, abc, cap=cap + 1)
+    scores += np.arange(len(abc))[:, None] * n_bins
+    return np.bincount(scores.ravel(), minlength=len(abc) * n_bins).reshape(len(abc), n_bins)
+
+
+def _count_batch(counts: np.ndarray, expressions: list[str], abc: np.ndarray, cap: int, abc_chunk_size: int) -> None:
+    """Add the scores of a batch of expressions to the counts, a chunk of (A, B, C) at a time."""
+    symbols, lengths = encode_expressions(expressions)
+    for chunk in range(0, len(abc), abc_chunk_size):
+        counts[chunk : chunk + abc_chunk_size] += _count_scores(
+            symbols, lengths, abc[chunk : chunk + abc_chunk_size], cap
+        )
+
+
+def sweep_score_histograms(
+    session: Session,
+    cap: int = PATH_SUM,
+    max_sum: int = MAX_SUM,
+    batch_size: int = 100000,
+    abc_chunk_size: int = 64,
+    persist_every: int = 10,
+) -> dict[str, np.ndarray]:
+    """
+    Count the scores of every stored path for every ABC combination, in a single pass over the paths of each start.
+
+    Every path is scored once per (A, B, C), as in `solver()`, but every score up to `cap` is kept in the counts
+    instead of only PATH_SUM. The counts are stored in the ScoreHistogram table every `persist_every` batches,
+    together with the last path counted, so that an interrupted sweep resumes where it stopped. A sweep with another
+    `cap`, or over other combinations, starts over.
+
+    Args:
+        session (Session): SQLAlchemy session to interact with the database.
+        cap (int): Highest score counted individually. Higher scores are counted together.
+        max_sum (int): Maximum allowed sum of `A + B + C`.
+        batch_size (int): Number of knight paths read and encoded at once.
+        abc_chunk_size (int): Number of (A, B, C) scored at once. Bounds the memory of the scores to
+            `8 * batch_size * abc_chunk_size` bytes.
+        persist_every (int): Number of batches between two writes of the counts.
+
+    Returns:
+        dict[str, np.ndarray]: Counts of shape (n_abc, cap + 2) of every start, with the combinations by increasing id.
+    """
+    combinations = (
+        session.query(ABCCombination).filter(ABCCombination.sum_abc <= max_sum).order_by(asc(ABCCombination.id)).all()
+    )
+    combination_ids = [combination.id for combination in combinations]
+    abc = np.array([(combination.A, combination.B, combination.C) for combination in combinations], dtype=np.int64)
+    starts = [start for (start,) in session.query(KnightPath.start).distinct().order_by(asc(KnightPath.start))]
+
+    histograms = {}
+    for start in starts:
+        counts = np.zeros((len(abc), cap + 2), dtype=np.int64)
+        last_knight_path_id = 0
+        stored = {histogram.abc_combination_id: histogram for histogram in get_score_histograms(session, start)}
+        # The counts of a start are always written together, up to the same path, so they resume together too.
+        progress = {
+            (stored[abc_id].cap, stored[abc_id].last_knight_path_id) for abc_id in combination_ids if abc_id in stored
+        }
+        if combination_ids and all(abc_id in stored for abc_id in combination_ids) and len(progress) == 1:
+            stored_cap, stored_last_id = progress.pop()
+            if stored_cap == cap:
+                last_knight_path_id = stored_last_id
+                for row, abc_id in enumerate(combination_ids):
+                    counts[row] = unpack_score_counts(stored[abc_id].counts)
+        if last_knight_path_id:
+            print(f"Resuming the score histograms of {start} after path {last_knight_path_id}.")
+
+        def persist() -> None:
+            upsert_score_histograms(
+                session,
+                [
+                    {
+                        "abc_combination_id": abc_id,
+                        "start": start,
+                        "cap": cap,
+                        "counts": pack_score_counts(counts[row]),
+                        "last_knight_path_id": last_knight_path_id,
+                    }
+                    for row, abc_id in enumerate(combination_ids)
+                ],
+            )
+
+        n_batches = n_paths = 0
+        while True:
+            # Read the paths a page at a time, so that no cursor is left open when `persist()` commits.
+            batch = (
+                session.query(KnightPath.id, KnightPath.expression)
+                .filter(KnightPath.start == start, KnightPath.id > last_knight_path_id)
+                .order_by(asc(KnightPath.id))
+                .limit(batch_size)
+                .all()
+            )
+            if not batch:
+                break
+            _count_batch(counts, [expression for _, expression in batch], abc, cap, abc_chunk_size)
+            last_knight_path_id = batch[-1][0]
+            n_paths += len(batch)
+            n_batches += 1
+            if n_batches % persist_every == 0:
+                persist()
+                print(f"Counted the scores of {n_paths} paths from {start}.")
+        persist()
+        print(f"Counted the scores of {n_paths} paths from {start}, for {len(abc)} ABC combinations.")
+        histograms[start] = counts
+
+    return histograms
+
+
+def get_abc_combinations_for_targets(
+    session: Session, targets: Iterable[int], starts: Optional[list[str]] = None
+) -> dict[int, list[tuple[int, int, int]]]:
+    """
+    List the (A, B, C) for which every start has at least one path scoring each target, from the stored histograms.
+
+    Args:
+        session (Session): SQLAlchemy session to interact with the database.
+        targets (iterable of int): Scores to hit, each at most the cap of the histograms.
+        starts (list of str, optional): Starting points that must all hit the target. Defaults to "a1" and "a6".
+
+    Returns:
+        dict[int, list[tuple[int, int, int]]]: Combinations admitting each target, by increasing `A + B + C`.
+    """
+    starts = starts or ["a1", "a6"]
+    targets = list(targets)
+    combinations = {combination.id: combination for combination in session.query(ABCCombination)}
+    # For every combination, the targets hit by all starts so far.
+    admitted = None
+    for start in starts:
+        hit = {}
+        for histogram in get_score_histograms(session, start):
+            if any(target > histogram.cap for target in targets):
+                raise ValueError(f"Targets above the cap {histogram.cap} of the stored histograms.")
+            counts = unpack_score_counts(histogram.counts)
+            hit[histogram.abc_combination_id] = {target for target in targets if counts[target]}
+        admitted = hit if admitted is None else {key: admitted[key] & hit[key] for key in admitted.keys() & hit.keys()}
+
+    result = {target: [] for target in targets}
+    for abc_id in sorted(admitted or {}, key=lambda abc_id: (combinations[abc_id].sum_abc, abc_id)):
+        combination = combinations[abc_id]
+        for target in admitted[abc_id]:
+            result[target].append((combination.A, combination.B, combination.C))
+    return result
+
+
+if __name__ == "__main__":
+    session = Session()
+    sweep_score_histograms(session)
+    admitted = get_abc_combinations_for_targets(session, range(1, PATH_SUM + 1))
+    for target in (100, 500, 1000, PATH_SUM):
+        print(f"{len(admitted[target])} ABC combinations admit paths scoring {target}, e.g. {admitted[target][:3]}.")
+    print(f"{sum(1 for abc in admitted.values() if not abc)} targets up to {PATH_SUM} are not admitted.")
+    session.close()
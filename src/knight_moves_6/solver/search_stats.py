@@ -0,0 +1,148 @@
+import collections
+import contextlib
+import json
+import os
+import time
+from typing import Iterator, Optional
+
+from knight_moves_6.calculation.bitboard import NUM_CELLS
+
+
+class SearchStats:
+    """
+    Opt-in instrumentation of the path search, filled by `iter_knight_path_cells(search_stats=...)`.
+
+    Every list is indexed by the number of cells of the partial path, from 1 (the start) to 36:
+    - `expanded[n]`: partial paths of n cells the search descended into.
+    - `moves[n]`: moves the search tried out of them, i.e. the nodes of n+1 cells it visited.
+    - `paths[n]`: paths of n cells found.
+
+    The search itself only increments these counters. Timings, rates and snapshots are taken by the caller
+    at batch boundaries, with `start()`, `writing()` and `record_batch()`, so that the search loop never reads the
+    clock. Without a `SearchStats`, the search runs its plain loop and pays nothing.
+
+    Args:
+        snapshot_file (str, optional): JSON file rewritten with `snapshot()` every `snapshot_interval` seconds.
+        snapshot_interval (float): Minimum number of seconds between two snapshots.
+        window (int): Number of recent batches over which the rolling rate of nodes per second is measured.
+    """
+
+    def __init__(self, snapshot_file: Optional[str] = None, snapshot_interval: float = 60.0, window: int = 10):
+        self.expanded = [0] * (NUM_CELLS + 1)
+        self.moves = [0] * (NUM_CELLS + 1)
+        self.paths = [0] * (NUM_CELLS + 1)
+        self.write_time = 0.0
+        self.snapshot_file = snapshot_file
+        self.snapshot_interval = snapshot_interval
+        self._start_time = None
+        self._last_snapshot = None
+        # (time, nodes visited) at the last batches.
+        self._samples = collections.deque(maxlen=window + 1)
+
+    def merge(self, other: "SearchStats") -> None:
+        """Add the counters of another search, e.g. of a subtree searched in a worker process."""
+        for n_cells in range(NUM_CELLS + 1):
+            self.expanded[n_cells] += other.expanded[n_cells]
+            self.moves[n_cells] += other.moves[n_cells]
+            self.paths[n_cells] += other.paths[n_cells]
+
+    @property
+    def n_nodes(self) -> int:
+        """Number of nodes visited so far, the starting cell included."""
+        return 1 + sum(self.moves)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since `start()`."""
+        return time.perf_counter() - self._start_time if self._start_time is not None else 0.0
+
+    def start(self) -> None:
+        """Start the clock."""
+        self._start_time = self._last_snapshot = time.perf_counter()
+        self._samples.append((self._start_time, self.n_nodes))
+
+    @contextlib.contextmanager
+    def writing(self) -> Iterator[None]:
+        """Count the time spent in the block as writing paths, instead of searching them."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.write_time += time.perf_counter() - start_time
+
+    def record_batch(self) -> None:
+        """Sample the rate of the search after a batch of paths, and write a snapshot if one is due."""
+        now = time.perf_counter()
+        self._samples.append((now, self.n_nodes))
+        if self.snapshot_file and now - self._last_snapshot >= self.snapshot_interval:
+            self.dump()
+            self._last_snapshot = now
+
+    def rolling_rate(self) -> float:
+        """Nodes visited per second since the oldest of the last batches."""
+        if not self._samples:
+            return 0.0
+        first_time, first_nodes = self._samples[0]
+        elapsed = time.perf_counter() - first_time
+        return (self.n_nodes - first_nodes) / elapsed if elapsed > 0 else 0.0
+
+    def snapshot(self, final: bool = False) -> dict:
+        """
+        Summarize the counters and timings so far.
+
+        Args:
+            final (bool): Whether the search is over.
+
+        Returns:
+            dict: JSON-serializable snapshot. Per-depth entries are keyed by the number of cells.
+        """
+        elapsed = self.elapsed
+        n_nodes = self.n_nodes
+        return {
+            "final": final,
+            "elapsed": elapsed,
+            "search_time": elapsed - self.write_time,
+            "write_time": self.write_time,
+            "nodes": n_nodes,
+            "paths": sum(self.paths),
+            "nodes_per_second": n_nodes / elapsed if elapsed else 0.0,
+            "rolling_nodes_per_second": self.rolling_rate(),
+            "nodes_per_depth": {n_cells + 1: n for n_cells, n in enumerate(self.moves) if n},
+            "branching_per_depth": {n_cells: self.moves[n_cells] / n for n_cells, n in enumerate(self.expanded) if n},
+            "paths_per_length": {n_cells: n for n_cells, n in enumerate(self.paths) if n},
+        }
+
+    def dump(self, final: bool = False) -> None:
+        """Replace the snapshot file atomically with the current snapshot."""
+        temp_file = f"{self.snapshot_file}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(self.snapshot(final), f, indent=2)
+        os.replace(temp_file, self.snapshot_file)
+
+    def finish(self) -> dict:
+        """
+        Write the final snapshot, if there is a snapshot file, and print a summary.
+
+        Returns:
+            dict: Final snapshot.
+        """
+        snapshot = self.snapshot(final=True)
+        if self.snapshot_file:
+            self.dump(final=True)
+        elapsed = snapshot["elapsed"] or 1.0
+        print(
+            f"Visited {snapshot['nodes']} nodes and found {snapshot['paths']} paths in {snapshot['elapsed']:.1f}s "
+            f"({snapshot['nodes_per_second']:.0f} nodes/s, {snapshot['rolling_nodes_per_second']:.0f} recently)."
+        )
+        print(
+            f"  Search: {snapshot['search_time']:.1f}s ({snapshot['search_time'] / elapsed:.0%}), "
+            f"write: {snapshot['write_time']:.1f}s ({snapshot['write_time'] / elapsed:.0%})."
+        )
+        print("  Cells  Nodes          Branching  Paths")
+        for n_cells in range(2, NUM_CELLS + 1):
+            n_nodes = self.moves[n_cells - 1]
+            if n_nodes:
+                branching = snapshot["branching_per_depth"].get(n_cells)
+                branching = f"{branching:9.2f}" if branching is not None else " " * 9
+                print(f"  {n_cells:5d}  {n_nodes:13d}  {branching}  {self.paths[n_cells]}")
+        return snapshot
@@ -1,18 +1,41 @@
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from time import sleep
-from typing import Generator
+from typing import Generator, Optional
 
+import numpy as np
 from sqlalchemy import asc, insert, select, tuple_
 from sqlalchemy.orm import Query
 
-from knight_moves_6.calculation.calculate_score import calculate_path_score
-from knight_moves_6.calculation.constant import PATH_SUM
+from knight_moves_6.calculation.calculate_score import (
+    calculate_path_score,
+    compile_bounded_expression,
+)
+from knight_moves_6.calculation.constant import GRID, PATH_SUM
+from knight_moves_6.calculation.coordinate_map import string_to_path
+from knight_moves_6.calculation.polynomial import (
+    canonical_polynomial,
+    evaluate_polynomial,
+    expression_polynomial_hash,
+    expression_to_polynomial,
+    monomial_powers,
+)
+from knight_moves_6.calculation.prefix_score import PrefixScorer
+from knight_moves_6.calculation.score_cache import ScoreCache
+from knight_moves_6.calculation.vectorized_score import encode_expressions, score_encoded_paths
 from knight_moves_6.model.database import ABCCombination, Session, top_n
 from knight_moves_6.model.model_abc import ABCCombination
 from knight_moves_6.model.model_base import Base
 from knight_moves_6.model.model_path import KnightPath
 from knight_moves_6.model.model_score import PathScore
+from knight_moves_6.model.model_signature import PathSignature
 from knight_moves_6.model.model_solution import Solution
+from knight_moves_6.model.operations import (
+    add_solution,
+    get_distinct_polynomials,
+    get_knight_path_ids_by_polynomial,
+    get_path_signatures,
+    hash_knight_path_polynomials,
+)
 
 
 def abc_combination_generator(session: Session) -> Generator[ABCCombination, None, None]:
@@ -56,7 +79,7 @@ def generate_batches(session: Session, batch_size: int = 100000) -> Generator[li
 
 
 def evaluate_knight_paths_for_abc_combination(
-    combination: ABCCombination, knight_paths: list[KnightPath]
+    combination: ABCCombination, knight_paths: list[KnightPath], abort_stats: Optional[dict[str, int]] = None
 ) -> list[dict]:
     """
     Evaluate a batch of knight paths for a given ABCCombination and prepare results for batch insertion.
@@ -64,25 +87,130 @@ def evaluate_knight_paths_for_abc_combination(
     Args:
         combination (ABCCombination): The ABCCombination instance.
         knight_paths_batch (List[KnightPath]): List of knight paths in the current batch.
+        abort_stats (dict, optional): Receives the number of "paths" and their "moves", the number of paths
+            "aborted" once their score passed 2024, and the number of "moves_scored" until then.
 
     Returns:
         list[dict]: List of dicts containing path scores ready for bulk insert.
     """
     A, B, C = combination.A, combination.B, combination.C
 
-    # Need to evaluate twice somehow. The first `eval()` only substitutes the values of A, B, C.
+    # Each distinct expression is compiled once per worker, and gives up as soon as the score passes 2024.
+    functions = [compile_bounded_expression(path.expression) for path in knight_paths]
+    results = [function(A, B, C) for function in functions]
     path_scores = [
+        {"abc_combination_id": combination.id, "knight_path_id": path.id, "score": score}
+        for path, (score, _) in zip(knight_paths, results)
+        if score == PATH_SUM
+    ]
+
+    if abort_stats is not None:
+        abort_stats["paths"] = abort_stats.get("paths", 0) + len(knight_paths)
+        abort_stats["aborted"] = abort_stats.get("aborted", 0) + sum(1 for score, _ in results if score > PATH_SUM)
+        abort_stats["moves"] = abort_stats.get("moves", 0) + sum(function.n_moves for function in functions)
+        abort_stats["moves_scored"] = abort_stats.get("moves_scored", 0) + sum(moves for _, moves in results)
+    return path_scores
+
+
+def evaluate_knight_paths_vectorized(
+    combinations: list[ABCCombination], knight_paths: list[KnightPath], abort_stats: Optional[dict[str, int]] = None
+) -> list[dict]:
+    """
+    Same as `evaluate_knight_paths_for_abc_combination()`, for many combinations at once with NumPy.
+
+    Args:
+        combinations (list of ABCCombination): The ABCCombination instances.
+        knight_paths (list of KnightPath): List of knight paths in the current batch.
+        abort_stats (dict, optional): See `evaluate_knight_paths_for_abc_combination()`.
+
+    Returns:
+        list[dict]: List of dicts containing path scores of 2024, ready for bulk insert.
+    """
+    symbols, lengths = encode_expressions(path.expression for path in knight_paths)
+    scores = score_encoded_paths(symbols, lengths, [(c.A, c.B, c.C) for c in combinations], abort_stats=abort_stats)
+    return [
         {
-            "abc_combination_id": combination.id,
-            "knight_path_id": path.id,
-            "score": eval(eval(path.expression.format(A=A, B=B, C=C))),
+            "abc_combination_id": combinations[combination_index].id,
+            "knight_path_id": knight_paths[path_index].id,
+            "score": PATH_SUM,
         }
-        for path in knight_paths
+        for combination_index, path_index in zip(*np.nonzero(scores == PATH_SUM))
     ]
-    # Store the evaluated score in PathScore table only when it is equal to 2024:
-    path_scores = [path for path in path_scores if path["score"] == PATH_SUM]
 
-    return path_scores
+
+def evaluate_knight_paths_with_abort_stats(
+    combination: ABCCombination, knight_paths: list[KnightPath], vectorized: bool = False
+) -> tuple[list[dict], dict[str, int]]:
+    """Worker function: evaluate a batch of knight paths, and return how early the paths were abandoned."""
+    abort_stats = {}
+    if vectorized:
+        path_scores = evaluate_knight_paths_vectorized([combination], knight_paths, abort_stats)
+    else:
+        path_scores = evaluate_knight_paths_for_abc_combination(combination, knight_paths, abort_stats)
+    return path_scores, abort_stats
+
+
+def score_polynomials_with_abort_stats(
+    combination: ABCCombination, expressions: dict[int, str], vectorized: bool = False
+) -> tuple[dict[int, int], dict[str, int]]:
+    """
+    Worker function: score one expression per polynomial, for the `ScoreCache` of `solver()`.
+
+    Args:
+        combination (ABCCombination): The ABCCombination instance.
+        expressions (dict of int to str): An expression of every polynomial to score, keyed by the polynomial hash.
+        vectorized (bool): Score with NumPy, see `evaluate_knight_paths_vectorized()`.
+
+    Returns:
+        tuple[dict[int, int], dict[str, int]]: Score of every polynomial, keyed by its hash, where scores above 2024
+            are lower bounds above it, and the statistics of bounded scoring.
+    """
+    A, B, C = combination.A, combination.B, combination.C
+    abort_stats = {}
+    if vectorized:
+        symbols, lengths = encode_expressions(expressions.values())
+        scores = score_encoded_paths(symbols, lengths, (A, B, C), abort_stats=abort_stats).tolist()
+        return dict(zip(expressions, scores)), abort_stats
+
+    functions = [compile_bounded_expression(expression) for expression in expressions.values()]
+    results = [function(A, B, C) for function in functions]
+    abort_stats["paths"] = len(results)
+    abort_stats["aborted"] = sum(1 for score, _ in results if score > PATH_SUM)
+    abort_stats["moves"] = sum(function.n_moves for function in functions)
+    abort_stats["moves_scored"] = sum(moves for _, moves in results)
+    return {polynomial_hash: score for polynomial_hash, (score, _) in zip(expressions, results)}, abort_stats
+
+
+def format_abort_stats(abort_stats: dict[str, int]) -> str:
+    """Summarize the statistics of bounded scoring, e.g. "95.0% of 200000 paths abandoned, 38.2% of moves scored"."""
+    paths = abort_stats.get("paths", 0)
+    moves = abort_stats.get("moves", 0)
+    return (
+        f"{abort_stats.get('aborted', 0) / max(paths, 1):.1%} of {paths} paths abandoned, "
+        f"{abort_stats.get('moves_scored', 0) / max(moves, 1):.1%} of moves scored"
+    )
+
+
+def evaluate_knight_paths_by_prefix(combinations: list[ABCCombination], knight_paths: list[KnightPath]) -> list[dict]:
+    """
+    Same as `evaluate_knight_paths_for_abc_combination()`, for many combinations sharing a `PrefixScorer`.
+
+    The paths are sorted by signature once, then every combination only scores the prefixes they don't share,
+    and skips every prefix that already scores more than 2024.
+
+    Args:
+        combinations (list of ABCCombination): The ABCCombination instances.
+        knight_paths (list of KnightPath): List of knight paths in the current batch.
+
+    Returns:
+        list[dict]: List of dicts containing path scores of 2024, ready for bulk insert.
+    """
+    scorer = PrefixScorer.from_expressions([path.expression for path in knight_paths])
+    return [
+        {"abc_combination_id": combination.id, "knight_path_id": knight_paths[index].id, "score": PATH_SUM}
+        for combination in combinations
+        for index in scorer.hits(combination.A, combination.B, combination.C)
+    ]
 
 
 def insert_unique_path_scores(session: Session, path_scores: list[dict]) -> None:
@@ -112,7 +240,13 @@ def insert_unique_path_scores(session: Session, path_scores: list[dict]) -> None
         session.commit()
 
 
-def solver(session: Session, max_workers: int = 16, batch_size: int = 100000):
+def solver(
+    session: Session,
+    max_workers: int = 16,
+    batch_size: int = 100000,
+    vectorized: bool = False,
+    score_cache: Optional[ScoreCache] = None,
+):
     """
     Main solver function that evaluates ABC combinations across batches of knight paths in parallel.
 
@@ -120,26 +254,64 @@ def solver(session: Session, max_workers: int = 16, batch_size: int = 100000):
         session (Session): SQLAlchemy session to interact with the database.
         max_workers (int): Maximum number of threads for parallel processing.
         batch_size (int): Batch size for knight paths.
+        vectorized (bool): Score every batch with NumPy, see `evaluate_knight_paths_vectorized()`.
+        score_cache (ScoreCache, optional): Scores of earlier runs, keyed by polynomial. Only the polynomials
+            missing from it are sent to the workers, once per batch, and their scores are added to it.
     """
     all_scores = []
 
     for combination in abc_combination_generator(session):
-        print(f"Processing A+B+C={combination.sum_abc} (A={combination.A} B={combination.B} C={combination.C})...")
-        jobs = []
+        A, B, C = combination.A, combination.B, combination.C
+        print(f"Processing A+B+C={combination.sum_abc} (A={A} B={B} C={C})...")
+        # Every job, with the batch, the polynomial hash of its paths and their cached scores when using the cache.
+        jobs = {}
+        abort_stats = {}
         # with ThreadPoolExecutor(max_workers=max_workers) as executor:
         with ProcessPoolExecutor(max_workers=max_workers) as executor:
             for path_batch in generate_batches(session, batch_size=batch_size):
-                jobs.append(executor.submit(evaluate_knight_paths_for_abc_combination, combination, path_batch))
+                if score_cache is None:
+                    job = executor.submit(evaluate_knight_paths_with_abort_stats, combination, path_batch, vectorized)
+                    jobs[job] = None
+                    continue
+                hashes = [
+                    (
+                        path.polynomial_hash
+                        if path.polynomial_hash is not None
+                        else expression_polynomial_hash(path.expression)
+                    )
+                    for path in path_batch
+                ]
+                cached_scores = score_cache.get_many(hashes, A, B, C)
+                missing = {
+                    polynomial_hash: path.expression
+                    for polynomial_hash, path in zip(hashes, path_batch)
+                    if polynomial_hash not in cached_scores
+                }
+                job = executor.submit(score_polynomials_with_abort_stats, combination, missing, vectorized)
+                jobs[job] = (path_batch, hashes, cached_scores)
 
             for job in as_completed(jobs):
                 # Collect results as they complete.
                 sleep(1)
                 try:
-                    path_scores = job.result()
+                    if score_cache is None:
+                        path_scores, batch_abort_stats = job.result()
+                    else:
+                        path_batch, hashes, scores = jobs[job]
+                        new_scores, batch_abort_stats = job.result()
+                        score_cache.put_many(new_scores, A, B, C)
+                        scores.update(new_scores)
+                        path_scores = [
+                            {"abc_combination_id": combination.id, "knight_path_id": path.id, "score": PATH_SUM}
+                            for path, polynomial_hash in zip(path_batch, hashes)
+                            if scores[polynomial_hash] == PATH_SUM
+                        ]
                     # del jobs[job]
                 except RuntimeError as e:
                     print(f"Error encountered: {e}")
                     continue
+                for key, value in batch_abort_stats.items():
+                    abort_stats[key] = abort_stats.get(key, 0) + value
                 # print(path_scores[0]["score"])
                 # print(type(path_scores[0]["score"]))
                 if len(path_scores) > 0:
@@ -155,12 +327,135 @@ def solver(session: Session, max_workers: int = 16, batch_size: int = 100000):
         )
         session.commit()
         # break
-        print(f"Processed A+B+C={combination.sum_abc} (A={combination.A} B={combination.B} C={combination.C}).")
+        print(f"Processed A+B+C={combination.sum_abc} (A={A} B={B} C={C}).")
+        print(f"Bounded scoring: {format_abort_stats(abort_stats)}.")
+        if score_cache is not None:
+            score_cache.flush()
+            print(f"Score cache: {score_cache.format_stats()}.")
 
     print("All combinations evaluated.")
     return all_scores
 
 
+def polynomial_solver(session: Session) -> list[int]:
+    """
+    Same as `solver()`, but every distinct polynomial of the stored paths is scored once per ABC combination.
+
+    The paths stored before `polynomial_hash` existed are hashed first, with `hash_knight_path_polynomials()`:
+    they would otherwise be skipped, while their combinations are marked as evaluated.
+    The paths of every polynomial scoring 2024 are then stored in `PathScore`.
+
+    Args:
+        session (Session): SQLAlchemy session to interact with the database.
+
+    Returns:
+        list[int]: Scores of the paths stored in `PathScore`, i.e. 2024 for each of them.
+    """
+    hash_knight_path_polynomials(session)
+    polynomials = [
+        (polynomial_hash, canonical_polynomial(expression_to_polynomial(expression)))
+        for polynomial_hash, expression in get_distinct_polynomials(session)
+    ]
+    print(f"Evaluating {len(polynomials)} distinct polynomials.")
+    all_scores = []
+
+    for combination in abc_combination_generator(session):
+        A, B, C = combination.A, combination.B, combination.C
+        print(f"Processing A+B+C={combination.sum_abc} (A={A} B={B} C={C})...")
+        powers = monomial_powers(A, B, C)
+        hits = [
+            polynomial_hash for polynomial_hash, terms in polynomials if evaluate_polynomial(terms, powers) == PATH_SUM
+        ]
+        if hits:
+            path_scores = [
+                {"abc_combination_id": combination.id, "knight_path_id": knight_path_id, "score": PATH_SUM}
+                for knight_path_id in get_knight_path_ids_by_polynomial(session, hits)
+            ]
+            print(f"{len(path_scores)} valid path detected!")
+            insert_unique_path_scores(session, path_scores)
+            all_scores.extend([my_dict["score"] for my_dict in path_scores])
+
+        # Update score and status in the database.
+        session.query(ABCCombination).filter(ABCCombination.id == combination.id).update(
+            {ABCCombination.evaluated: True}
+        )
+        session.commit()
+        print(f"Processed A+B+C={combination.sum_abc} (A={A} B={B} C={C}).")
+
+    print("All combinations evaluated.")
+    return all_scores
+
+
+def evaluate_signatures_for_abc_combination(
+    combination: ABCCombination, path_signatures: list[PathSignature]
+) -> list[PathSignature]:
+    """
+    Evaluate path signatures for a given ABCCombination.
+
+    Args:
+        combination (ABCCombination): The ABCCombination instance.
+        path_signatures (list of PathSignature): Distinct signatures, each standing for `path_count` paths.
+
+    Returns:
+        list[PathSignature]: Signatures whose paths score exactly 2024.
+    """
+    A, B, C = combination.A, combination.B, combination.C
+    return [
+        signature
+        for signature in path_signatures
+        if compile_bounded_expression(signature.expression)(A, B, C)[0] == PATH_SUM
+    ]
+
+
+def signature_solver(session: Session, max_solutions: int = 1) -> list[Solution]:
+    """
+    Solve with the signatures stored by `generate_and_store_signatures()`, instead of every knight path.
+
+    ABC combinations are tried by increasing `sum_abc`. A combination is a solution if signatures from both "a1"
+    and "a6" score 2024, and their representative paths are stored as a Solution.
+
+    Args:
+        session (Session): SQLAlchemy session to interact with the database.
+        max_solutions (int): Number of solutions to find before stopping.
+
+    Returns:
+        list[Solution]: Solutions found, ordered by `sum_abc`.
+    """
+    signatures_a1 = get_path_signatures(session, start="a1")
+    signatures_a6 = get_path_signatures(session, start="a6")
+    print(f"Evaluating {len(signatures_a1)} signatures from a1 and {len(signatures_a6)} signatures from a6.")
+
+    solutions = []
+    for combination in session.query(ABCCombination).order_by(asc(ABCCombination.sum_abc)):
+        hits_a1 = evaluate_signatures_for_abc_combination(combination, signatures_a1)
+        if not hits_a1:
+            continue
+        hits_a6 = evaluate_signatures_for_abc_combination(combination, signatures_a6)
+        if not hits_a6:
+            continue
+
+        A, B, C = combination.A, combination.B, combination.C
+        n_paths_a1 = sum(signature.path_count for signature in hits_a1)
+        n_paths_a6 = sum(signature.path_count for signature in hits_a6)
+        print(f"A+B+C={combination.sum_abc} (A={A} B={B} C={C}): {n_paths_a1} paths from a1, {n_paths_a6} from a6.")
+        path1, path2 = hits_a1[0].path, hits_a6[0].path
+        solution = add_solution(
+            session,
+            A=A,
+            B=B,
+            C=C,
+            path1=path1,
+            path2=path2,
+            score1=calculate_path_score(GRID, string_to_path(path1), A, B, C),
+            score2=calculate_path_score(GRID, string_to_path(path2), A, B, C),
+            sum_abc=combination.sum_abc,
+        )
+        solutions.append(solution)
+        if len(solutions) >= max_solutions:
+            break
+    return solutions
+
+
 # Run the optimization
 if __name__ == "__main__":
     # Define a test path as an example (replace this with actual path data)
@@ -2,12 +2,8 @@ from enum import Enum, auto
 
 import plotly.graph_objects as go
 
-from knight_moves_6.calculation.calculate_score import (
-    calculate_path_score,
-    calculate_path_score_cumulative,
-    calculate_path_score_marginal,
-)
-from knight_moves_6.calculation.coordinate_map import coord_to_index, path_to_solution_string, path_to_string
+from knight_moves_6.calculation.calculate_score import ScoreTrace, calculate_path_score, trace_path_score
+from knight_moves_6.calculation.coordinate_map import path_to_solution_string, path_to_string
 
 
 class ShowPath(Enum):
@@ -16,6 +12,11 @@ class ShowPath(Enum):
     BOTH = auto()
 
 
+def _format_step(trace: ScoreTrace, i: int) -> str:
+    """Text of a step of a path, e.g. "A (x2): 4" for the symbol, its operator and value, and the score."""
+    return f"{trace.symbols[i]} ({trace.operators[i]}{trace.values[i]}): {trace.cumulative[i]}"
+
+
 def visualize_grid(
     grid: list[list[str]],
     path1: list[str],
@@ -40,18 +41,9 @@ def visualize_grid(
     Returns:
         The visualization plot.
     """
-    # Mapping grid values to their corresponding integers
-    symbol_map = {"A": A, "B": B, "C": C}
-
-    # Calculate cumulative and marginal scores along the path
-    path1_cumulative_scores = calculate_path_score_cumulative(grid, path1, A, B, C)
-    path2_cumulative_scores = calculate_path_score_cumulative(grid, path2, A, B, C)
-    path1_marginal_scores = calculate_path_score_marginal(grid, path1, A, B, C)
-    path2_marginal_scores = calculate_path_score_marginal(grid, path2, A, B, C)
-
-    # Convert path to indices.
-    path1_row_col = [coord_to_index(coord) for coord in path1]
-    path2_row_col = [coord_to_index(coord) for coord in path2]
+    # Trace the scores along both paths, in a single pass each.
+    path1_trace = trace_path_score(grid, path1, A, B, C)
+    path2_trace = trace_path_score(grid, path2, A, B, C)
 
     # Initialize accumulated score grid and text annotations for cells.
     cumulative_scores = [[None] * 6 for _ in range(6)]
@@ -59,31 +51,12 @@ def visualize_grid(
     arrows_1 = []
     arrows_2 = []
 
-    # TODO: Don't duplicate the accumulation logic.
-    #  The code is duplicated because we wish to display the operators +/x,
-    #  which is information not found in `calculate_path_score_cumulative()`.
     # Start accumulating score along Path 1.
     if show_path in (ShowPath.BOTH, ShowPath.A1):
-        prev_row, prev_col = path1_row_col[0]
-        prev_symbol = grid[prev_row][prev_col]
-        score = symbol_map[prev_symbol]
-        for i, (row, col) in enumerate(path1_row_col):
-            curr_symbol = grid[row][col]
-            score_change = symbol_map[curr_symbol]
-            operator = "+"
-
-            # Apply the scoring rule based on the path 1.
+        for i, (row, col) in enumerate(path1_trace.cells):
             if i > 0:
-                if curr_symbol == prev_symbol:
-                    # Same value, add.
-                    score += score_change
-                    operator = "+"
-                else:
-                    # Different value, multiply.
-                    score *= score_change
-                    operator = "x"
-
                 # Calculate start and end positions centered on cells for plotting arrows.
+                prev_row, prev_col = path1_trace.cells[i - 1]
                 arrows_1.append(
                     {
                         "start_x": prev_col,
@@ -92,39 +65,19 @@ def visualize_grid(
                         "end_y": row,
                     }
                 )
-                prev_row, prev_col = row, col
-                prev_symbol = curr_symbol
 
             # This isn't really the accumulated value, but a hack to display similar colors along the same path.
-            cumulative_scores[row][col] = (i + 1) / len(path2) + 1  # score == path1_cumulative_scores[i]
-            if score != path1_cumulative_scores[i]:
-                raise ValueError("Score calculation mismatch.")
+            cumulative_scores[row][col] = (i + 1) / len(path2) + 1  # score == path1_trace.cumulative[i]
 
             # Generate cell text (e.g., "A (x2): 4" for original value, marginal increase, and accumulated value).
-            cell_text[row][col] = f"Path 1 Step {i+1}:<br>{curr_symbol} ({operator}{score_change}): {score}"
+            cell_text[row][col] = f"Path 1 Step {i+1}:<br>{_format_step(path1_trace, i)}"
 
     # Start accumulating score along Path 2.
     if show_path in (ShowPath.BOTH, ShowPath.A6):
-        prev_row, prev_col = path2_row_col[0]
-        prev_symbol = grid[prev_row][prev_col]
-        score = symbol_map[prev_symbol]
-        for i, (row, col) in enumerate(path2_row_col):
-            curr_symbol = grid[row][col]
-            score_change = symbol_map[curr_symbol]
-            operator = "+"
-
-            # Apply the scoring rule based on the path.
+        for i, (row, col) in enumerate(path2_trace.cells):
             if i > 0:
-                if curr_symbol == prev_symbol:
-                    # Same value, add.
-                    score += score_change
-                    operator = "+"
-                else:
-                    # Different value, multiply.
-                    score *= score_change
-                    operator = "x"
-
                 # Store start and end positions centered on cells for plotting arrows.
+                prev_row, prev_col = path2_trace.cells[i - 1]
                 arrows_2.append(
                     {
                         "start_x": prev_col,
@@ -133,8 +86,6 @@ def visualize_grid(
                         "end_y": row,
                     }
                 )
-                prev_row, prev_col = row, col
-                prev_symbol = curr_symbol
 
             # Since this is the second path, multiply by -1 to give it a different color on the heatmap.
             # This isn't really the accumulated value, but a hack to display similar colors along the same path.
@@ -142,16 +93,12 @@ def visualize_grid(
                 cumulative_scores[row][col] += -(i + 1) / len(path2) - 1  # - score
             else:
                 cumulative_scores[row][col] = -(i + 1) / len(path2) - 1  # - score
-            if score != path2_cumulative_scores[i]:
-                raise ValueError("Score calculation mismatch.")
 
             # Generate cell text (e.g., "A (x2): 4" for original value, marginal increase, and accumulated value).
             if cell_text[row][col] == "":
-                cell_text[row][col] += f"Path 2 Step {i+1}:<br>{curr_symbol} ({operator}{score_change}): {score}"
+                cell_text[row][col] += f"Path 2 Step {i+1}:<br>{_format_step(path2_trace, i)}"
             else:
-                cell_text[row][
-                    col
-                ] += f"<br><br>Path 2 Step {i+1}:<br>{curr_symbol} ({operator}{score_change}): {score}"
+                cell_text[row][col] += f"<br><br>Path 2 Step {i+1}:<br>{_format_step(path2_trace, i)}"
 
     # Set up the plot title and subtitle.
     title = f"A+B+C={A + B + C} (A={A}, B={B}, C={C})"